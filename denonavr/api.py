@@ -10,20 +10,37 @@ This module implements the REST and Telnet APIs to Denon AVR receivers.
 import asyncio
 import contextlib
 import logging
+import re
 import time
+import weakref
 import xml.etree.ElementTree as ET
 from asyncio import timeout as asyncio_timeout
-from collections import defaultdict
+from collections import Counter, deque
 from collections.abc import Hashable
 from io import BytesIO
-from typing import Callable, DefaultDict, Dict, List, Optional, Set, Tuple
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    ItemsView,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 import attr
 import httpx
 from defusedxml import DefusedXmlException
-from defusedxml.ElementTree import ParseError, fromstring
+from defusedxml.ElementTree import DefusedXMLParser, ParseError
 
 from .appcommand import AppCommandCmd
+from .cache import ResponseCache
+from .circuit_breaker import CircuitBreaker, async_probe_connection
 from .const import (
     ALL_TELNET_EVENTS,
     ALL_ZONE_TELNET_EVENTS,
@@ -39,7 +56,7 @@ from .const import (
     ZONE2,
     ZONE3,
 )
-from .decorators import async_handle_receiver_exceptions, cache_result
+from .decorators import async_handle_receiver_exceptions, cache_result, single_flight
 from .exceptions import (
     AvrIncompleteResponseError,
     AvrInvalidResponseError,
@@ -48,15 +65,47 @@ from .exceptions import (
     AvrTimoutError,
     DenonAvrError,
 )
-from .rate_limiter import AdaptiveLimiter
+from .rate_limiter import (
+    HEDGE_QUANTILE,
+    MIN_LATENCY_SAMPLES,
+    AdaptiveLimiter,
+    EWMALatency,
+    LatencyWindow,
+    RequestPriority,
+    adaptive_timeout,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 _MONITOR_INTERVAL = 30
+_MAX_TELNET_LINE_SIZE = 4096
+_SYNC_WINDOW = 8
+_QUERY_TIMEOUT_RTT_FACTOR = 4.0
+_MIN_QUERY_TIMEOUT = 0.2
+_MAX_QUERY_TIMEOUT = 1.0
+_MIN_CONNECT_TIMEOUT = 1.0
+_APPCOMMAND_BODY_CACHE_SIZE = 32
+_IMAGE_CACHE_MAX_BYTES = 4 * 1024 * 1024
+# Rest of a partly parsed response which is read to keep the connection alive
+_MAX_DRAIN_BYTES = 64 * 1024
+# Covers might change without a new URL, don't keep them forever
+_IMAGE_CACHE_TTL = 300.0
+
+# Index of cmd elements by cmd_text and name per AppCommand response
+_AppCommandIndex = Dict[Tuple[Optional[str], Optional[str]], List[ET.Element]]
+_APPCOMMAND_INDEXES: "weakref.WeakKeyDictionary[ET.Element, _AppCommandIndex]" = (
+    weakref.WeakKeyDictionary()
+)
 
 _DENON_UPDATE_COMMANDS: List[str] | None = None
 _MARANTZ_UPDATE_COMMANDS: List[str] | None = None
 
+# Commands setting an absolute value which makes older commands obsolete
+_SUPERSEDING_COMMAND_PATTERN = re.compile(
+    r"(?P<family>(?:Z[23])?(?:MV|CV[A-Z0-9]+ |SSTTRLEV "
+    r"|PS(?:BAS|TRE|LFE|SWL\d?|DELAY|DEL|BSC|DIC|CNTAMT) )|Z[23])\d+"
+)
+
 _EVENTS_PRODUCING_DUPLICATES = [
     "INFSIGRES I",
     "INFSIGRES O",
@@ -76,14 +125,211 @@ _EVENTS_PRODUCING_DUPLICATES = [
 ]
 
 
-def telnet_event_map_factory() -> Dict[str, List]:
-    """Create telnet event map."""
-    event_map: DefaultDict[str, List] = defaultdict(list)
-    for event in TELNET_EVENTS:
-        event_map[event[0:2]].append(event)
-    for value in event_map.values():
-        value.sort(key=len, reverse=True)
-    return dict(event_map)
+class PrefixTable:
+    """
+    Longest-prefix lookup table compiled from a mapping of string prefixes.
+
+    Lookups only probe the distinct prefix lengths of the table, longest first,
+    so their cost does not depend on the number of prefixes.
+    """
+
+    __slots__ = ("_entries", "_lengths")
+
+    def __init__(self, entries: Optional[Dict[str, Any]] = None) -> None:
+        """Initialize the table."""
+        self._entries: Dict[str, Any] = dict(entries or {})
+        self._lengths: Tuple[int, ...] = ()
+        self._compile()
+
+    def _compile(self) -> None:
+        """Compile the prefix lengths which are probed on lookup."""
+        self._lengths = tuple(sorted({len(key) for key in self._entries}, reverse=True))
+
+    def __setitem__(self, prefix: str, value: Any) -> None:
+        """Add or replace a prefix."""
+        self._entries[prefix] = value
+        self._compile()
+
+    def __getitem__(self, prefix: str) -> Any:
+        """Return the value of a prefix."""
+        return self._entries[prefix]
+
+    def __delitem__(self, prefix: str) -> None:
+        """Remove a prefix."""
+        del self._entries[prefix]
+        self._compile()
+
+    def __contains__(self, prefix: object) -> bool:
+        """Return True if the exact prefix is in the table."""
+        return prefix in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the prefixes of the table."""
+        return iter(self._entries)
+
+    def items(self) -> ItemsView[str, Any]:
+        """Return prefixes and their values."""
+        return self._entries.items()
+
+    def longest_match(self, text: str) -> Optional[Tuple[str, Any]]:
+        """Return the longest prefix of text and its value or None."""
+        entries = self._entries
+        size = len(text)
+        for length in self._lengths:
+            if length > size:
+                continue
+            prefix = text[:length]
+            if prefix in entries:
+                return prefix, entries[prefix]
+        return None
+
+
+def telnet_event_table_factory() -> PrefixTable:
+    """Create telnet event lookup table."""
+    return PrefixTable({event: event for event in TELNET_EVENTS})
+
+
+@attr.s(frozen=True, slots=True)
+class _SubEventHandler:
+    """Adapt a sub-event handler to the telnet callback signature."""
+
+    handler: Callable[..., None] = attr.ib()
+    with_zone: bool = attr.ib(default=False)
+
+    def __call__(self, zone: str, _event: str, parameter: str) -> None:
+        """Call the handler."""
+        if self.with_zone:
+            self.handler(zone, parameter)
+        else:
+            self.handler(parameter)
+
+
+def _coalescing_family(command: str) -> Optional[str]:
+    """Return the family of a command which supersedes older commands of it."""
+    match = _SUPERSEDING_COMMAND_PATTERN.fullmatch(command)
+    if match is None:
+        return None
+    return match.group("family")
+
+
+def _is_query(command: str) -> bool:
+    """Return True if a telnet command queries the state of the receiver."""
+    return command.endswith("?")
+
+
+@attr.s(auto_attribs=True, slots=True, eq=False)
+class _OutgoingCommand:
+    """A telnet command which is queued for or written to the receiver."""
+
+    command: str
+    family: Optional[str]
+    settled: asyncio.Future
+    superseded: int = 0
+    confirmation: Optional[asyncio.Future] = None
+    start: float = 0.0
+
+    def settle(self, err: Optional[BaseException] = None) -> None:
+        """Resolve the commands superseded by this command."""
+        if self.settled.done():
+            return
+        if err is None or not self.superseded:
+            self.settled.set_result(None)
+        elif isinstance(err, asyncio.CancelledError):
+            self.settled.set_exception(
+                AvrProcessingError(f"Sending command {self.command} was cancelled")
+            )
+        else:
+            self.settled.set_exception(err)
+
+
+def _is_set_command(cmd: AppCommandCmd) -> bool:
+    """Return True if the AppCommand changes the state of the receiver."""
+    return cmd.set_command is not None or (cmd.name or cmd.cmd_text or "").startswith(
+        "Set"
+    )
+
+
+class _XMLStreamTarget:
+    """
+    Tree builder target which tracks the completed top level elements.
+
+    The document is complete when one tag of each group of stop_tags was
+    parsed completely.
+    """
+
+    def __init__(self, stop_tags: Optional[Tuple[Tuple[str, ...], ...]]) -> None:
+        """Initialize the target."""
+        self._builder = ET.TreeBuilder()
+        self._stop_tags = stop_tags
+        self._completed_tags: Set[str] = set()
+        self._depth = 0
+        self.root: Optional[ET.Element] = None
+
+    @property
+    def complete(self) -> bool:
+        """Return True if all required top level elements were parsed."""
+        if self._stop_tags is None or self.root is None:
+            return False
+        return all(
+            not self._completed_tags.isdisjoint(tags) for tags in self._stop_tags
+        )
+
+    def start(self, tag: str, attrs: Dict[str, str]) -> ET.Element:
+        """Handle start of an element."""
+        element = self._builder.start(tag, attrs)
+        if self.root is None:
+            self.root = element
+        self._depth += 1
+        return element
+
+    def end(self, tag: str) -> ET.Element:
+        """Handle end of an element."""
+        self._depth -= 1
+        if self._depth == 1:
+            self._completed_tags.add(tag)
+        return self._builder.end(tag)
+
+    def data(self, data: str) -> None:
+        """Handle text of an element."""
+        self._builder.data(data)
+
+    def close(self) -> ET.Element:
+        """Return the root element of the document."""
+        return self._builder.close()
+
+
+async def _async_parse_xml_stream(
+    chunks: AsyncIterator[bytes],
+    stop_tags: Optional[Tuple[Tuple[str, ...], ...]] = None,
+) -> ET.Element:
+    """
+    Parse XML incrementally from a byte stream.
+
+    Parsing stops early when one of the top level tags of each group of
+    stop_tags was parsed, the remaining document is not parsed in this case.
+    """
+    target = _XMLStreamTarget(stop_tags)
+    parser = DefusedXMLParser(target=target)
+    async for chunk in chunks:
+        parser.feed(chunk)
+        if target.complete:
+            return target.root
+    return parser.close()
+
+
+async def _async_drain_stream(chunks: AsyncIterator[bytes]) -> None:
+    """
+    Read the rest of a partly parsed response.
+
+    The connection can be reused only when the response was read completely.
+    Responses with a larger rest than _MAX_DRAIN_BYTES are not read, their
+    connection is closed instead.
+    """
+    drained = 0
+    async for chunk in chunks:
+        drained += len(chunk)
+        if drained > _MAX_DRAIN_BYTES:
+            return
 
 
 @attr.s(auto_attribs=True, hash=False)
@@ -103,10 +349,42 @@ class HTTPXAsyncClient:
         default=attr.Factory(AdaptiveLimiter),
     )
 
+    stats: Counter = attr.ib(default=attr.Factory(Counter), init=False)
+    response_cache: ResponseCache = attr.ib(
+        default=attr.Factory(
+            lambda self: ResponseCache(stats=self.stats), takes_self=True
+        ),
+        init=False,
+    )
+    _in_flight: Dict[Hashable, asyncio.Future] = attr.ib(
+        default=attr.Factory(dict), init=False
+    )
+    read_latencies: Dict[str, LatencyWindow] = attr.ib(
+        default=attr.Factory(dict), init=False
+    )
+
     def __attrs_post_init__(self) -> None:
         """Initialize after attrs creates the instance."""
         self._persistent_client = None
 
+    def read_timeout(self, url: str, default: float, minimum: float) -> float:
+        """Return the read timeout of an URL derived from its latencies."""
+        return adaptive_timeout(self.read_latencies.get(url), default, minimum=minimum)
+
+    def hedge_delay(self, url: str) -> Optional[float]:
+        """Return the delay before a read of an URL is hedged, if known."""
+        window = self.read_latencies.get(url)
+        if window is None or len(window) < MIN_LATENCY_SAMPLES:
+            return None
+        return window.quantile(HEDGE_QUANTILE)
+
+    def _record_read_latency(self, url: str, start: float) -> None:
+        """Record the latency of a XML read."""
+        window = self.read_latencies.get(url)
+        if window is None:
+            window = self.read_latencies[url] = LatencyWindow()
+        window.add(time.monotonic() - start)
+
     def _get_client(self) -> httpx.AsyncClient:
         if self._persistent_client is None:
             self._persistent_client = httpx.AsyncClient(
@@ -126,6 +404,7 @@ class HTTPXAsyncClient:
         return id(self)
 
     @cache_result
+    @single_flight
     @async_handle_receiver_exceptions
     async def async_get(
         self,
@@ -137,12 +416,13 @@ class HTTPXAsyncClient:
         cache_id: Hashable = None,
         record_latency: bool = True,
         skip_rate_limiter: bool = False,
+        priority: RequestPriority = RequestPriority.POLL,
     ) -> httpx.Response:
         """Call GET endpoint of Denon AVR receiver asynchronously."""
         client = self._get_client()
         start = time.monotonic()
         if not skip_rate_limiter:
-            await self.rate_limiter.acquire(rate_limit_key)
+            await self.rate_limiter.acquire(rate_limit_key, priority)
         async with client.stream(
             "GET", url, timeout=httpx.Timeout(timeout, read=read_timeout)
         ) as res:
@@ -153,7 +433,36 @@ class HTTPXAsyncClient:
             self.rate_limiter.record_latency(rate_limit_key, start)
         return res
 
+    @single_flight
+    @async_handle_receiver_exceptions
+    async def async_probe(
+        self,
+        url: str,
+        rate_limit_key: str,
+        timeout: float,
+        read_timeout: float,
+        *,
+        priority: RequestPriority = RequestPriority.POLL,
+    ) -> httpx.Headers:
+        """
+        Check if a GET endpoint is available without downloading its body.
+
+        Only the first byte is requested. If the receiver ignores the range,
+        the connection is closed before the body is read.
+        """
+        client = self._get_client()
+        await self.rate_limiter.acquire(rate_limit_key, priority)
+        async with client.stream(
+            "GET",
+            url,
+            headers={"Range": "bytes=0-0"},
+            timeout=httpx.Timeout(timeout, read=read_timeout),
+        ) as res:
+            res.raise_for_status()
+            return res.headers
+
     @cache_result
+    @single_flight
     @async_handle_receiver_exceptions
     async def async_post(
         self,
@@ -167,12 +476,13 @@ class HTTPXAsyncClient:
         cache_id: Hashable = None,
         record_latency: bool = True,
         skip_rate_limiter: bool = False,
+        priority: RequestPriority = RequestPriority.POLL,
     ) -> httpx.Response:
         """Call POST endpoint of Denon AVR receiver asynchronously."""
         client = self._get_client()
         start = time.monotonic()
         if not skip_rate_limiter:
-            await self.rate_limiter.acquire(rate_limit_key)
+            await self.rate_limiter.acquire(rate_limit_key, priority)
         async with client.stream(
             "POST",
             url,
@@ -187,6 +497,132 @@ class HTTPXAsyncClient:
             self.rate_limiter.record_latency(rate_limit_key, start)
         return res
 
+    @cache_result
+    @single_flight
+    @async_handle_receiver_exceptions
+    async def async_get_xml(
+        self,
+        url: str,
+        rate_limit_key: str,
+        timeout: float,
+        read_timeout: float,
+        *,
+        stop_tags: Optional[Tuple[Tuple[str, ...], ...]] = None,
+        cache_id: Hashable = None,
+        record_latency: bool = True,
+        skip_rate_limiter: bool = False,
+        priority: RequestPriority = RequestPriority.POLL,
+        hedge: bool = False,
+    ) -> ET.Element:
+        """
+        Call GET endpoint and parse the XML response while it is received.
+
+        If hedge is True and the response is slower than usual, the same
+        request is sent a second time and the first response is used.
+        """
+        client = self._get_client()
+        start = time.monotonic()
+        if not skip_rate_limiter:
+            await self.rate_limiter.acquire(rate_limit_key, priority)
+
+        async def async_fetch() -> ET.Element:
+            async with client.stream(
+                "GET", url, timeout=httpx.Timeout(timeout, read=read_timeout)
+            ) as res:
+                res.raise_for_status()
+                chunks = res.aiter_bytes()
+                xml = await _async_parse_xml_stream(chunks, stop_tags)
+                await _async_drain_stream(chunks)
+            return xml
+
+        async def async_hedge_fetch() -> ET.Element:
+            # The hedged request counts against the request budget too
+            await self.rate_limiter.acquire(rate_limit_key, RequestPriority.POLL)
+            return await async_fetch()
+
+        read_start = time.monotonic()
+        delay = self.hedge_delay(url) if hedge else None
+        if delay is None:
+            xml_root = await async_fetch()
+        else:
+            xml_root = await self._async_hedged(async_fetch, async_hedge_fetch, delay)
+        self._record_read_latency(url, read_start)
+
+        if record_latency:
+            self.rate_limiter.record_latency(rate_limit_key, start)
+        return xml_root
+
+    async def _async_hedged(
+        self,
+        fetch: Callable[[], Awaitable[ET.Element]],
+        hedge_fetch: Callable[[], Awaitable[ET.Element]],
+        delay: float,
+    ) -> ET.Element:
+        """
+        Return the first successful result of fetch and hedge_fetch.
+
+        hedge_fetch is started if fetch did not finish within delay.
+        The remaining call is cancelled as soon as one call succeeded.
+        """
+        tasks = [asyncio.ensure_future(fetch())]
+        try:
+            done, _pending = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                _LOGGER.debug("Hedging read after %.3f seconds", delay)
+                self.stats["hedged"] += 1
+                tasks.append(asyncio.ensure_future(hedge_fetch()))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self.stats["hedge_won"] += 1
+                        return task.result()
+            # All calls failed, raise the error of the first one
+            return tasks[0].result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @cache_result
+    @single_flight
+    @async_handle_receiver_exceptions
+    async def async_post_xml(
+        self,
+        url: str,
+        rate_limit_key: str,
+        timeout: float,
+        read_timeout: float,
+        *,
+        content: Optional[bytes] = None,
+        cache_id: Hashable = None,
+        record_latency: bool = True,
+        skip_rate_limiter: bool = False,
+        priority: RequestPriority = RequestPriority.POLL,
+    ) -> ET.Element:
+        """Call POST endpoint and parse the XML response while it is received."""
+        client = self._get_client()
+        start = time.monotonic()
+        if not skip_rate_limiter:
+            await self.rate_limiter.acquire(rate_limit_key, priority)
+        read_start = time.monotonic()
+        async with client.stream(
+            "POST",
+            url,
+            content=content,
+            timeout=httpx.Timeout(timeout, read=read_timeout),
+        ) as res:
+            res.raise_for_status()
+            xml_root = await _async_parse_xml_stream(res.aiter_bytes())
+        self._record_read_latency(url, read_start)
+
+        if record_latency:
+            self.rate_limiter.record_latency(rate_limit_key, start)
+        return xml_root
+
     async def aclose(self):
         """Close persistent client when done."""
         if self._persistent_client:
@@ -204,6 +640,7 @@ class DenonAVRApi:
     port: int = attr.ib(converter=int, default=80)
     timeout: float = attr.ib(converter=float, default=2.0)
     read_timeout: float = attr.ib(converter=float, default=15.0)
+    hedge_reads: bool = attr.ib(converter=bool, default=False)
     _appcommand_update_tags: Tuple[AppCommandCmd] = attr.ib(
         validator=attr.validators.deep_iterable(
             attr.validators.instance_of(AppCommandCmd),
@@ -223,35 +660,82 @@ class DenonAVRApi:
         default=attr.Factory(HTTPXAsyncClient),
         init=False,
     )
+    _appcommand_bodies: Dict[Tuple[AppCommandCmd, ...], bytes] = attr.ib(
+        default=attr.Factory(dict), init=False
+    )
+    _state_change_callbacks: List[Callable[[], None]] = attr.ib(
+        default=attr.Factory(list), init=False
+    )
+    circuit_breaker: CircuitBreaker = attr.ib(
+        validator=attr.validators.instance_of(CircuitBreaker),
+        default=attr.Factory(CircuitBreaker),
+    )
+    image_cache: ResponseCache = attr.ib(
+        default=attr.Factory(
+            lambda: ResponseCache(
+                max_bytes=_IMAGE_CACHE_MAX_BYTES,
+                ttl_policies={},
+                default_ttl=_IMAGE_CACHE_TTL,
+            )
+        ),
+        init=False,
+    )
 
     def __attrs_post_init__(self) -> None:
         """Initialize special attributes."""
         self.httpx_async_client.timeout = self.timeout
 
+    async def _async_probe(self) -> None:
+        """Probe if the receiver is reachable again."""
+        await async_probe_connection(self.host, self.port, self.connect_timeout)
+
+    @property
+    def connect_timeout(self) -> float:
+        """
+        Return the connect timeout derived from the observed latencies.
+
+        timeout is the upper bound, it is used until enough latencies are known.
+        """
+        return self.httpx_async_client.rate_limiter.timeout(
+            self.host, self.timeout, minimum=_MIN_CONNECT_TIMEOUT
+        )
+
+    def _xml_read_timeout(self, endpoint: str, read_timeout: float) -> float:
+        """Return the read timeout of a XML endpoint bounded by read_timeout."""
+        return self.httpx_async_client.read_timeout(
+            endpoint, read_timeout, max(self.timeout, _MIN_CONNECT_TIMEOUT)
+        )
+
     async def async_get(
         self,
         request: str,
         *,
         port: Optional[int] = None,
+        read_timeout: Optional[float] = None,
         cache_id: Hashable = None,
         record_latency: bool = True,
         skip_rate_limiter: bool = False,
+        priority: RequestPriority = RequestPriority.POLL,
     ) -> httpx.Response:
         """Call GET endpoint of Denon AVR receiver asynchronously."""
         # Use default port of the receiver if no different port is specified
         port = port if port is not None else self.port
+        if read_timeout is None:
+            read_timeout = self.read_timeout
 
         endpoint = f"http://{self.host}:{port}{request}"
 
-        return await self.httpx_async_client.async_get(
-            endpoint,
-            self.host,
-            self.timeout,
-            self.read_timeout,
-            cache_id=cache_id,
-            record_latency=record_latency,
-            skip_rate_limiter=skip_rate_limiter,
-        )
+        async with self.circuit_breaker.async_guard(self._async_probe):
+            return await self.httpx_async_client.async_get(
+                endpoint,
+                self.host,
+                self.connect_timeout,
+                read_timeout,
+                cache_id=cache_id,
+                record_latency=record_latency,
+                skip_rate_limiter=skip_rate_limiter,
+                priority=priority,
+            )
 
     async def async_post(
         self,
@@ -272,17 +756,18 @@ class DenonAVRApi:
 
         endpoint = f"http://{self.host}:{port}{request}"
 
-        return await self.httpx_async_client.async_post(
-            endpoint,
-            self.host,
-            self.timeout,
-            self.read_timeout,
-            content=content,
-            data=data,
-            cache_id=cache_id,
-            record_latency=False,
-            skip_rate_limiter=True,
-        )
+        async with self.circuit_breaker.async_guard(self._async_probe):
+            return await self.httpx_async_client.async_post(
+                endpoint,
+                self.host,
+                self.connect_timeout,
+                self.read_timeout,
+                content=content,
+                data=data,
+                cache_id=cache_id,
+                record_latency=False,
+                skip_rate_limiter=True,
+            )
 
     async def async_get_command(
         self,
@@ -291,24 +776,57 @@ class DenonAVRApi:
     ) -> str:
         """Send HTTP GET command to Denon AVR receiver asynchronously."""
         # HTTP GET to endpoint
-        res = await self.async_get(
-            request,
-            skip_rate_limiter=skip_rate_limiter,
-        )
+        try:
+            res = await self.async_get(
+                request,
+                skip_rate_limiter=skip_rate_limiter,
+                priority=RequestPriority.INTERACTIVE,
+            )
+        finally:
+            self.invalidate_cache()
         # Return text
         return res.text
 
     async def async_get_xml(
-        self, request: str, *, cache_id: Hashable = None
+        self,
+        request: str,
+        *,
+        port: Optional[int] = None,
+        read_timeout: Optional[float] = None,
+        stop_tags: Optional[Tuple[Tuple[str, ...], ...]] = None,
+        cache_id: Hashable = None,
     ) -> ET.Element:
-        """Return XML data from HTTP GET endpoint asynchronously."""
-        # HTTP GET to endpoint
-        res = await self.async_get(
-            request, cache_id=cache_id, record_latency=False, skip_rate_limiter=True
-        )
-        # create ElementTree
+        """
+        Return XML data from HTTP GET endpoint asynchronously.
+
+        The response is parsed while it is received. If stop_tags are set,
+        parsing stops as soon as one of the top level tags of each group was
+        found.
+
+        Without an explicit read_timeout it is derived from the latencies of
+        the endpoint. Slow reads are hedged if hedge_reads is True.
+        """
+        # Use default port of the receiver if no different port is specified
+        port = port if port is not None else self.port
+
+        endpoint = f"http://{self.host}:{port}{request}"
+        if read_timeout is None:
+            read_timeout = self._xml_read_timeout(endpoint, self.read_timeout)
+
+        # HTTP GET to endpoint and create ElementTree
         try:
-            xml_root = fromstring(res.text)
+            async with self.circuit_breaker.async_guard(self._async_probe):
+                xml_root = await self.httpx_async_client.async_get_xml(
+                    endpoint,
+                    self.host,
+                    self.connect_timeout,
+                    read_timeout,
+                    stop_tags=stop_tags,
+                    cache_id=cache_id,
+                    record_latency=False,
+                    skip_rate_limiter=True,
+                    hedge=self.hedge_reads,
+                )
         except (
             ET.ParseError,
             DefusedXmlException,
@@ -326,13 +844,22 @@ class DenonAVRApi:
     ) -> ET.Element:
         """Return XML from Appcommand(0300) endpoint asynchronously."""
         # Prepare XML body for POST call
-        content = self.prepare_appcommand_body(cmds)
+        content = self._get_appcommand_body(cmds)
         _LOGGER.debug("Content for %s endpoint: %s", request, content)
-        # HTTP POST to endpoint
-        res = await self.async_post(request, content=content, cache_id=cache_id)
-        # create ElementTree
+        endpoint = f"http://{self.host}:{self.port}{request}"
+        # HTTP POST to endpoint and create ElementTree
         try:
-            xml_root = fromstring(res.text)
+            async with self.circuit_breaker.async_guard(self._async_probe):
+                xml_root = await self.httpx_async_client.async_post_xml(
+                    endpoint,
+                    self.host,
+                    self.connect_timeout,
+                    self._xml_read_timeout(endpoint, self.read_timeout),
+                    content=content,
+                    cache_id=cache_id,
+                    record_latency=False,
+                    skip_rate_limiter=True,
+                )
         except (
             ET.ParseError,
             DefusedXmlException,
@@ -340,6 +867,9 @@ class DenonAVRApi:
             UnicodeDecodeError,
         ) as err:
             raise AvrInvalidResponseError(f"XMLParseError: {err}", request) from err
+        finally:
+            if any(_is_set_command(cmd) for cmd in cmds):
+                self.invalidate_cache()
         # Check validity of XML
         self.check_xml_validity(request, xml_root)
         # Add query tags to result
@@ -347,6 +877,31 @@ class DenonAVRApi:
         # Return ElementTree element
         return xml_root
 
+    def invalidate_cache(self) -> None:
+        """Invalidate cached responses after the state of the receiver changed."""
+        self.httpx_async_client.response_cache.invalidate()
+        for callback in self._state_change_callbacks:
+            try:
+                callback()
+            except Exception as err:  # pylint: disable=broad-except
+                # We don't want a single bad callback to trip up the
+                # whole system and prevent further execution
+                _LOGGER.error(
+                    "%s: State change callback caused an unhandled exception: %s",
+                    self.host,
+                    err,
+                )
+
+    def register_state_change_callback(self, callback: Callable[[], None]) -> None:
+        """Register a callback which is called after commands changed the state."""
+        if callback not in self._state_change_callbacks:
+            self._state_change_callbacks.append(callback)
+
+    def unregister_state_change_callback(self, callback: Callable[[], None]) -> None:
+        """Unregister a state change callback."""
+        if callback in self._state_change_callbacks:
+            self._state_change_callbacks.remove(callback)
+
     def add_appcommand_update_tag(self, tag: AppCommandCmd) -> None:
         """Add appcommand tag for full update."""
         if tag.cmd_id != "1":
@@ -357,6 +912,7 @@ class DenonAVRApi:
 
         if tag not in self._appcommand_update_tags:
             _LOGGER.debug("Add tag %s to AppCommand update tuple", tag)
+            self._appcommand_bodies.pop(self._appcommand_update_tags, None)
             self._appcommand_update_tags = (*self._appcommand_update_tags, tag)
 
     def add_appcommand0300_update_tag(self, tag: AppCommandCmd) -> None:
@@ -369,6 +925,7 @@ class DenonAVRApi:
 
         if tag not in self._appcommand0300_update_tags:
             _LOGGER.debug("Add tag %s to AppCommand0300 update tuple", tag)
+            self._appcommand_bodies.pop(self._appcommand0300_update_tags, None)
             self._appcommand0300_update_tags = (*self._appcommand0300_update_tags, tag)
 
     async def async_get_global_appcommand(
@@ -419,14 +976,64 @@ class DenonAVRApi:
             if cmd_list[i].name is not None:
                 child.set(APPCOMMAND_NAME, cmd_list[i].name)
 
+        _APPCOMMAND_INDEXES[xml_root] = DenonAVRApi._index_appcommand_result(xml_root)
+
         return xml_root
 
+    @staticmethod
+    def find_appcommand_cmds(
+        xml_root: ET.Element, cmd: AppCommandCmd
+    ) -> List[ET.Element]:
+        """
+        Find the cmd elements of an AppCommand in its response.
+
+        Like the XPath ./cmd[@cmd_text='...'][@name='...'] this returns the
+        matching cmd elements in document order, but it uses an index of the
+        response.
+        """
+        index = _APPCOMMAND_INDEXES.get(xml_root)
+        if index is None:
+            index = DenonAVRApi._index_appcommand_result(xml_root)
+            _APPCOMMAND_INDEXES[xml_root] = index
+        return index.get((cmd.cmd_text or None, cmd.name or None), [])
+
+    @staticmethod
+    def _index_appcommand_result(xml_root: ET.Element) -> _AppCommandIndex:
+        """Index the cmd elements of a response by their query tags."""
+        index = {}
+        for child in xml_root.iterfind("cmd"):
+            cmd_text = child.get(APPCOMMAND_CMD_TEXT)
+            name = child.get(APPCOMMAND_NAME)
+            # Queries without cmd_text or name match any value of the tag
+            for key in dict.fromkeys(
+                ((cmd_text, name), (cmd_text, None), (None, name), (None, None))
+            ):
+                index.setdefault(key, []).append(child)
+        return index
+
     @staticmethod
     def check_xml_validity(request: str, xml_root: ET.Element) -> None:
         """Check if there is a valid Denon XML and not a HTML page."""
         if xml_root.tag == "html":
             raise AvrInvalidResponseError("Returned document contains HTML", request)
 
+    def _get_appcommand_body(self, cmds: Tuple[AppCommandCmd, ...]) -> bytes:
+        """
+        Return the HTTP POST body of AppCommands from the body cache.
+
+        Bodies of setters are not cached because their parameters change.
+        """
+        body = self._appcommand_bodies.get(cmds)
+        if body is not None:
+            return body
+        body = self.prepare_appcommand_body(cmds)
+        if not any(_is_set_command(cmd) for cmd in cmds):
+            if len(self._appcommand_bodies) >= _APPCOMMAND_BODY_CACHE_SIZE:
+                # Remove the oldest body
+                del self._appcommand_bodies[next(iter(self._appcommand_bodies))]
+            self._appcommand_bodies[cmds] = body
+        return body
+
     @staticmethod
     def prepare_appcommand_body(cmd_list: Tuple[AppCommandCmd]) -> bytes:
         """Prepare HTTP POST body to AppCommand(0300).xml end point."""
@@ -490,10 +1097,15 @@ class DenonAVRTelnetProtocol(asyncio.Protocol):
     """Protocol for the Denon AVR Telnet interface."""
 
     def __init__(
-        self, on_message: Callable[[str], None], on_connection_lost: Callable[[], None]
+        self,
+        on_message: Callable[[str], None],
+        on_connection_lost: Callable[[], None],
+        max_line_size: int = _MAX_TELNET_LINE_SIZE,
     ) -> None:
         """Initialize the protocol."""
-        self._buffer = b""
+        self._buffer = bytearray()
+        self._discard_line = False
+        self._max_line_size = max_line_size
         self.transport: Optional[asyncio.Transport] = None
         self._on_message = on_message
         self._on_connection_lost = on_connection_lost
@@ -520,11 +1132,31 @@ class DenonAVRTelnetProtocol(asyncio.Protocol):
 
     def data_received(self, data: bytes) -> None:
         """Handle data received."""
-        self._buffer += data
-        while b"\r" in self._buffer:
-            line, _, self._buffer = self._buffer.partition(b"\r")
-            with contextlib.suppress(UnicodeDecodeError):
-                self._on_message(line.decode("utf-8"))
+        buffer = self._buffer
+        buffer += data
+        messages = []
+        start = 0
+        # Split all complete lines in one scan and compact the buffer once
+        with memoryview(buffer) as view:
+            while (end := buffer.find(b"\r", start)) != -1:
+                if self._discard_line:
+                    self._discard_line = False
+                elif end - start > self._max_line_size:
+                    _LOGGER.debug("Dropping telnet line of %s bytes", end - start)
+                else:
+                    with contextlib.suppress(UnicodeDecodeError):
+                        messages.append(str(view[start:end], "utf-8"))
+                start = end + 1
+        del buffer[:start]
+
+        # Incomplete line exceeds the limit, drop it up to the next terminator
+        if len(buffer) > self._max_line_size:
+            _LOGGER.debug("Dropping telnet line exceeding %s bytes", len(buffer))
+            buffer.clear()
+            self._discard_line = True
+
+        for message in messages:
+            self._on_message(message)
 
     def connection_made(self, transport: asyncio.Transport) -> None:
         """Handle connection made."""
@@ -544,27 +1176,36 @@ class DenonAVRTelnetApi:
     host: str = attr.ib(converter=str, default="localhost")
     timeout: float = attr.ib(converter=float, default=2.0)
     is_denon: bool = attr.ib(converter=bool, default=True)
+    max_line_size: int = attr.ib(converter=int, default=_MAX_TELNET_LINE_SIZE)
+    sync_window: int = attr.ib(converter=int, default=_SYNC_WINDOW)
     _connection_enabled: bool = attr.ib(default=False)
     _last_message_time: float = attr.ib(default=-1.0)
     _connect_lock: asyncio.Lock = attr.ib(default=attr.Factory(asyncio.Lock))
     _reconnect_task: asyncio.Task = attr.ib(default=None)
     _monitor_handle: asyncio.TimerHandle = attr.ib(default=None)
     _protocol: DenonAVRTelnetProtocol = attr.ib(default=None)
-    _telnet_event_map: Dict[str, List] = attr.ib(
-        default=attr.Factory(telnet_event_map_factory)
+    _telnet_event_table: PrefixTable = attr.ib(
+        default=attr.Factory(telnet_event_table_factory)
     )
     _send_lock: asyncio.Lock = attr.ib(default=attr.Factory(asyncio.Lock))
     _send_confirmation_timeout: float = attr.ib(converter=float, default=2.0)
-    _send_confirmation_event: asyncio.Event = attr.ib(
-        default=attr.Factory(asyncio.Event)
+    _send_confirmations: Dict[str, Deque["_OutgoingCommand"]] = attr.ib(
+        default=attr.Factory(dict)
     )
-    _send_confirmation_command: str = attr.ib(converter=str, default="")
     _send_tasks: Set[asyncio.Task] = attr.ib(default=attr.Factory(set))
+    _queued_commands: Dict[str, "_OutgoingCommand"] = attr.ib(
+        default=attr.Factory(dict)
+    )
     _callbacks: Dict[str, List[Callable]] = attr.ib(
         validator=attr.validators.instance_of(dict),
         default=attr.Factory(dict),
         init=False,
     )
+    _prefix_callbacks: Dict[str, PrefixTable] = attr.ib(
+        validator=attr.validators.instance_of(dict),
+        default=attr.Factory(dict),
+        init=False,
+    )
     _raw_callbacks: List[Callable] = attr.ib(
         validator=attr.validators.instance_of(list),
         default=attr.Factory(list),
@@ -573,9 +1214,20 @@ class DenonAVRTelnetApi:
     _rate_limiter: AdaptiveLimiter = attr.ib(
         validator=attr.validators.instance_of(AdaptiveLimiter),
         default=attr.Factory(AdaptiveLimiter),
-        init=False,
+    )
+    _circuit_breaker: CircuitBreaker = attr.ib(
+        validator=attr.validators.instance_of(CircuitBreaker),
+        default=attr.Factory(CircuitBreaker),
+    )
+    # Telnet failures must not lock out HTTP requests, count them separately
+    _connect_breaker: CircuitBreaker = attr.ib(
+        default=attr.Factory(CircuitBreaker), init=False
     )
     _update_callback_tasks: Set[asyncio.Task] = attr.ib(default=attr.Factory(set))
+    _state_change_callbacks: List[Callable[[], None]] = attr.ib(
+        default=attr.Factory(list), init=False
+    )
+    _synced: asyncio.Event = attr.ib(default=attr.Factory(asyncio.Event), init=False)
 
     # Keep track of the following events since they are sent
     # when manually requesting updates. The receiver will send them back,
@@ -587,6 +1239,7 @@ class DenonAVRTelnetApi:
 
     def __attrs_post_init__(self) -> None:
         """Initialize special attributes."""
+        self._connect_breaker = self._circuit_breaker.spawn()
         self._register_raw_callback(self._send_confirmation_callback)
 
     async def async_connect(self) -> None:
@@ -599,14 +1252,36 @@ class DenonAVRTelnetApi:
 
     async def _async_establish_connection(self) -> None:
         """Establish a connection to the receiver."""
-        loop = asyncio.get_event_loop()
         _LOGGER.debug("%s: establishing telnet connection", self.host)
+        async with self._connect_breaker.async_guard(self._async_probe):
+            transport_protocol = await self._async_create_connection()
+        self._protocol = transport_protocol[1]
+        _LOGGER.debug("%s: telnet connection established", self.host)
+        self._connection_enabled = True
+        self._last_message_time = time.monotonic()
+        self._schedule_monitor()
+
+        # Cancel all update tasks in case they are still running and create a new one.
+        for callback_task in self._update_callback_tasks:
+            callback_task.cancel()
+
+        self._synced.clear()
+        task = asyncio.create_task(self._async_trigger_updates())
+        self._update_callback_tasks.add(task)
+        task.add_done_callback(self._handle_trigger_updates_task_done)
+
+    async def _async_create_connection(
+        self,
+    ) -> Tuple[asyncio.BaseTransport, DenonAVRTelnetProtocol]:
+        """Open the telnet connection to the receiver."""
+        loop = asyncio.get_event_loop()
         try:
             async with asyncio_timeout(self.timeout):
-                transport_protocol = await loop.create_connection(
+                return await loop.create_connection(
                     lambda: DenonAVRTelnetProtocol(
                         on_connection_lost=self._handle_disconnected,
                         on_message=self._process_event,
+                        max_line_size=self.max_line_size,
                     ),
                     self.host,
                     23,
@@ -626,19 +1301,10 @@ class DenonAVRTelnetApi:
                 "%s: Connection failed on telnet reconnect: %s", self.host, err
             )
             raise AvrNetworkError(f"OSError: {err}", "telnet connect") from err
-        self._protocol = transport_protocol[1]
-        _LOGGER.debug("%s: telnet connection established", self.host)
-        self._connection_enabled = True
-        self._last_message_time = time.monotonic()
-        self._schedule_monitor()
 
-        # Cancel all update tasks in case they are still running and create a new one.
-        for callback_task in self._update_callback_tasks:
-            callback_task.cancel()
-
-        task = asyncio.create_task(self._async_trigger_updates())
-        self._update_callback_tasks.add(task)
-        task.add_done_callback(self._handle_trigger_updates_task_done)
+    async def _async_probe(self) -> None:
+        """Probe if the receiver is reachable again."""
+        await async_probe_connection(self.host, 23, self.timeout)
 
     def _handle_trigger_updates_task_done(self, task: asyncio.Task) -> None:
         """Handle completion of the trigger updates task."""
@@ -755,14 +1421,68 @@ class DenonAVRTelnetApi:
 
             update_commands = commands
 
-        for command in update_commands:
-            await self._async_send_command(
-                command,
-                skip_confirmation=True,
-                skip_rate_limiter=True,
-                record_latency=False,
+        try:
+            await self.async_query_commands(*update_commands)
+        finally:
+            # Do not keep waiters blocked if the queries failed
+            self._synced.set()
+        _LOGGER.debug("%s: telnet state synced", self.host)
+
+    async def async_query_commands(
+        self, *commands: str, window: Optional[int] = None
+    ) -> None:
+        """
+        Send query commands to the receiver paced by its responses.
+
+        Up to window queries are pending at the same time. The next query is
+        sent as soon as a response arrives or a pending query times out.
+        Queries time out after a multiple of the measured round trip time.
+        A failed query is logged and does not stop the other queries.
+        """
+        rtt = EWMALatency()
+        if (latency := self._rate_limiter.latency(self.host)) > 0:
+            rtt.update(latency)
+        slots = asyncio.Semaphore(window or self.sync_window)
+        tasks: List[asyncio.Task] = []
+        try:
+            for command in commands:
+                await slots.acquire()
+                task = asyncio.create_task(self._async_query(command, rtt))
+                task.add_done_callback(lambda _task: slots.release())
+                tasks.append(task)
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for task in tasks:
+                task.cancel()
+        for command, result in zip(commands, results):
+            if isinstance(result, Exception):
+                _LOGGER.debug(
+                    "%s: Query command %s failed: %s", self.host, command, result
+                )
+
+    async def _async_query(self, command: str, rtt: EWMALatency) -> None:
+        """Send one query command and wait for its response."""
+        outgoing = await self._async_write_command(
+            command, None, skip_rate_limiter=True
+        )
+        timeout = _MAX_QUERY_TIMEOUT
+        if rtt.value > 0:
+            timeout = min(
+                max(rtt.value * _QUERY_TIMEOUT_RTT_FACTOR, _MIN_QUERY_TIMEOUT),
+                _MAX_QUERY_TIMEOUT,
             )
-            await asyncio.sleep(0.1)
+        try:
+            await asyncio.wait_for(outgoing.confirmation, timeout)
+        except asyncio.TimeoutError:
+            _LOGGER.debug("No response to query command: %s", command)
+        else:
+            rtt.update(time.monotonic() - outgoing.start)
+        finally:
+            self._discard_confirmation(outgoing)
+
+    async def async_wait_synced(self) -> None:
+        """Wait until the state of the receiver is synced after connecting."""
+        await self._synced.wait()
 
     def _schedule_monitor(self) -> None:
         """Start the monitor task."""
@@ -794,6 +1514,7 @@ class DenonAVRTelnetApi:
     def _handle_disconnected(self) -> None:
         """Handle disconnected."""
         _LOGGER.debug("%s: handle disconnected", self.host)
+        self._synced.clear()
         if self._protocol is not None:
             self._protocol.close()
             self._protocol = None
@@ -855,29 +1576,90 @@ class DenonAVRTelnetApi:
                     _LOGGER.info("%s: Telnet reconnected", self.host)
                     break
 
-            await asyncio.sleep(backoff)
+            # No need to try again before the circuit is probed
+            await asyncio.sleep(
+                max(
+                    backoff,
+                    self._circuit_breaker.retry_after,
+                    self._connect_breaker.retry_after,
+                )
+            )
             backoff = min(30.0, backoff * 2)
 
         self._reconnect_task = None
 
     def register_callback(
-        self, event: str, callback: Callable[[str, str, str], None]
+        self,
+        event: str,
+        callback: Callable[[str, str, str], None],
+        *,
+        prefix: Optional[str] = None,
+        zone: Optional[str] = None,
     ) -> None:
-        """Register a callback handler for an event type."""
+        """
+        Register a callback handler for an event type.
+
+        If prefix is set, the callback is only called for parameters of the event
+        whose longest registered prefix is this prefix. If zone is set too, it
+        is only called for events of that zone.
+        """
         # Validate the passed in type
         if event != ALL_TELNET_EVENTS and event not in TELNET_EVENTS:
             raise ValueError(f"{event} is not a valid callback type.")
 
+        if prefix is not None:
+            if event == ALL_TELNET_EVENTS:
+                raise ValueError(f"Prefix callbacks are not supported for {event}.")
+            table = self._prefix_callbacks.setdefault(event, PrefixTable())
+            if prefix not in table:
+                table[prefix] = []
+            entry = (zone, callback)
+            if entry not in table[prefix]:
+                table[prefix].append(entry)
+            return
+
         if event not in self._callbacks.keys():
             self._callbacks[event] = []
         elif callback in self._callbacks[event]:
             return
         self._callbacks[event].append(callback)
 
+    def register_prefix_handlers(
+        self,
+        event: str,
+        handlers: Dict[str, Callable[..., None]],
+        *,
+        with_zone: bool = False,
+    ) -> None:
+        """
+        Register sub-event handlers for the parameter prefixes of an event type.
+
+        Handlers are called with the parameter only, or with zone and parameter
+        if with_zone is True.
+        """
+        for prefix, handler in handlers.items():
+            self.register_callback(
+                event, _SubEventHandler(handler, with_zone), prefix=prefix
+            )
+
     def unregister_callback(
-        self, event: str, callback: Callable[[str, str, str], None]
+        self,
+        event: str,
+        callback: Callable[[str, str, str], None],
+        *,
+        prefix: Optional[str] = None,
+        zone: Optional[str] = None,
     ) -> None:
         """Unregister a callback handler for an event type."""
+        if prefix is not None:
+            table = self._prefix_callbacks.get(event)
+            if table is None or prefix not in table:
+                return
+            table[prefix].remove((zone, callback))
+            if not table[prefix]:
+                del table[prefix]
+            return
+
         if event not in self._callbacks.keys():
             return
         self._callbacks[event].remove(callback)
@@ -963,6 +1745,23 @@ class DenonAVRTelnetApi:
                         err,
                     )
 
+        if (table := self._prefix_callbacks.get(event)) is not None and (
+            match := table.longest_match(parameter)
+        ) is not None:
+            for callback_zone, callback in match[1]:
+                if callback_zone is not None and callback_zone != zone:
+                    continue
+                try:
+                    callback(zone, event, parameter)
+                except Exception as err:  # pylint: disable=broad-except
+                    # We don't want a single bad callback to trip up the
+                    # whole system and prevent further execution
+                    _LOGGER.error(
+                        "%s: Event callback caused an unhandled exception: %s",
+                        self.host,
+                        err,
+                    )
+
         if ALL_TELNET_EVENTS in self._callbacks.keys():
             for callback in self._callbacks[ALL_TELNET_EVENTS]:
                 try:
@@ -978,21 +1777,128 @@ class DenonAVRTelnetApi:
 
     def _get_event(self, message: str) -> str:
         """Get event of a telnet message."""
-        events = self._telnet_event_map.get(message[0:2], [""])
-        for event in events:
-            if message.startswith(event):
-                return event
-        return ""
+        match = self._telnet_event_table.longest_match(message)
+        if match is None:
+            return ""
+        return match[1]
 
     def _send_confirmation_callback(self, message: str) -> None:
-        """Confirm that the telnet command has been executed."""
-        if len(message) < 3:
+        """
+        Confirm the pending telnet command which a message responds to.
+
+        Responses are matched to the pending commands of their event in the
+        order the commands were written. While a query is pending, a setter is
+        only confirmed by its echo, other responses answer the query.
+        """
+        event = self._get_event(message)
+        pending = self._send_confirmations.get(event)
+        if not pending:
             return
-        command = self._send_confirmation_command
-        if self._get_event(message) == self._get_event(self._send_confirmation_command):
-            self._send_confirmation_command = ""
-            self._send_confirmation_event.set()
-            _LOGGER.debug("Command %s confirmed", command)
+        confirmed = next(
+            (outgoing for outgoing in pending if outgoing.command == message),
+            None,
+        )
+        if confirmed is None:
+            confirmed = next(
+                (outgoing for outgoing in pending if _is_query(outgoing.command)),
+                pending[0],
+            )
+        pending.remove(confirmed)
+        confirmed.confirmation.set_result(None)
+        _LOGGER.debug("Command %s confirmed by %s", confirmed.command, message)
+
+    def _discard_confirmation(self, outgoing: "_OutgoingCommand") -> None:
+        """Remove the confirmation of a command which is not awaited anymore."""
+        outgoing.confirmation.cancel()
+        pending = self._send_confirmations.get(self._get_event(outgoing.command))
+        if pending is not None and outgoing in pending:
+            pending.remove(outgoing)
+
+    def _dequeue_command(self, outgoing: "_OutgoingCommand") -> None:
+        """Remove a command from the queue, it cannot be superseded anymore."""
+        if (
+            outgoing.family is not None
+            and self._queued_commands.get(outgoing.family) is outgoing
+        ):
+            del self._queued_commands[outgoing.family]
+
+    def _close_queued_families(self, command: str) -> None:
+        """
+        Close the queued families which a command belongs to.
+
+        Like "MVUP" for the "MV" family, newer commands of these families must
+        be written after the command to keep the order of the commands.
+        Families of other commands stay open.
+        """
+        for family in list(self._queued_commands):
+            if command.startswith(family):
+                del self._queued_commands[family]
+
+    async def _async_write_command(
+        self,
+        command: str,
+        family: Optional[str],
+        *,
+        skip_confirmation: bool = False,
+        skip_rate_limiter: bool = False,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
+    ) -> "_OutgoingCommand":
+        """
+        Write one telnet command to the receiver.
+
+        While the command waits for its turn, it is queued by its family and
+        might be replaced by a newer command of the same family.
+        """
+        outgoing = _OutgoingCommand(
+            command, family, asyncio.get_running_loop().create_future()
+        )
+        if family is not None:
+            self._queued_commands[family] = outgoing
+        else:
+            self._close_queued_families(command)
+        try:
+            # Wait for a token before the lock, so it is admitted by priority
+            if not skip_rate_limiter:
+                await self._rate_limiter.acquire(self.host, priority)
+            async with self._send_lock:
+                if not self.connected or not self.healthy:
+                    raise AvrProcessingError(
+                        f"Error sending command {outgoing.command}. Telnet connected: "
+                        f"{self.connected}, Connection healthy: {self.healthy}"
+                    )
+                self._dequeue_command(outgoing)
+                if not skip_confirmation:
+                    outgoing.confirmation = asyncio.get_running_loop().create_future()
+                    event = self._get_event(outgoing.command)
+                    self._send_confirmations.setdefault(event, deque()).append(outgoing)
+                self._protocol.write(f"{outgoing.command}\r")
+                outgoing.start = time.monotonic()
+        except BaseException as err:
+            self._dequeue_command(outgoing)
+            outgoing.settle(err)
+            raise
+        if outgoing.confirmation is None:
+            outgoing.settle()
+        return outgoing
+
+    async def _async_wait_for_confirmation(
+        self,
+        outgoing: "_OutgoingCommand",
+        confirmation_timeout: float,
+        record_latency: bool,
+    ) -> None:
+        """Wait for the confirmation of a written telnet command."""
+        try:
+            await asyncio.wait_for(outgoing.confirmation, confirmation_timeout)
+        except asyncio.TimeoutError:
+            _LOGGER.debug(
+                "Timeout waiting for confirmation of command: %s", outgoing.command
+            )
+        finally:
+            if record_latency:
+                self._rate_limiter.record_latency(self.host, outgoing.start)
+            self._discard_confirmation(outgoing)
+            outgoing.settle()
 
     async def _async_send_command(
         self,
@@ -1002,58 +1908,145 @@ class DenonAVRTelnetApi:
         confirmation_timeout: Optional[float] = None,
         record_latency: bool = True,
         skip_rate_limiter: bool = False,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
     ) -> None:
         """Send one telnet command to the receiver."""
+        await self._async_send_pipelined(
+            (command,),
+            skip_confirmation=skip_confirmation,
+            confirmation_timeout=confirmation_timeout,
+            record_latency=record_latency,
+            skip_rate_limiter=skip_rate_limiter,
+            priority=priority,
+        )
+
+    async def _async_send_pipelined(
+        self,
+        commands: Tuple[str, ...],
+        *,
+        skip_confirmation: bool = False,
+        confirmation_timeout: Optional[float] = None,
+        record_latency: bool = True,
+        skip_rate_limiter: bool = False,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
+    ) -> None:
+        """
+        Send telnet commands to the receiver without waiting in between.
+
+        Commands are written back-to-back and their confirmations are awaited
+        concurrently afterwards. Responses are matched to the commands by their
+        telnet event in the order the commands were written.
+
+        Commands setting an absolute value replace a queued and not yet written
+        command of the same family. They complete together with the command
+        which replaced them.
+        """
         if confirmation_timeout is None:
-            confirmation_timeout = self._send_confirmation_timeout
-
-        async with self._send_lock:
-            if not skip_confirmation:
-                self._send_confirmation_command = command
-                self._send_confirmation_event.clear()
-            if not self.connected or not self.healthy:
-                raise AvrProcessingError(
-                    f"Error sending command {command}. Telnet connected: "
-                    f"{self.connected}, Connection healthy: {self.healthy}"
+            confirmation_timeout = self._rate_limiter.timeout(
+                self.host, self._send_confirmation_timeout
+            )
+
+        written: List[_OutgoingCommand] = []
+        superseded: List[asyncio.Future] = []
+        try:
+            for command in commands:
+                family = _coalescing_family(command)
+                queued = (
+                    self._queued_commands.get(family) if family is not None else None
                 )
-            start = time.monotonic()
-            if not skip_rate_limiter:
-                await self._rate_limiter.acquire(self.host)
-            self._protocol.write(f"{command}\r")
-            if not skip_confirmation:
-                try:
-                    await asyncio.wait_for(
-                        self._send_confirmation_event.wait(),
-                        confirmation_timeout,
-                    )
-                except asyncio.TimeoutError:
+                if queued is not None:
                     _LOGGER.debug(
-                        "Timeout waiting for confirmation of command: %s", command
+                        "Command %s supersedes queued command %s",
+                        command,
+                        queued.command,
+                    )
+                    queued.command = command
+                    queued.superseded += 1
+                    superseded.append(queued.settled)
+                    continue
+                written.append(
+                    await self._async_write_command(
+                        command,
+                        family,
+                        skip_confirmation=skip_confirmation,
+                        skip_rate_limiter=skip_rate_limiter,
+                        priority=priority,
                     )
-                finally:
-                    if record_latency:
-                        self._rate_limiter.record_latency(self.host, start)
-                    self._send_confirmation_command = ""
+                )
+        except BaseException as err:
+            for outgoing in written:
+                if outgoing.confirmation is not None:
+                    self._discard_confirmation(outgoing)
+                outgoing.settle(err)
+            raise
+
+        awaitables = [
+            self._async_wait_for_confirmation(
+                outgoing, confirmation_timeout, record_latency
+            )
+            for outgoing in written
+            if outgoing.confirmation is not None
+        ]
+        # Shield the futures shared with other senders from cancellation
+        awaitables.extend(asyncio.shield(settled) for settled in superseded)
+        if awaitables:
+            await asyncio.gather(*awaitables)
 
     async def async_send_commands(
         self,
         *commands: str,
         skip_confirmation: bool = False,
         confirmation_timeout: Optional[float] = None,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
     ) -> None:
         """Send telnet commands to the receiver."""
-        for command in commands:
-            await self._async_send_command(
-                command,
+        # Queries and media refreshes do not change the state of the receiver
+        changes_state = (
+            not skip_confirmation
+            and priority is not RequestPriority.MEDIA
+            and any(not _is_query(command) for command in commands)
+        )
+        try:
+            await self._async_send_pipelined(
+                commands,
                 skip_confirmation=skip_confirmation,
                 confirmation_timeout=confirmation_timeout,
+                priority=priority,
             )
+        finally:
+            if changes_state:
+                self._notify_state_change()
+
+    def _notify_state_change(self) -> None:
+        """Call the state change callbacks after commands were sent."""
+        for callback in self._state_change_callbacks:
+            try:
+                callback()
+            except Exception as err:  # pylint: disable=broad-except
+                # We don't want a single bad callback to trip up the
+                # whole system and prevent further execution
+                _LOGGER.error(
+                    "%s: State change callback caused an unhandled exception: %s",
+                    self.host,
+                    err,
+                )
+
+    def register_state_change_callback(self, callback: Callable[[], None]) -> None:
+        """Register a callback which is called after state changing commands."""
+        if callback not in self._state_change_callbacks:
+            self._state_change_callbacks.append(callback)
+
+    def unregister_state_change_callback(self, callback: Callable[[], None]) -> None:
+        """Unregister a state change callback."""
+        if callback in self._state_change_callbacks:
+            self._state_change_callbacks.remove(callback)
 
     def send_commands(
         self,
         *commands: str,
         skip_confirmation: bool = False,
         confirmation_timeout: Optional[float] = None,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
     ) -> None:
         """Send telnet commands to the receiver."""
         task = asyncio.create_task(
@@ -1061,6 +2054,7 @@ class DenonAVRTelnetApi:
                 *commands,
                 skip_confirmation=skip_confirmation,
                 confirmation_timeout=confirmation_timeout,
+                priority=priority,
             )
         )
         self._send_tasks.add(task)
@@ -1084,6 +2078,11 @@ class DenonAVRTelnetApi:
         """Return True if telnet connection is healthy."""
         return self._protocol is not None and self._protocol.connected
 
+    @property
+    def synced(self) -> bool:
+        """Return True if the state of the receiver is synced via telnet."""
+        return self._synced.is_set()
+
 
 def _should_propagate_event(
     event: str, parameter: str, duplicate_tracker_map: Dict[str, str]
@@ -12,7 +12,7 @@ from typing import Optional, Tuple
 import attr
 
 
-@attr.s(auto_attribs=True, frozen=True)
+@attr.s(auto_attribs=True, frozen=True, cache_hash=True)
 class AppCommandCmdParam:
     """AppCommand param data type."""
 
@@ -20,7 +20,7 @@ class AppCommandCmdParam:
     text: str = attr.ib(converter=str, default="")
 
 
-@attr.s(auto_attribs=True, frozen=True)
+@attr.s(auto_attribs=True, frozen=True, cache_hash=True)
 class AppCommandResponsePattern:
     """
     AppCommand response pattern data type.
@@ -38,7 +38,7 @@ class AppCommandResponsePattern:
     )
 
 
-@attr.s(auto_attribs=True, frozen=True)
+@attr.s(auto_attribs=True, frozen=True, cache_hash=True)
 class AppCommandCmd:
     """AppCommand data type."""
 
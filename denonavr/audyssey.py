@@ -30,7 +30,11 @@ from .const import (
     ReferenceLevelOffsets,
 )
 from .exceptions import AvrCommandError, AvrProcessingError
-from .foundation import DenonAVRFoundation, convert_string_int_bool
+from .foundation import (
+    DenonAVRFoundation,
+    compile_appcommand_update_plan,
+    convert_string_int_bool,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -73,6 +77,9 @@ class DenonAVRAudyssey(DenonAVRFoundation):
     # Update tags for attributes
     # AppCommand0300.xml interface
     appcommand0300_attrs = {AppCommands.GetAudyssey: None}
+    appcommand0300_update_plan = compile_appcommand_update_plan(appcommand0300_attrs)
+    # Prefixes of PS telnet events handled by this module
+    _ps_prefixes = ("MULTEQ:", "REFLEV", "DYNVOL", "DYNEQ", "LFC", "CNTAMT")
 
     def setup(self) -> None:
         """Ensure that the instance is initialized."""
@@ -80,7 +87,10 @@ class DenonAVRAudyssey(DenonAVRFoundation):
         for tag in self.appcommand0300_attrs:
             self._device.api.add_appcommand0300_update_tag(tag)
 
-        self._device.telnet_api.register_callback("PS", self._ps_callback)
+        for prefix in self._ps_prefixes:
+            self._device.telnet_api.register_callback(
+                "PS", self._ps_callback, prefix=prefix, zone=self._device.zone
+            )
 
         self._is_setup = True
 
@@ -136,7 +146,7 @@ class DenonAVRAudyssey(DenonAVRFoundation):
         if self._device.use_avr_2016_update:
             try:
                 await self.async_update_attrs_appcommand(
-                    self.appcommand0300_attrs,
+                    self.appcommand0300_update_plan,
                     appcommand0300=True,
                     global_update=global_update,
                     cache_id=cache_id,
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TTL- and byte-bounded LRU cache for responses of the receiver.
+
+:copyright: (c) 2025 by Henrik Widlund.
+:license: MIT, see LICENSE for more details.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .const import DESCRIPTION_TYPES, DEVICEINFO_URL
+
+# Responses which do not change while the receiver is running
+STATIC_ENDPOINTS = (
+    DEVICEINFO_URL,
+    *sorted({desc.url for desc in DESCRIPTION_TYPES.values()}),
+)
+# Responses requested with the same cache_id during one update cycle
+CYCLE_TTL = 10.0
+DEFAULT_MAX_BYTES = 1024 * 1024
+
+
+class _CacheEntry(NamedTuple):
+    """Entry of the response cache."""
+
+    value: Any
+    size: int
+    expires: Optional[float]
+
+
+class ResponseCache:
+    """
+    LRU cache of responses with a time to live per endpoint and a byte budget.
+
+    Parameters:
+    - max_bytes: maximum size of all cached responses in bytes (> 0)
+    - ttl_policies: time to live in seconds per endpoint path, None never expires
+    - default_ttl: time to live in seconds of endpoints without policy (> 0)
+    - stats: counter for cache hits, misses and evictions
+
+    Behavior:
+    - The least recently used entries are evicted when the byte budget is
+      exceeded, entries larger than the budget are not cached.
+    - Expired entries are removed when they are looked up or a new entry is
+      added.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_policies: Optional[Dict[str, Optional[float]]] = None,
+        default_ttl: float = CYCLE_TTL,
+        stats: Optional[Counter] = None,
+    ) -> None:
+        """Initialize ResponseCache with given parameters."""
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be > 0")
+        if default_ttl <= 0:
+            raise ValueError("default_ttl must be > 0")
+
+        self._max_bytes = int(max_bytes)
+        self._default_ttl = float(default_ttl)
+        if ttl_policies is None:
+            ttl_policies = dict.fromkeys(STATIC_ENDPOINTS)
+        self._ttl_policies = dict(ttl_policies)
+        self.stats = stats if stats is not None else Counter()
+        self._entries: OrderedDict[Hashable, _CacheEntry] = OrderedDict()
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        """Return the size of all cached responses in bytes."""
+        return self._size
+
+    def __len__(self) -> int:
+        """Return the number of cached responses."""
+        return len(self._entries)
+
+    def ttl(self, url: str) -> Optional[float]:
+        """Return the time to live of responses of an URL."""
+        return self._ttl_policies.get(urlsplit(url).path, self._default_ttl)
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return if the key was found and its value."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["cache_misses"] += 1
+            return False, None
+        if entry.expires is not None and entry.expires <= time.monotonic():
+            self._remove(key)
+            self.stats["cache_misses"] += 1
+            self.stats["cache_expirations"] += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.stats["cache_hits"] += 1
+        return True, entry.value
+
+    def put(
+        self, key: Hashable, value: Any, *, size: int, ttl: Optional[float]
+    ) -> None:
+        """Cache a value of a given size in bytes for ttl seconds."""
+        if key in self._entries:
+            self._remove(key)
+        if size > self._max_bytes:
+            return
+        now = time.monotonic()
+        self._remove_expired(now)
+        expires = now + ttl if ttl is not None else None
+        self._entries[key] = _CacheEntry(value, size, expires)
+        self._size += size
+        while self._size > self._max_bytes:
+            evicted_key = next(iter(self._entries))
+            self._remove(evicted_key)
+            self.stats["cache_evictions"] += 1
+
+    def invalidate(self, *, include_static: bool = False) -> None:
+        """Remove cached responses which might change when the state changes."""
+        for key in [
+            key
+            for key, entry in self._entries.items()
+            if include_static or entry.expires is not None
+        ]:
+            self._remove(key)
+        self.stats["cache_invalidations"] += 1
+
+    def _remove_expired(self, now: float) -> None:
+        """Remove expired entries from the cache."""
+        for key in [
+            key
+            for key, entry in self._entries.items()
+            if entry.expires is not None and entry.expires <= now
+        ]:
+            self._remove(key)
+            self.stats["cache_expirations"] += 1
+
+    def _remove(self, key: Hashable) -> None:
+        """Remove an entry from the cache."""
+        entry = self._entries.pop(key)
+        self._size -= entry.size
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Circuit breaker which fails fast while a receiver is unreachable.
+
+Single-process only. One breaker is shared by the HTTP API of a receiver, the
+telnet connection counts its failures with a breaker of its own.
+
+:copyright: (c) 2025 by Henrik Widlund.
+:license: MIT, see LICENSE for more details.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from asyncio import timeout as asyncio_timeout
+from enum import Enum
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from .exceptions import (
+    AvrCircuitOpenError,
+    AvrNetworkError,
+    AvrRequestError,
+    AvrTimoutError,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_RESET_TIMEOUT = 5.0
+DEFAULT_MAX_RESET_TIMEOUT = 60.0
+
+
+class CircuitState(str, Enum):
+    """State of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of the connections to one receiver.
+
+    Parameters:
+    - failure_threshold: consecutive connection failures which open the
+      circuit (> 0)
+    - reset_timeout: seconds the circuit stays open before it is probed (> 0)
+    - max_reset_timeout: maximum seconds the circuit stays open
+      (>= reset_timeout)
+
+    Behavior:
+    - While closed, requests pass and connection failures are counted.
+      Any response of the receiver resets the count.
+    - While open, requests fail fast with AvrCircuitOpenError.
+    - Once reset_timeout elapsed the circuit is half open. The next request
+      runs one cheap probe, requests arriving meanwhile wait for it. A
+      successful probe closes the circuit, a failed one opens it again and
+      doubles reset_timeout up to max_reset_timeout.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        max_reset_timeout: float = DEFAULT_MAX_RESET_TIMEOUT,
+    ) -> None:
+        """Initialize CircuitBreaker with given parameters."""
+        if failure_threshold <= 0:
+            raise ValueError("failure_threshold must be > 0")
+        if reset_timeout <= 0:
+            raise ValueError("reset_timeout must be > 0")
+        if reset_timeout > max_reset_timeout:
+            raise ValueError("reset_timeout must be <= max_reset_timeout")
+
+        self.failure_threshold = int(failure_threshold)
+        self.reset_timeout = float(reset_timeout)
+        self.max_reset_timeout = float(max_reset_timeout)
+        self.failures = 0
+        self.rejected = 0
+        self._open = False
+        self._open_for = self.reset_timeout
+        self._opened_at = 0.0
+        self._probe: Optional[asyncio.Future] = None
+
+    def spawn(self) -> CircuitBreaker:
+        """Return a new closed circuit breaker with the same parameters."""
+        return CircuitBreaker(
+            failure_threshold=self.failure_threshold,
+            reset_timeout=self.reset_timeout,
+            max_reset_timeout=self.max_reset_timeout,
+        )
+
+    @property
+    def state(self) -> CircuitState:
+        """Return the state of the circuit."""
+        if not self._open:
+            return CircuitState.CLOSED
+        if time.monotonic() - self._opened_at < self._open_for:
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+    @property
+    def retry_after(self) -> float:
+        """Return the seconds until the open circuit is probed."""
+        if not self._open:
+            return 0.0
+        return max(0.0, self._opened_at + self._open_for - time.monotonic())
+
+    def record_success(self) -> None:
+        """Record a response of the receiver."""
+        self.failures = 0
+        if self._open:
+            _LOGGER.info("Receiver reachable again, closing circuit")
+            self._open = False
+            self._open_for = self.reset_timeout
+
+    def record_failure(self) -> None:
+        """Record a connection failure."""
+        self.failures += 1
+        # Requests sent before the circuit opened might still fail afterwards
+        if self._open or self.failures < self.failure_threshold:
+            return
+        _LOGGER.info(
+            "Receiver unreachable after %s failures, opening circuit", self.failures
+        )
+        self._open = True
+        self._opened_at = time.monotonic()
+
+    async def async_check(self, probe: Callable[[], Awaitable[None]]) -> None:
+        """
+        Check if a request may be sent to the receiver.
+
+        Raises AvrCircuitOpenError while the circuit is open or when the probe
+        of the half open circuit failed.
+        """
+        state = self.state
+        if state is CircuitState.CLOSED:
+            return
+        if state is CircuitState.OPEN:
+            self.rejected += 1
+            raise AvrCircuitOpenError(
+                f"Receiver unreachable, retry in {self.retry_after:.1f} seconds",
+                "circuit breaker",
+            )
+        if self._probe is None:
+            self._probe = asyncio.ensure_future(self._async_probe(probe))
+        # Concurrent requests share the probe, cancelling one must not stop it
+        await asyncio.shield(self._probe)
+
+    async def _async_probe(self, probe: Callable[[], Awaitable[None]]) -> None:
+        """Probe the half open circuit."""
+        _LOGGER.debug("Probing half open circuit")
+        try:
+            await probe()
+        except (AvrNetworkError, AvrTimoutError) as err:
+            self.failures += 1
+            self._open_for = min(self._open_for * 2, self.max_reset_timeout)
+            self._opened_at = time.monotonic()
+            _LOGGER.debug("Probe failed, retry in %.1f seconds", self._open_for)
+            raise AvrCircuitOpenError(
+                f"Receiver still unreachable: {err}", "circuit breaker"
+            ) from err
+        else:
+            self.record_success()
+        finally:
+            self._probe = None
+
+    @contextlib.asynccontextmanager
+    async def async_guard(
+        self, probe: Callable[[], Awaitable[None]]
+    ) -> AsyncIterator[None]:
+        """Check the circuit and record the outcome of the guarded request."""
+        await self.async_check(probe)
+        try:
+            yield
+        except (AvrNetworkError, AvrTimoutError):
+            self.record_failure()
+            raise
+        except AvrRequestError:
+            # The receiver responded
+            self.record_success()
+            raise
+        self.record_success()
+
+
+async def async_probe_connection(host: str, port: int, timeout: float) -> None:
+    """Probe a receiver by opening and closing a TCP connection."""
+    try:
+        async with asyncio_timeout(timeout):
+            _reader, writer = await asyncio.open_connection(host, port)
+    except asyncio.TimeoutError as err:
+        raise AvrTimoutError(f"TimeoutException: {err}", "probe") from err
+    except OSError as err:
+        raise AvrNetworkError(f"OSError: {err}", "probe") from err
+    writer.close()
+    with contextlib.suppress(OSError):
+        await writer.wait_closed()
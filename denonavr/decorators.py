@@ -7,13 +7,15 @@ This module implements the REST API to Denon AVR receivers.
 :license: MIT, see LICENSE for more details.
 """
 
+import asyncio
 import inspect
 import logging
+import sys
+import xml.etree.ElementTree as ET
 from functools import wraps
-from typing import Callable, TypeVar
+from typing import Any, Callable, Dict, Hashable, TypeVar
 
 import httpx
-from asyncstdlib import lru_cache
 
 from .exceptions import (
     AvrForbiddenError,
@@ -61,23 +63,133 @@ def async_handle_receiver_exceptions(func: Callable[..., AnyT]) -> Callable[...,
 
 def cache_result(func: Callable[..., AnyT]) -> Callable[..., AnyT]:
     """
-    Decorate a function to cache its results with an lru_cache of maxsize 32.
+    Decorate a method to cache its results in the response cache of the instance.
 
-    The cache is only used if the "cache_id" keyword argument is set.
+    The cache is only used if the "cache_id" keyword argument is set. The first
+    argument of the method is the URL which determines the time to live of the
+    response. Results are keyed by the request, not by arguments like timeouts.
+    The instance needs a "response_cache" attribute.
     """
     if inspect.signature(func).parameters.get("cache_id") is None:
         raise AttributeError(
             f"Function {func} does not have a 'cache_id' keyword parameter"
         )
 
-    lru_decorator = lru_cache(maxsize=32)
-    cached_func = lru_decorator(func)
-
     @wraps(func)
-    async def wrapper(*args, **kwargs):
+    async def wrapper(self, url: str, *args, **kwargs):
         if kwargs.get("cache_id") is None:
-            return await func(*args, **kwargs)
+            return await func(self, url, *args, **kwargs)
+
+        try:
+            key = _request_key(func, url, kwargs)
+        except TypeError:
+            return await func(self, url, *args, **kwargs)
+
+        cache = self.response_cache
+        found, result = cache.get(key)
+        if found:
+            return result
+        result = await func(self, url, *args, **kwargs)
+        cache.put(key, result, size=_sizeof(result), ttl=cache.ttl(url))
+        return result
+
+    return wrapper
+
+
+def _sizeof(value: Any) -> int:
+    """Return the size of a cached value in bytes."""
+    if isinstance(value, httpx.Response):
+        return len(value.content)
+    if isinstance(value, ET.Element):
+        return sum(
+            sys.getsizeof(element) + len(element.text or "") + len(element.tail or "")
+            for element in value.iter()
+        )
+    return sys.getsizeof(value)
+
 
-        return await cached_func(*args, **kwargs)
+def _request_key(
+    func: Callable[..., AnyT], url: str, kwargs: Dict[str, Any]
+) -> Hashable:
+    """
+    Return the key of a request made by a decorated method.
+
+    Only the method, the URL, the body, the stop tags of a partly parsed
+    response and the cache_id identify the response. Other arguments like the
+    timeouts change between identical requests.
+    """
+    key = (
+        func.__name__,
+        url,
+        _freeze(kwargs.get("content")),
+        _freeze(kwargs.get("data")),
+        _freeze(kwargs.get("stop_tags")),
+        kwargs.get("cache_id"),
+    )
+    hash(key)
+    return key
+
+
+def _freeze(value: Any) -> Hashable:
+    """Convert dictionaries and lists in call arguments to hashable types."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(val)) for key, val in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(val) for val in value)
+    return value
+
+
+def single_flight(func: Callable[..., AnyT]) -> Callable[..., AnyT]:
+    """
+    Decorate a method to share one call between concurrent identical calls.
+
+    Concurrent calls of the same request await the result of the call which
+    is already in flight instead of running the method again. Only calls with a
+    "cache_id" keyword argument are shared, other calls like commands are not
+    idempotent. The instance needs an "_in_flight" dictionary and a "stats"
+    counter.
+    """
+
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        # pylint: disable=protected-access
+        if kwargs.get("cache_id") is None:
+            self.stats["requests"] += 1
+            return await func(self, *args, **kwargs)
+        try:
+            key = _request_key(func, args[0], kwargs)
+        except TypeError:
+            return await func(self, *args, **kwargs)
+
+        while (in_flight := self._in_flight.get(key)) is not None:
+            _LOGGER.debug("Coalescing call of %s with call in flight", func.__name__)
+            self.stats["coalesced"] += 1
+            try:
+                # Cancelling this caller must not cancel the shared call
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                # Run the call again if only the caller in flight was cancelled
+                if not in_flight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        self.stats["requests"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await func(self, *args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            # Mark the exception as retrieved, it is raised to this caller
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        return result
 
     return wrapper
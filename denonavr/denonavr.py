@@ -8,17 +8,32 @@ This module implements the interface to Denon AVR receivers.
 """
 
 import asyncio
+import contextlib
 import logging
 import time
-from typing import Callable, Dict, List, Literal, Optional, Union
+from collections.abc import Hashable
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import attr
 
 from .audyssey import DenonAVRAudyssey, audyssey_factory
+from .circuit_breaker import CircuitBreaker, CircuitState
 from .const import (
     AVR_X,
     DENON_ATTR_SETATTR,
     MAIN_ZONE,
+    POWER_ON,
     VALID_ZONES,
     AudioRestorers,
     AutoStandbys,
@@ -40,15 +55,73 @@ from .const import (
     VideoProcessingModes,
 )
 from .dirac import DenonAVRDirac, dirac_factory
-from .exceptions import AvrForbiddenError, AvrIncompleteResponseError
-from .foundation import DenonAVRFoundation, set_api_host, set_api_timeout
+from .exceptions import (
+    AvrForbiddenError,
+    AvrIncompleteResponseError,
+    AvrProcessingError,
+)
+from .foundation import (
+    DenonAVRFoundation,
+    SetupSnapshot,
+    ZoneSetupSnapshot,
+    set_api_circuit_breaker,
+    set_api_hedge_reads,
+    set_api_host,
+    set_api_rate_limiter,
+    set_api_timeout,
+    set_telnet_first,
+    setup_snapshot_converter,
+)
 from .input import DenonAVRInput, input_factory
+from .rate_limiter import AdaptiveLimiter
+from .scheduler import AdaptiveInterval, PollScheduler
 from .soundmode import DenonAVRSoundMode, sound_mode_factory
 from .tonecontrol import DenonAVRToneControl, tone_control_factory
 from .volume import DenonAVRVolume, volume_factory
 
 _LOGGER = logging.getLogger(__name__)
 
+_UPDATE_CYCLE_WINDOW = 2.0
+
+
+@attr.s(auto_attribs=True)
+class UpdateCoordinator:
+    """
+    Coordinate the update cycles of all zones of a receiver.
+
+    Zones which update within the same window share the cache id of one update
+    cycle. This way the global AppCommand.xml response, which contains the
+    status of all zones, is fetched and parsed only once per cycle.
+    A new cycle starts when the window passed or a zone updates again.
+    """
+
+    window: float = attr.ib(converter=float, default=_UPDATE_CYCLE_WINDOW)
+    _cache_id: Optional[float] = attr.ib(default=None, init=False)
+    _started: float = attr.ib(default=0.0, init=False)
+    _zones: Set[str] = attr.ib(default=attr.Factory(set), init=False)
+
+    def cache_id(self, zone: str) -> float:
+        """Return the cache id of the update cycle of a zone."""
+        now = time.monotonic()
+        if (
+            self._cache_id is None
+            or zone in self._zones
+            or now - self._started >= self.window
+        ):
+            self._cache_id = time.time()
+            self._started = now
+            self._zones.clear()
+        self._zones.add(zone)
+        return self._cache_id
+
+
+def poll_scheduler_factory(instance: "DenonAVR") -> PollScheduler:
+    """Create PollScheduler at receiver instances."""
+    # pylint: disable=protected-access
+    return PollScheduler(
+        instance.async_update, instance._poll_state, instance._poll_standby
+    )
+
 
 @attr.s(auto_attribs=True, on_setattr=DENON_ATTR_SETATTR)
 class DenonAVR(DenonAVRFoundation):
@@ -71,6 +144,28 @@ class DenonAVR(DenonAVRFoundation):
 
     :param add_zones: Additional Zones for which an instance are created
     :type add_zones: dict [str, str] or None
+
+    :param setup_snapshot: Snapshot of a previous setup which skips probing
+    :type setup_snapshot: dict or None
+
+    :param update_coordinator: Coordinator of the update cycles of all zones
+    :type update_coordinator: UpdateCoordinator
+
+    :param telnet_first: If True attributes pushed by telnet are not polled
+        while telnet is healthy
+    :type telnet_first: bool
+
+    :param rate_limiter: Request budget shared by HTTP and telnet, might be
+        shared with other instances too
+    :type rate_limiter: AdaptiveLimiter
+
+    :param hedge_reads: If True slow status reads are sent a second time and
+        the first response is used
+    :type hedge_reads: bool
+
+    :param circuit_breaker: Circuit breaker failing fast while the receiver
+        is unreachable by HTTP, telnet reconnects wait for it too
+    :type circuit_breaker: CircuitBreaker
     """
 
     _host: str = attr.ib(converter=str, on_setattr=[*DENON_ATTR_SETATTR, set_api_host])
@@ -102,6 +197,38 @@ class DenonAVR(DenonAVRFoundation):
     )
     _setup_lock: asyncio.Lock = attr.ib(default=attr.Factory(asyncio.Lock))
     _allow_recovery: bool = attr.ib(converter=bool, default=True, init=True)
+    _setup_snapshot: Optional[SetupSnapshot] = attr.ib(
+        converter=setup_snapshot_converter, default=None
+    )
+    _revalidation_task: Optional[asyncio.Task] = attr.ib(default=None, init=False)
+    _update_coordinator: UpdateCoordinator = attr.ib(
+        validator=attr.validators.instance_of(UpdateCoordinator),
+        default=attr.Factory(UpdateCoordinator),
+    )
+    _telnet_first: bool = attr.ib(
+        converter=bool,
+        on_setattr=[*DENON_ATTR_SETATTR, set_telnet_first],
+        default=False,
+    )
+    _rate_limiter: AdaptiveLimiter = attr.ib(
+        validator=attr.validators.instance_of(AdaptiveLimiter),
+        on_setattr=[*DENON_ATTR_SETATTR, set_api_rate_limiter],
+        default=attr.Factory(AdaptiveLimiter),
+    )
+    _hedge_reads: bool = attr.ib(
+        converter=bool,
+        on_setattr=[*DENON_ATTR_SETATTR, set_api_hedge_reads],
+        default=False,
+    )
+    _circuit_breaker: CircuitBreaker = attr.ib(
+        validator=attr.validators.instance_of(CircuitBreaker),
+        on_setattr=[*DENON_ATTR_SETATTR, set_api_circuit_breaker],
+        default=attr.Factory(CircuitBreaker),
+    )
+    _poll_scheduler: PollScheduler = attr.ib(
+        default=attr.Factory(poll_scheduler_factory, takes_self=True),
+        init=False,
+    )
     audyssey: DenonAVRAudyssey = attr.ib(
         validator=attr.validators.instance_of(DenonAVRAudyssey),
         default=attr.Factory(audyssey_factory, takes_self=True),
@@ -138,6 +265,10 @@ class DenonAVR(DenonAVRFoundation):
         # Set host and timeout again to start its custom setattr function
         self._host = self._host
         self._timeout = self._timeout
+        self._telnet_first = self._telnet_first
+        self._rate_limiter = self._rate_limiter
+        self._hedge_reads = self._hedge_reads
+        self._circuit_breaker = self._circuit_breaker
 
         # Add own instance to zone dictionary
         self._zones[self._device.zone] = self
@@ -160,6 +291,12 @@ class DenonAVR(DenonAVRFoundation):
                 name=zonename,
                 timeout=self._timeout,
                 show_all_inputs=self._show_all_inputs,
+                setup_snapshot=self._setup_snapshot,
+                update_coordinator=self._update_coordinator,
+                telnet_first=self._telnet_first,
+                rate_limiter=self._rate_limiter,
+                hedge_reads=self._hedge_reads,
+                circuit_breaker=self._circuit_breaker,
             )
             self._zones[zone] = zone_inst
 
@@ -167,14 +304,24 @@ class DenonAVR(DenonAVRFoundation):
         """Ensure that configuration is loaded from receiver asynchronously."""
         async with self._setup_lock:
             _LOGGER.debug("Starting denonavr setup")
+            # The snapshot is only used for the first setup
+            snapshot = self._setup_snapshot
+            self._setup_snapshot = None
+            zone_setup = None
+            if snapshot is not None:
+                zone_setup = snapshot.zone_setups.get(self.zone)
+
             # Device setup
-            await self._device.async_setup()
+            await self._device.async_setup(snapshot=snapshot)
             if self._name is None:
                 self._name = self._device.friendly_name
 
             # Setup other functions
-            self.input.setup()
-            async_tasks = [self.soundmode.async_setup(), self.tonecontrol.async_setup()]
+            self.input.setup(zone_setup)
+            async_tasks = [
+                self.soundmode.async_setup(zone_setup),
+                self.tonecontrol.async_setup(zone_setup),
+            ]
             for zone_name, zone_item in self._zones.items():
                 if zone_name != self.zone:
                     async_tasks.append(zone_item.async_setup())
@@ -186,8 +333,56 @@ class DenonAVR(DenonAVRFoundation):
             self.dirac.setup()
 
             self._is_setup = True
+            if snapshot is not None and self.zone == MAIN_ZONE:
+                self._revalidation_task = asyncio.create_task(
+                    self._async_revalidate_setup(snapshot)
+                )
             _LOGGER.debug("Finished denonavr setup")
 
+    async def _async_revalidate_setup(self, snapshot: SetupSnapshot) -> None:
+        """Check in the background if the setup snapshot is still valid."""
+        if await self._device.async_validate_setup_snapshot(snapshot):
+            _LOGGER.debug("Setup snapshot of %s is valid", self._host)
+            return
+        _LOGGER.warning(
+            "Setup snapshot of %s does not match the receiver, running setup again",
+            self._host,
+        )
+        # pylint: disable=protected-access
+        for zone_item in self._zones.values():
+            zone_item._is_setup = False
+
+    async def _async_cancel_revalidation(self) -> None:
+        """Cancel the background revalidation of the setup snapshot."""
+        task = self._revalidation_task
+        self._revalidation_task = None
+        if task is not None and not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    def export_setup_snapshot(self) -> Dict[str, Any]:
+        """
+        Return a JSON serializable snapshot of the setup results.
+
+        Pass it as setup_snapshot to a new instance to skip probing the receiver.
+        """
+        if not self._is_setup:
+            raise AvrProcessingError("Setup snapshot requires a finished setup")
+        # pylint: disable=protected-access
+        zone_setups = {
+            zone_name: ZoneSetupSnapshot(
+                support_sound_mode=zone_item.soundmode.support_sound_mode,
+                sound_mode_appcommand_active=zone_item.soundmode._appcommand_active,
+                support_tone_control=zone_item.tonecontrol.support_tone_control,
+                input_func_map=zone_item.input.input_func_map,
+                netaudio_func_list=zone_item.input.netaudio_func_list,
+                playing_func_list=zone_item.input.playing_func_list,
+            )
+            for zone_name, zone_item in self._zones.items()
+        }
+        return self._device.create_setup_snapshot(zone_setups).as_dict()
+
     async def async_update(self):
         """
         Get the latest status information from device asynchronously.
@@ -199,19 +394,28 @@ class DenonAVR(DenonAVRFoundation):
         if not self._is_setup:
             await self.async_setup()
 
-        # Create a cache id for this global update
-        cache_id = time.time()
+        # Zones updating in the same cycle share the responses of the update
+        cache_id = self._update_coordinator.cache_id(self.zone)
+        # Request only the attributes not pushed by telnet in telnet first
+        # mode instead of the complete global update
+        global_update = not self._device.telnet_first_active
 
         try:
             # Update device (component_tasks depend on the result from this one)
-            await self._device.async_update(global_update=True, cache_id=cache_id)
+            await self._device.async_update(
+                global_update=global_update, cache_id=cache_id
+            )
 
             # Update other functions
             await asyncio.gather(
-                self.input.async_update(global_update=True, cache_id=cache_id),
-                self.soundmode.async_update(global_update=True, cache_id=cache_id),
-                self.tonecontrol.async_update(global_update=True, cache_id=cache_id),
-                self.vol.async_update(global_update=True, cache_id=cache_id),
+                self.input.async_update(global_update=global_update, cache_id=cache_id),
+                self.soundmode.async_update(
+                    global_update=global_update, cache_id=cache_id
+                ),
+                self.tonecontrol.async_update(
+                    global_update=global_update, cache_id=cache_id
+                ),
+                self.vol.async_update(global_update=global_update, cache_id=cache_id),
             )
         except AvrForbiddenError:
             # Recovery in case receiver changes port from 80 to 8080 which
@@ -290,8 +494,63 @@ class DenonAVR(DenonAVRFoundation):
 
     async def async_telnet_disconnect(self):
         """Disconnect from the telnet interface of the receiver."""
+        await self._async_cancel_revalidation()
         await self._device.telnet_api.async_disconnect()
 
+    async def async_wait_synced(self) -> None:
+        """Wait until the state is synced after the telnet connection is made."""
+        await self._device.telnet_api.async_wait_synced()
+
+    def start_polling(self) -> None:
+        """
+        Start updating the state in the background.
+
+        The state is polled fast after commands or observed changes and the
+        interval backs off while the zone is in standby or nothing changes.
+        """
+        self._device.api.register_state_change_callback(
+            self._poll_scheduler.notify_activity
+        )
+        self._device.telnet_api.register_state_change_callback(
+            self._poll_scheduler.notify_activity
+        )
+        self._poll_scheduler.start()
+
+    async def async_stop_polling(self) -> None:
+        """Stop updating the state in the background."""
+        self._device.api.unregister_state_change_callback(
+            self._poll_scheduler.notify_activity
+        )
+        self._device.telnet_api.unregister_state_change_callback(
+            self._poll_scheduler.notify_activity
+        )
+        await self._poll_scheduler.async_stop()
+        await self._async_cancel_revalidation()
+
+    async def async_wait_for_update(self) -> None:
+        """Wait until the next background update of the state finished."""
+        await self._poll_scheduler.async_wait_for_update()
+
+    def _poll_state(self) -> Hashable:
+        """Return a snapshot of the state observed by background updates."""
+        return (
+            self.power,
+            self.state,
+            self.volume,
+            self.muted,
+            self.input_func,
+            self.sound_mode_raw,
+            self.title,
+            self.artist,
+            self.album,
+            self.station,
+            self.frequency,
+        )
+
+    def _poll_standby(self) -> bool:
+        """Return True if background updates consider the zone in standby."""
+        return self.power != POWER_ON
+
     ##############
     # Properties #
     ##############
@@ -399,13 +658,13 @@ class DenonAVR(DenonAVRFoundation):
         return self.input.input_func_list
 
     @property
-    def input_func_map(self) -> Dict[str, str]:
-        """Return a dict of available input sources with default names as values."""
+    def input_func_map(self) -> Mapping[str, str]:
+        """Return a read-only map of input sources with default names as values."""
         return self.input.input_func_map
 
     @property
-    def input_func_map_reverse(self) -> Dict[str, str]:
-        """Return a dict of available input sources with default names as keys."""
+    def input_func_map_reverse(self) -> Mapping[str, str]:
+        """Return a read-only map of input sources with default names as keys."""
         return self.input.input_func_map_reverse
 
     @property
@@ -483,8 +742,8 @@ class DenonAVR(DenonAVRFoundation):
         return self.input.station
 
     @property
-    def netaudio_func_list(self) -> List[str]:
-        """Return list of network audio devices.
+    def netaudio_func_list(self) -> Tuple[str, ...]:
+        """Return tuple of network audio devices.
 
         Those devices should react to play, pause, next and previous
         track commands.
@@ -492,8 +751,8 @@ class DenonAVR(DenonAVRFoundation):
         return self.input.netaudio_func_list
 
     @property
-    def playing_func_list(self) -> List[str]:
-        """Return list of playing devices.
+    def playing_func_list(self) -> Tuple[str, ...]:
+        """Return tuple of playing devices.
 
         Those devices offer additional information about what they are playing
         (e.g. title, artist, album, band, frequency, station, image_url).
@@ -529,6 +788,41 @@ class DenonAVR(DenonAVRFoundation):
         """Return True if telnet connection is healthy."""
         return self._device.telnet_api.healthy
 
+    @property
+    def polling(self) -> bool:
+        """Return True if the state is updated in the background."""
+        return self._poll_scheduler.running
+
+    @property
+    def poll_interval(self) -> AdaptiveInterval:
+        """Return the adaptive interval of background updates."""
+        return self._poll_scheduler.interval
+
+    @property
+    def rate_limiter(self) -> AdaptiveLimiter:
+        """Return the request budget shared by HTTP and telnet."""
+        return self._rate_limiter
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """Return the circuit breaker of the receiver connections."""
+        return self._circuit_breaker
+
+    @property
+    def circuit_state(self) -> CircuitState:
+        """Return the circuit state, open while the receiver is unreachable."""
+        return self._circuit_breaker.state
+
+    @property
+    def hedge_reads(self) -> bool:
+        """Return True if slow status reads are hedged."""
+        return self._hedge_reads
+
+    @property
+    def telnet_first(self) -> bool:
+        """Return True if attributes pushed by telnet are not polled."""
+        return self._telnet_first
+
     @property
     def show_all_inputs(self) -> Optional[bool]:
         """Indicate if all inputs are shown or just active one."""
@@ -1032,6 +1326,10 @@ class DenonAVR(DenonAVRFoundation):
         """
         await self.soundmode.async_set_sound_mode(sound_mode)
 
+    async def async_get_image(self) -> Optional[bytes]:
+        """Return the image of current playing media when powered on."""
+        return await self.input.async_get_image()
+
     async def async_toggle_play_pause(self) -> None:
         """Toggle play pause media player."""
         await self.input.async_toggle_play_pause()
@@ -35,7 +35,9 @@ class DenonAVRDirac(DenonAVRFoundation):
 
     def setup(self) -> None:
         """Ensure that the instance is initialized."""
-        self._device.telnet_api.register_callback("PS", self._ps_callback)
+        self._device.telnet_api.register_callback(
+            "PS", self._ps_callback, prefix="DIRAC", zone=self._device.zone
+        )
 
         self._is_setup = True
 
@@ -57,3 +57,7 @@ class AvrInvalidResponseError(AvrRequestError):
 
 class AvrForbiddenError(AvrRequestError):
     """Define an error for forbidden endpoints (HTTP 403) of Denon AVR."""
+
+
+class AvrCircuitOpenError(AvrNetworkError):
+    """Define an error for requests rejected while a receiver is unreachable."""
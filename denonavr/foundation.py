@@ -11,13 +11,27 @@ import asyncio
 import logging
 import xml.etree.ElementTree as ET
 from collections.abc import Hashable
-from copy import deepcopy
-from typing import Callable, Dict, List, Literal, Optional, Union, get_args
+from functools import lru_cache
+from types import MappingProxyType
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+)
 
 import attr
 
-from .api import DenonAVRApi, DenonAVRTelnetApi
+from .api import DenonAVRApi, DenonAVRTelnetApi, PrefixTable
 from .appcommand import AppCommandCmd, AppCommands
+from .circuit_breaker import CircuitBreaker
 from .const import (
     APPCOMMAND_CMD_TEXT,
     APPCOMMAND_NAME,
@@ -82,13 +96,17 @@ from .const import (
 from .exceptions import (
     AvrCommandError,
     AvrNetworkError,
+    AvrProcessingError,
     AvrRequestError,
     AvrTimoutError,
 )
+from .rate_limiter import AdaptiveLimiter, RequestPriority
 from .ssdp import evaluate_scpd_xml
 
 _LOGGER = logging.getLogger(__name__)
 
+_REDUCED_PLAN_CACHE_SIZE = 256
+
 
 def convert_on_off_bool(value: str) -> Optional[bool]:
     """Convert a ON/OFF string to bool."""
@@ -231,6 +249,96 @@ def channel_status_to_str(channel_statuses: str) -> str | None:
     return result
 
 
+SETUP_SNAPSHOT_VERSION = 1
+RECEIVER_TYPES_BY_NAME = {r_type.type: r_type for r_type in VALID_RECEIVER_TYPES}
+
+
+def _zone_setup_snapshots_converter(
+    value: Dict[str, Union["ZoneSetupSnapshot", Dict[str, Any]]],
+) -> Dict[str, "ZoneSetupSnapshot"]:
+    """Convert serialized zone setup snapshots."""
+    return {
+        zone: (
+            zone_setup
+            if isinstance(zone_setup, ZoneSetupSnapshot)
+            else ZoneSetupSnapshot(**zone_setup)
+        )
+        for zone, zone_setup in value.items()
+    }
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class ZoneSetupSnapshot:
+    """Setup results of one zone of the receiver."""
+
+    support_sound_mode: Optional[bool] = attr.ib(
+        converter=attr.converters.optional(bool), default=None
+    )
+    sound_mode_appcommand_active: bool = attr.ib(converter=bool, default=True)
+    support_tone_control: Optional[bool] = attr.ib(
+        converter=attr.converters.optional(bool), default=None
+    )
+    input_func_map: Dict[str, str] = attr.ib(converter=dict, factory=dict)
+    netaudio_func_list: List[str] = attr.ib(converter=list, factory=list)
+    playing_func_list: List[str] = attr.ib(converter=list, factory=list)
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class SetupSnapshot:
+    """
+    Setup results of a receiver which can be persisted.
+
+    Passing the snapshot to a new instance skips probing the receiver during
+    setup. The snapshot is revalidated in the background after the setup.
+    """
+
+    receiver_type: str = attr.ib(validator=attr.validators.in_(RECEIVER_TYPES_BY_NAME))
+    use_avr_2016_update: bool = attr.ib(converter=bool)
+    zones: int = attr.ib(converter=int, default=0)
+    friendly_name: Optional[str] = attr.ib(
+        converter=attr.converters.optional(str), default=None
+    )
+    manufacturer: Optional[str] = attr.ib(
+        converter=attr.converters.optional(str), default=None
+    )
+    model_name: Optional[str] = attr.ib(
+        converter=attr.converters.optional(str), default=None
+    )
+    serial_number: Optional[str] = attr.ib(
+        converter=attr.converters.optional(str), default=None
+    )
+    is_dirac_supported: bool = attr.ib(converter=bool, default=False)
+    zone_setups: Dict[str, ZoneSetupSnapshot] = attr.ib(
+        converter=_zone_setup_snapshots_converter, factory=dict
+    )
+    version: int = attr.ib(
+        validator=attr.validators.in_((SETUP_SNAPSHOT_VERSION,)),
+        default=SETUP_SNAPSHOT_VERSION,
+    )
+
+    @property
+    def receiver(self) -> ReceiverType:
+        """Return the receiver type of the snapshot."""
+        return RECEIVER_TYPES_BY_NAME[self.receiver_type]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the snapshot as JSON serializable dictionary."""
+        return attr.asdict(self)
+
+
+def setup_snapshot_converter(
+    value: Optional[Union[SetupSnapshot, Dict[str, Any]]],
+) -> Optional[SetupSnapshot]:
+    """Convert a serialized setup snapshot, invalid snapshots are ignored."""
+    if value is None or isinstance(value, SetupSnapshot):
+        return value
+    try:
+        return SetupSnapshot(**value)
+    except (TypeError, ValueError) as err:
+        _LOGGER.warning("Ignoring invalid setup snapshot: %s", err)
+        return None
+
+
 @attr.s(auto_attribs=True, on_setattr=DENON_ATTR_SETATTR)
 class DenonAVRDeviceInfo:
     """Implements a class with device information of the receiver."""
@@ -409,18 +517,28 @@ class DenonAVRDeviceInfo:
         converter=attr.converters.optional(PICTURE_MODE_MAP.get), default=None
     )
     _picture_modes = get_args(PictureModes)
+    # Attributes which are kept up to date by telnet callbacks
+    telnet_attrs = frozenset({"_power", "_auto_standby", "_dimmer", "_eco_mode"})
     _is_setup: bool = attr.ib(converter=bool, default=False, init=False)
     _setup_lock: asyncio.Lock = attr.ib(default=attr.Factory(asyncio.Lock))
-    _op_handlers: Dict[str, Callable[[str], None]] = attr.ib(factory=dict, init=False)
-    _ps_handlers: Dict[str, Callable[[str, str], None]] = attr.ib(
-        factory=dict, init=False
-    )
-    _ss_handlers: Dict[str, Callable[[str], None]] = attr.ib(factory=dict, init=False)
-    _sy_handlers: Dict[str, Callable[[str], None]] = attr.ib(factory=dict, init=False)
-    _vs_handlers: Dict[str, Callable[[str, str], None]] = attr.ib(
-        factory=dict, init=False
-    )
+    _op_handlers: PrefixTable = attr.ib(factory=PrefixTable, init=False)
+    _ps_handlers: PrefixTable = attr.ib(factory=PrefixTable, init=False)
+    _ss_handlers: PrefixTable = attr.ib(factory=PrefixTable, init=False)
+    _sy_handlers: PrefixTable = attr.ib(factory=PrefixTable, init=False)
+    _vs_handlers: PrefixTable = attr.ib(factory=PrefixTable, init=False)
     _is_dirac_supported: bool = attr.ib(converter=bool, default=False, init=False)
+    telnet_first: bool = attr.ib(converter=bool, default=False, kw_only=True)
+    _appcommand_update_plan: "AppCommandUpdatePlan" = attr.ib(
+        factory=lambda: compile_appcommand_update_plan(
+            (
+                AppCommands.GetAllZonePowerStatus,
+                AppCommands.GetAutoStandby,
+                AppCommands.GetDimmer,
+                AppCommands.GetECO,
+            )
+        ),
+        init=False,
+    )
 
     def __attrs_post_init__(self) -> None:
         """Initialize special attributes and callbacks."""
@@ -437,44 +555,55 @@ class DenonAVRDeviceInfo:
         else:
             raise ValueError(f"Invalid zone {self.zone}")
 
-        self._op_handlers: Dict[str, Callable[[str], None]] = {
-            "INFASP": self._output_channels_callback,
-            "INFINS": self._input_channel_callback,
-        }
+        self._op_handlers = PrefixTable(
+            {
+                "INFASP": self._output_channels_callback,
+                "INFINS": self._input_channel_callback,
+            }
+        )
 
-        self._ps_handlers: Dict[str, Callable[[str, str], None]] = {
-            # Note order, 'DELAY' must be before 'DEL' because of startswith check
-            "DELAY": self._delay_callback,
-            "DEL": self._delay_time_callback,
-            "RSZ": self._room_size_callback,
-            "RSTR": self._audio_restorer_callback,
-            "GEQ": self._graphic_eq_callback,
-            "HEQ": self._headphone_eq_callback,
-        }
+        # Handlers are selected by the longest matching prefix,
+        # thus 'DELAY' does not trigger the 'DEL' handler
+        self._ps_handlers = PrefixTable(
+            {
+                "DELAY": self._delay_callback,
+                "DEL": self._delay_time_callback,
+                "RSZ": self._room_size_callback,
+                "RSTR": self._audio_restorer_callback,
+                "GEQ": self._graphic_eq_callback,
+                "HEQ": self._headphone_eq_callback,
+            }
+        )
 
-        self._ss_handlers: Dict[str, Callable[[str], None]] = {
-            "TTR": self._tactile_transducer_callback,
-            "HOS": self._auto_lip_sync_callback,
-            "INFSIGRES": self._video_signal_callback,
-            "INFAISFSV": self._audio_sampling_rate_callback,
-            "INFSIGHDR": self._hdr_callback,
-            "INFSIGPIX": self._pixel_depth_callback,
-            "INFSIGFRL": self._max_frl_callback,
-            "INFSIGCOS": self._colorspace_callback,
-        }
+        self._ss_handlers = PrefixTable(
+            {
+                "TTR": self._tactile_transducer_callback,
+                "HOS": self._auto_lip_sync_callback,
+                "INFSIGRES": self._video_signal_callback,
+                "INFAISFSV": self._audio_sampling_rate_callback,
+                "INFSIGHDR": self._hdr_callback,
+                "INFSIGPIX": self._pixel_depth_callback,
+                "INFSIGFRL": self._max_frl_callback,
+                "INFSIGCOS": self._colorspace_callback,
+            }
+        )
 
-        self._sy_handlers: Dict[str, Callable[[str], None]] = {
-            "SDA": self._audio_signal_callback,
-            "SMI": self._audio_sound_callback,
-            "HDMIDIAGMAXRES": self._max_resolution_callback,
-            "INFSIGRES": self._video_signal_callback,
-        }
+        self._sy_handlers = PrefixTable(
+            {
+                "SDA": self._audio_signal_callback,
+                "SMI": self._audio_sound_callback,
+                "HDMIDIAGMAXRES": self._max_resolution_callback,
+                "INFSIGRES": self._video_signal_callback,
+            }
+        )
 
-        self._vs_handlers: Dict[str, Callable[[str, str], None]] = {
-            "MONI": self._hdmi_output_callback,
-            "AUDIO": self._hdmi_audio_decode_callback,
-            "VPM": self._video_processing_mode_callback,
-        }
+        self._vs_handlers = PrefixTable(
+            {
+                "MONI": self._hdmi_output_callback,
+                "AUDIO": self._hdmi_audio_decode_callback,
+                "VPM": self._video_processing_mode_callback,
+            }
+        )
 
     def _power_callback(self, zone: str, _event: str, parameter: str) -> None:
         """Handle a power change event."""
@@ -526,27 +655,6 @@ class DenonAVRDeviceInfo:
 
         self._triggers[int(values[0])] = values[1]
 
-    def _vs_callback(self, zone: str, _event: str, parameter: str) -> None:
-        """Handle a VS change event."""
-        for prefix, handler in self._vs_handlers.items():
-            if parameter.startswith(prefix):
-                handler(zone, parameter)
-                return
-
-    def _ps_callback(self, zone: str, _event: str, parameter: str) -> None:
-        """Handle a PS change event."""
-        for prefix, handler in self._ps_handlers.items():
-            if parameter.startswith(prefix):
-                handler(zone, parameter)
-                return
-
-    def _op_callback(self, _zone: str, _event: str, parameter: str) -> None:
-        """Handle an OP change event."""
-        for prefix, handler in self._op_handlers.items():
-            if parameter.startswith(prefix):
-                handler(parameter)
-                return
-
     def _delay_callback(self, zone: str, parameter: str) -> None:
         """Handle a delay change event."""
         if zone == self.zone and parameter.startswith("DELAY"):
@@ -572,20 +680,6 @@ class DenonAVRDeviceInfo:
         if zone == self.zone:
             self._video_processing_mode = parameter[3:]
 
-    def _ss_callback(self, _zone: str, _event: str, parameter: str) -> None:
-        """Handle a SS change event."""
-        for prefix, handler in self._ss_handlers.items():
-            if parameter.startswith(prefix):
-                handler(parameter)
-                return
-
-    def _sy_callback(self, _zone: str, _event: str, parameter: str) -> None:
-        """Handle a SY change event."""
-        for prefix, handler in self._sy_handlers.items():
-            if parameter.startswith(prefix):
-                handler(parameter)
-                return
-
     def _tactile_transducer_callback(self, parameter: str) -> None:
         """Handle a tactile transducer change event."""
         key_value = parameter.split()
@@ -770,23 +864,15 @@ class DenonAVRDeviceInfo:
                     key_value[1],
                 )
 
-    async def async_setup(self) -> None:
+    async def async_setup(self, snapshot: Optional[SetupSnapshot] = None) -> None:
         """Ensure that configuration is loaded from receiver asynchronously."""
         async with self._setup_lock:
             _LOGGER.debug("Starting device setup")
-            # Reduce read timeout during receiver identification
-            # deviceinfo endpoint takes very long to return 404
-            read_timeout = self.api.read_timeout
-            self.api.read_timeout = self.api.timeout
-            try:
-                _LOGGER.debug("Identifying receiver")
-                await self.async_identify_receiver()
-                _LOGGER.debug("Getting device info")
-                await self.async_get_device_info()
-            finally:
-                self.api.read_timeout = read_timeout
-            _LOGGER.debug("Identifying update method")
-            await self.async_identify_update_method()
+            if snapshot is not None:
+                _LOGGER.debug("Using setup snapshot")
+                self._apply_setup_snapshot(snapshot)
+            else:
+                await self._async_probe_receiver()
 
             # Add tags for a potential AppCommand.xml update
             self.api.add_appcommand_update_tag(AppCommands.GetAllZonePowerStatus)
@@ -799,6 +885,119 @@ class DenonAVRDeviceInfo:
             self._is_setup = True
             _LOGGER.debug("Finished device setup")
 
+    async def _async_probe_receiver(self) -> None:
+        """Identify the receiver, its device info and update method."""
+        _LOGGER.debug("Identifying receiver")
+        await self.async_identify_receiver()
+        # Both requests only depend on the receiver type, run them concurrently
+        _LOGGER.debug("Getting device info and identifying update method")
+        results = await asyncio.gather(
+            self.async_get_device_info(),
+            self.async_identify_update_method(),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        if self.friendly_name is None:
+            _LOGGER.warning("No FriendlyName found, using standard name: Denon AVR")
+            self.friendly_name = "Denon AVR"
+
+    def _apply_setup_snapshot(self, snapshot: SetupSnapshot) -> None:
+        """Apply the results of a previous setup."""
+        self.receiver = snapshot.receiver
+        self.api.port = snapshot.receiver.port
+        self.use_avr_2016_update = snapshot.use_avr_2016_update
+        self.zones = snapshot.zones
+        if self.friendly_name is None:
+            self.friendly_name = snapshot.friendly_name
+        self.manufacturer = snapshot.manufacturer
+        self.model_name = snapshot.model_name
+        self.serial_number = snapshot.serial_number
+        self._is_dirac_supported = snapshot.is_dirac_supported
+        self.telnet_api.is_denon = self.is_denon
+
+    def create_setup_snapshot(
+        self, zone_setups: Dict[str, ZoneSetupSnapshot]
+    ) -> SetupSnapshot:
+        """Create a snapshot of the setup results."""
+        if self.receiver is None or self.use_avr_2016_update is None:
+            raise AvrProcessingError("Device is not setup")
+        return SetupSnapshot(
+            receiver_type=self.receiver.type,
+            use_avr_2016_update=self.use_avr_2016_update,
+            zones=self.zones,
+            friendly_name=self.friendly_name,
+            manufacturer=self.manufacturer,
+            model_name=self.model_name,
+            serial_number=self.serial_number,
+            is_dirac_supported=self._is_dirac_supported,
+            zone_setups=zone_setups,
+        )
+
+    async def async_validate_setup_snapshot(self, snapshot: SetupSnapshot) -> bool:
+        """
+        Check if a setup snapshot still matches the receiver.
+
+        Connection errors do not invalidate the snapshot.
+        """
+        try:
+            # Deviceinfo.xml is static and can be cached for the whole time
+            xml = await self.api.async_get_xml(
+                self.urls.deviceinfo, cache_id=id(self.api)
+            )
+        except (AvrTimoutError, AvrNetworkError) as err:
+            _LOGGER.debug("Connection error when validating setup snapshot: %s", err)
+            return True
+        except AvrRequestError as err:
+            _LOGGER.debug("Request error when validating setup snapshot: %s", err)
+            # Deviceinfo.xml is not available for all AVR receivers
+            if snapshot.receiver != AVR:
+                return False
+        else:
+            if not self._snapshot_matches_deviceinfo(snapshot, xml):
+                return False
+        return await self._async_validate_device_identity(snapshot)
+
+    def _snapshot_matches_deviceinfo(
+        self, snapshot: SetupSnapshot, xml: ET.Element
+    ) -> bool:
+        """Check if receiver type and zones of a snapshot match Deviceinfo.xml."""
+        if snapshot.receiver == AVR:
+            return not self._is_avr_x(xml)
+        device_zones = xml.find("./DeviceZones")
+        if device_zones is not None and int(device_zones.text) != snapshot.zones:
+            return False
+        return self._is_avr_x(xml)
+
+    async def _async_validate_device_identity(self, snapshot: SetupSnapshot) -> bool:
+        """
+        Check if model name and serial number of a setup snapshot match.
+
+        Receivers without a device description cannot be checked.
+        """
+        description = DESCRIPTION_TYPES[snapshot.receiver_type]
+        url = f"http://{self.api.host}:{description.port}{description.url}"
+        try:
+            res = await self.api.async_get(
+                description.url,
+                port=description.port,
+                read_timeout=self.api.timeout,
+                record_latency=False,
+                priority=RequestPriority.DISCOVERY,
+            )
+        except AvrRequestError as err:
+            _LOGGER.debug("Error getting device info of setup snapshot: %s", err)
+            return True
+
+        device_info = evaluate_scpd_xml(url, res.text)
+        if device_info is None:
+            return snapshot.serial_number is None
+        return (
+            device_info["modelName"] == snapshot.model_name
+            and device_info["serialNumber"] == snapshot.serial_number
+        )
+
     def _register_callbacks(self):
         power_event = "ZM"
         if self.zone == ZONE2:
@@ -817,16 +1016,20 @@ class DenonAVRDeviceInfo:
         self.telnet_api.register_callback("MN", self._settings_menu_callback)
         self.telnet_api.register_callback("DIM", self._dimmer_callback)
         self.telnet_api.register_callback("ECO", self._eco_mode_callback)
-        self.telnet_api.register_callback("VS", self._vs_callback)
-        self.telnet_api.register_callback("SS", self._ss_callback)
-        self.telnet_api.register_callback("SY", self._sy_callback)
-        self.telnet_api.register_callback("OP", self._op_callback)
+        self.telnet_api.register_prefix_handlers(
+            "VS", self._vs_handlers, with_zone=True
+        )
+        self.telnet_api.register_prefix_handlers("SS", self._ss_handlers)
+        self.telnet_api.register_prefix_handlers("SY", self._sy_handlers)
+        self.telnet_api.register_prefix_handlers("OP", self._op_handlers)
         self.telnet_api.register_callback("STBY", self._auto_standby_callback)
         self.telnet_api.register_callback("SLP", self._auto_sleep_callback)
         self.telnet_api.register_callback("TR", self._trigger_callback)
         self.telnet_api.register_callback("SP", self._speaker_preset_callback)
         self.telnet_api.register_callback("BT", self._bt_callback)
-        self.telnet_api.register_callback("PS", self._ps_callback)
+        self.telnet_api.register_prefix_handlers(
+            "PS", self._ps_handlers, with_zone=True
+        )
         self.telnet_api.register_callback("PV", self._picture_mode_callback)
         if not self.is_denon:
             self.telnet_api.register_callback("ILB", self._illumination_callback)
@@ -874,56 +1077,49 @@ class DenonAVRDeviceInfo:
             "SYSDA ?",
             "SYSMI ?",
         ]
-        for command in commands:
-            try:
-                await self.telnet_api.async_send_commands(
-                    command, skip_confirmation=True
-                )
-                await asyncio.sleep(0.075)
-            except Exception:  # pylint: disable=broad-except
-                _LOGGER.debug(
-                    "Failed to send advanced video info command: %s.", command
-                )
+        try:
+            await self.telnet_api.async_query_commands(*commands)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Failed to send advanced video info commands: %s", err)
 
     async def async_identify_receiver(self) -> None:
         """Identify receiver asynchronously."""
         # Test Deviceinfo.xml if receiver is an AVR-X with port 80 for pre 2016
         # devices and port 8080 devices 2016 and later
         # 2016 models has also some of the XML but not all, try first 2016
-        r_types = [AVR_X_2016, AVR_X, AVR]
+        r_types = [AVR_X_2016, AVR_X]
 
-        timeout_errors = 0
-        for r_type in r_types:
-            self.api.port = r_type.port
-            # This XML is needed to get the sources of the receiver
-            try:
-                # Deviceinfo.xml is static and can be cached for the whole time
-                xml = await self.api.async_get_xml(
-                    self.urls.deviceinfo, cache_id=id(self)
-                )
-            except (AvrTimoutError, AvrNetworkError) as err:
-                _LOGGER.debug(
-                    "Connection error on port %s when identifying receiver: %s",
-                    r_type.port,
-                    err,
-                )
+        # Probe all ports concurrently, results are evaluated in order of r_types
+        probes = {
+            port: asyncio.create_task(self._async_probe_deviceinfo(port))
+            for port in dict.fromkeys(r_type.port for r_type in r_types)
+        }
+        try:
+            connection_errors = 0
+            for r_type in r_types:
+                try:
+                    xml = await probes[r_type.port]
+                except (AvrTimoutError, AvrNetworkError) as err:
+                    _LOGGER.debug(
+                        "Connection error on port %s when identifying receiver: %s",
+                        r_type.port,
+                        err,
+                    )
 
-                # Raise error only when occurred at both types
-                timeout_errors += 1
-                if timeout_errors == len(r_types):
-                    raise
+                    # Raise error only when occurred at all ports
+                    connection_errors += 1
+                    if connection_errors == len(probes):
+                        raise
+                    continue
+
+                if xml is None:
+                    _LOGGER.debug(
+                        "Device is not a %s receiver on port %s",
+                        r_type.type,
+                        r_type.port,
+                    )
+                    continue
 
-            except AvrRequestError as err:
-                _LOGGER.debug(
-                    (
-                        "Request error on port %s when identifying receiver, "
-                        "device is not a %s receiver: %s"
-                    ),
-                    r_type.port,
-                    r_type.type,
-                    err,
-                )
-            else:
                 device_zones = xml.find("./DeviceZones")
                 if device_zones is not None:
                     self.zones = device_zones.text
@@ -933,6 +1129,7 @@ class DenonAVRDeviceInfo:
                 is_avr_x = self._is_avr_x(xml)
                 if is_avr_x:
                     self.receiver = r_type
+                    self.api.port = r_type.port
                     _LOGGER.info(
                         "Identified %s receiver using port %s",
                         r_type.type,
@@ -940,6 +1137,11 @@ class DenonAVRDeviceInfo:
                     )
                     # Receiver identified, return
                     return
+        finally:
+            # Cancel probes which are not needed anymore
+            for probe in probes.values():
+                probe.cancel()
+            await asyncio.gather(*probes.values(), return_exceptions=True)
 
         # If check of Deviceinfo.xml was not successful, receiver is type AVR
         self.receiver = AVR
@@ -950,6 +1152,29 @@ class DenonAVRDeviceInfo:
             AVR.port,
         )
 
+    async def _async_probe_deviceinfo(self, port: int) -> Optional[ET.Element]:
+        """
+        Get Deviceinfo.xml from a port of the receiver.
+
+        Returns None if the port does not provide Deviceinfo.xml.
+        """
+        try:
+            # Deviceinfo.xml is static and can be cached for the whole time
+            # Reduce read timeout, deviceinfo endpoint takes very long to return 404
+            return await self.api.async_get_xml(
+                self.urls.deviceinfo,
+                port=port,
+                read_timeout=self.api.timeout,
+                cache_id=id(self.api),
+            )
+        except (AvrTimoutError, AvrNetworkError):
+            raise
+        except AvrRequestError as err:
+            _LOGGER.debug(
+                "Request error on port %s when identifying receiver: %s", port, err
+            )
+            return None
+
     @staticmethod
     def _is_avr_x(deviceinfo: ET.Element) -> bool:
         """Evaluate Deviceinfo.xml if the device is an AVR-X device."""
@@ -1020,12 +1245,7 @@ class DenonAVRDeviceInfo:
                 raise
             except AvrRequestError as err:
                 _LOGGER.debug("Request error getting friendly name: %s", err)
-                _LOGGER.info(
-                    "Receiver name could not be determined. Using standard"
-                    " name: Denon AVR"
-                )
-                if self.friendly_name is None:
-                    self.friendly_name = "Denon AVR"
+                _LOGGER.info("Receiver name could not be determined")
             else:
                 self._set_friendly_name(xml)
 
@@ -1042,9 +1262,6 @@ class DenonAVRDeviceInfo:
                 if name is not None:
                     self.friendly_name = name.strip()
                     break
-        if self.friendly_name is None:
-            _LOGGER.warning("No FriendlyName found, using standard name: Denon AVR")
-            self.friendly_name = "Denon AVR"
 
     async def async_get_device_info(self) -> None:
         """Get device information."""
@@ -1055,7 +1272,11 @@ class DenonAVRDeviceInfo:
         device_info = None
         try:
             res = await self.api.async_get(
-                command, port=port, record_latency=False, skip_rate_limiter=True
+                command,
+                port=port,
+                read_timeout=self.api.timeout,
+                record_latency=False,
+                priority=RequestPriority.DISCOVERY,
             )
         except AvrTimoutError as err:
             _LOGGER.debug("Timeout when getting device info: %s", err)
@@ -1101,44 +1322,25 @@ class DenonAVRDeviceInfo:
         self, global_update: bool = False, cache_id: Optional[Hashable] = None
     ) -> None:
         """Update status from AppCommand.xml."""
-        power_appcommand = AppCommands.GetAllZonePowerStatus
-        dimmer_appcommand = AppCommands.GetDimmer
-        autostandby_appcommand = AppCommands.GetAutoStandby
-        eco_appcommand = AppCommands.GetECO
-        appcommands = (
-            power_appcommand,
-            autostandby_appcommand,
-            dimmer_appcommand,
-            eco_appcommand,
-        )
-
+        update_plan = self._appcommand_update_plan
+        if self.telnet_first_active:
+            update_plan = update_plan.without(self.telnet_attrs)
+            if not update_plan.cmds:
+                _LOGGER.debug("Device status is pushed by telnet, skipping update")
+                return
         try:
             if global_update:
                 xml = await self.api.async_get_global_appcommand(cache_id=cache_id)
             else:
                 xml = await self.api.async_post_appcommand(
-                    self.urls.appcommand, appcommands, cache_id=cache_id
+                    self.urls.appcommand, update_plan.cmds, cache_id=cache_id
                 )
         except AvrRequestError as err:
             _LOGGER.debug("Error when getting device status: %s", err)
             raise
 
         # Extract relevant information
-        for appcommand in appcommands:
-            for i, item in enumerate(
-                create_appcommand_search_strings(appcommand, self.zone)
-            ):
-                tag = xml.find(item)
-
-                if tag is None:
-                    _LOGGER.debug(
-                        "%s attribute of zone %s not found on update",
-                        appcommand.response_pattern[0].update_attribute,
-                        self.zone,
-                    )
-                    continue
-
-                setattr(self, appcommand.response_pattern[i].update_attribute, tag.text)
+        update_plan.apply(self, xml, self.zone)
 
     async def async_update_status_xml(
         self, cache_id: Optional[Hashable] = None
@@ -1157,13 +1359,20 @@ class DenonAVRDeviceInfo:
             "_power": ["./ZonePower/value", "./Power/value"],
             "_eco_mode": ["./ECOMode/value"],
         }
+        if self.telnet_first_active:
+            for attribute in self.telnet_attrs:
+                attribute_searchstrings.pop(attribute, None)
 
         for url in urls:
             if len(attribute_searchstrings) == 0:
                 break
 
+            # Partly parsed responses are cached by their stop tags
+            stop_tags = status_xml_stop_tags(attribute_searchstrings.values())
             try:
-                xml = await self.api.async_get_xml(url, cache_id=cache_id)
+                xml = await self.api.async_get_xml(
+                    url, stop_tags=stop_tags, cache_id=cache_id
+                )
             except AvrRequestError as err:
                 _LOGGER.debug(
                     "Error when getting device status from url %s: %s", url, err
@@ -1584,6 +1793,16 @@ class DenonAVRDeviceInfo:
         """Return true if telnet is connected and healthy."""
         return self.telnet_api.connected and self.telnet_api.healthy
 
+    @property
+    def telnet_first_active(self) -> bool:
+        """
+        Return true if attributes pushed by telnet are not polled via HTTP.
+
+        Telnet first mode is only active while telnet is available and its
+        state is synced. Otherwise all attributes are polled.
+        """
+        return self.telnet_first and self.telnet_available and self.telnet_api.synced
+
     @property
     def is_denon(self) -> bool:
         """Return true if the receiver is a Denon device."""
@@ -2705,19 +2924,28 @@ class DenonAVRFoundation:
         kw_only=True,
     )
     _is_setup: bool = attr.ib(converter=bool, default=False, init=False)
+    # Attributes which are kept up to date by telnet callbacks
+    telnet_attrs = frozenset()
 
     async def async_update_attrs_appcommand(
         self,
-        update_attrs: Dict[AppCommandCmd, None],
+        update_attrs: Union[Dict[AppCommandCmd, None], "AppCommandUpdatePlan"],
         appcommand0300: bool = False,
         global_update: bool = False,
         cache_id: Optional[Hashable] = None,
     ):
-        """Update attributes from AppCommand.xml."""
-        # Copy that we do not accidentally change the wrong dict
-        update_attrs = deepcopy(update_attrs)
-        # Collect tags for AppCommand.xml call
-        tags = tuple(i for i in update_attrs.keys())
+        """
+        Update attributes from AppCommand.xml.
+
+        update_attrs is either a compiled update plan or a dictionary with the
+        AppCommands as keys which is compiled on each call.
+        """
+        if not isinstance(update_attrs, AppCommandUpdatePlan):
+            update_attrs = compile_appcommand_update_plan(update_attrs)
+        if self._is_setup and self._device.telnet_first_active:
+            update_attrs = update_attrs.without(self.telnet_attrs)
+            if not update_attrs.cmds:
+                return
         # Execute call
         try:
             if global_update:
@@ -2731,65 +2959,26 @@ class DenonAVRFoundation:
                 else:
                     url = self._device.urls.appcommand
                 xml = await self._device.api.async_post_appcommand(
-                    url, tags, cache_id=cache_id
+                    url, update_attrs.cmds, cache_id=cache_id
                 )
         except AvrRequestError as err:
             _LOGGER.debug("Error when getting status update: %s", err)
             raise
 
         # Extract relevant information
-        attrs = deepcopy(update_attrs)
-        for app_command in attrs.keys():
-            search_strings = create_appcommand_search_strings(
-                app_command, self._device.zone
-            )
-            start = 0
-            success = 0
-            for i, pattern in enumerate(app_command.response_pattern):
-                try:
-                    start += 1
-                    # Check if attribute exists
-                    getattr(self, pattern.update_attribute)
-                    # Set new value either from XML attribute or text
-                    if pattern.get_xml_attribute is not None:
-                        set_value = xml.find(search_strings[i]).get(
-                            pattern.get_xml_attribute
-                        )
-                    else:
-                        set_value = xml.find(search_strings[i]).text
-
-                    setattr(self, pattern.update_attribute, set_value)
-                    success += 1
-
-                    _LOGGER.debug(
-                        "Changing variable %s to value %s",
-                        pattern.update_attribute,
-                        set_value,
-                    )
-
-                except (AttributeError, IndexError) as err:
-                    _LOGGER.debug(
-                        "Failed updating attribute %s for zone %s: %s",
-                        pattern.update_attribute,
-                        self._device.zone,
-                        err,
-                    )
-
-            if start == success:
-                # Done
-                update_attrs.pop(app_command, None)
+        failed = update_attrs.apply(self, xml, self._device.zone)
 
         # Check if each attribute was updated
-        if update_attrs:
+        if failed:
             _LOGGER.debug(
                 "Some attributes of zone %s not found on update: %s",
                 self._device.zone,
-                update_attrs,
+                failed,
             )
 
     async def async_update_attrs_status_xml(
         self,
-        update_attrs: Dict[str, str],
+        update_attrs: Union[Dict[str, str], "StatusXmlUpdatePlan"],
         urls: List[str],
         cache_id: Optional[Hashable] = None,
     ):
@@ -2802,69 +2991,88 @@ class DenonAVRFoundation:
         # Variables with their tags to be updated.
         # Key = Variable, Value = XML tag Like:
         update_attrs = {"power": "./Power/value"}
+
+        update_attrs might be compiled to an update plan already.
         """
-        # Copy that we do not accidently change the wrong dict
-        update_attrs = deepcopy(update_attrs)
+        if not isinstance(update_attrs, StatusXmlUpdatePlan):
+            update_attrs = compile_status_xml_update_plan(update_attrs)
+        if self._is_setup and self._device.telnet_first_active:
+            update_attrs = update_attrs.without(self.telnet_attrs)
+            if not update_attrs.steps:
+                return
+        steps = update_attrs.steps
 
         for url in urls:
+            # Partly parsed responses are cached by their stop tags
+            stop_tags = status_xml_stop_tags((step.path,) for step in steps)
             try:
-                xml = await self._device.api.async_get_xml(url, cache_id=cache_id)
+                xml = await self._device.api.async_get_xml(
+                    url, stop_tags=stop_tags, cache_id=cache_id
+                )
             except AvrRequestError as err:
                 _LOGGER.debug(
                     "Error when getting status update from url %s: %s", url, err
                 )
                 continue
-            attrs = deepcopy(update_attrs)
-            for name, tag in attrs.items():
-                try:
-                    # Check if attribute exists
-                    getattr(self, name)
-                    # Set new value
-                    setattr(self, name, xml.find(tag).text)
-                    # Done
-                    update_attrs.pop(name, None)
-
-                    _LOGGER.debug(
-                        "Changing variable %s to value %s", name, xml.find(tag).text
-                    )
-
-                except (AttributeError, IndexError) as err:
-                    _LOGGER.debug(
-                        "Failed updating attribute %s for zone %s: %s",
-                        name,
-                        self._device.zone,
-                        err,
-                    )
+            steps = update_attrs.apply(self, xml, self._device.zone, steps)
 
             # All done, no need for continuing
-            if not update_attrs:
+            if not steps:
                 break
 
         # Check if each attribute was updated
-        if update_attrs:
+        if steps:
             _LOGGER.debug(
                 "Some attributes of zone %s not found on update: %s",
                 self._device.zone,
-                update_attrs,
+                [step.update_attribute for step in steps],
             )
 
 
+def status_xml_stop_tags(
+    searchstrings: Iterable[Iterable[str]],
+) -> Tuple[Tuple[str, ...], ...]:
+    """
+    Create the top level tags of status XML search strings.
+
+    Each group contains alternative search strings of one attribute.
+    """
+    return tuple(
+        tuple(searchstring.split("/")[1] for searchstring in group)
+        for group in searchstrings
+    )
+
+
 def create_appcommand_search_strings(
     app_command_cmd: AppCommandCmd, zone: str
 ) -> List[str]:
     """Create search pattern for AppCommand(0300).xml response."""
+    string = "./cmd"
+    # Text of cmd tag in query was added as attribute to response
+    if app_command_cmd.cmd_text:
+        string = string + f"[@{APPCOMMAND_CMD_TEXT}='{app_command_cmd.cmd_text}']"
+    # Text of name tag in query was added as attribute to response
+    if app_command_cmd.name:
+        string = string + f"[@{APPCOMMAND_NAME}='{app_command_cmd.name}']"
+
+    # A complete search string with all attributes looks like
+    # ./cmd[@cmd_text={cmd_text}][@name={name}]/zone1/volume
+    return [
+        string + path[1:] for path in get_appcommand_result_paths(app_command_cmd, zone)
+    ]
+
+
+@lru_cache(maxsize=None)
+def get_appcommand_result_paths(
+    app_command_cmd: AppCommandCmd, zone: str
+) -> Tuple[str, ...]:
+    """Create search pattern relative to the cmd element of an AppCommand."""
     result = []
 
     zone_element = get_zone_element(zone)
 
     for resp in app_command_cmd.response_pattern:
-        string = "./cmd"
-        # Text of cmd tag in query was added as attribute to response
-        if app_command_cmd.cmd_text:
-            string = string + f"[@{APPCOMMAND_CMD_TEXT}='{app_command_cmd.cmd_text}']"
-        # Text of name tag in query was added as attribute to response
-        if app_command_cmd.name:
-            string = string + f"[@{APPCOMMAND_NAME}='{app_command_cmd.name}']"
+        string = "."
         # Prefix like /list/listvalue/
         if resp.prefix:
             string = string + resp.prefix
@@ -2877,11 +3085,205 @@ def create_appcommand_search_strings(
         # Suffix like /status, /volume
         string = string + resp.suffix
 
-        # A complete search string with all attributes looks like
-        # ./cmd[@cmd_text={cmd_text}][@name={name}]/zone1/volume
+        # A complete search string looks like ./zone1/volume
         result.append(string)
 
-    return result
+    return tuple(result)
+
+
+def find_appcommand_results(
+    xml: ET.Element, app_command_cmd: AppCommandCmd, zone: str
+) -> List[Optional[ET.Element]]:
+    """Find the result elements of each response pattern of an AppCommand."""
+    cmd_elements = DenonAVRApi.find_appcommand_cmds(xml, app_command_cmd)
+    return [
+        _find_in_cmd_elements(cmd_elements, path)
+        for path in get_appcommand_result_paths(app_command_cmd, zone)
+    ]
+
+
+def _find_in_cmd_elements(
+    cmd_elements: List[ET.Element], path: str
+) -> Optional[ET.Element]:
+    """Find the first element matching the path in one of the cmd elements."""
+    for cmd_element in cmd_elements:
+        element = cmd_element.find(path)
+        if element is not None:
+            return element
+    return None
+
+
+@attr.s(auto_attribs=True, frozen=True, slots=True)
+class UpdateStep:
+    """Step of an update plan which updates one attribute from a XML element."""
+
+    update_attribute: str
+    path: str
+    get_xml_attribute: Optional[str] = None
+
+    def value(self, element: ET.Element) -> Optional[str]:
+        """Return the new value of the attribute from the element."""
+        if self.get_xml_attribute is not None:
+            return element.get(self.get_xml_attribute)
+        return element.text
+
+
+def _apply_update_step(
+    instance: Any, step: UpdateStep, element: Optional[ET.Element], zone: str
+) -> bool:
+    """Update an attribute of an instance and return True if successful."""
+    if element is None:
+        _LOGGER.debug(
+            "Failed updating attribute %s for zone %s: %s not found",
+            step.update_attribute,
+            zone,
+            step.path,
+        )
+        return False
+    value = step.value(element)
+    setattr(instance, step.update_attribute, value)
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug("Changing variable %s to value %s", step.update_attribute, value)
+    return True
+
+
+@attr.s(auto_attribs=True, frozen=True, slots=True, eq=False)
+class AppCommandUpdatePlan:
+    """
+    Compiled plan which updates attributes from AppCommand.xml responses.
+
+    The update steps of each AppCommand are compiled for all zones. Plans are
+    immutable and compared by identity.
+    """
+
+    cmds: Tuple[AppCommandCmd, ...]
+    zone_steps: Mapping[
+        str, Tuple[Tuple[AppCommandCmd, Tuple[UpdateStep, ...]], ...]
+    ] = attr.ib(converter=MappingProxyType)
+
+    def without(self, update_attributes: FrozenSet[str]) -> "AppCommandUpdatePlan":
+        """
+        Return a plan without the steps which update the given attributes.
+
+        AppCommands without remaining steps are dropped. Plans are memoized.
+        """
+        if not update_attributes:
+            return self
+        return _reduce_appcommand_plan(self, update_attributes)
+
+    def apply(self, instance: Any, xml: ET.Element, zone: str) -> List[AppCommandCmd]:
+        """
+        Update the attributes of an instance from a response.
+
+        Returns the AppCommands whose attributes were not all found.
+        """
+        failed = []
+        for app_command, steps in self.zone_steps[zone]:
+            cmd_elements = DenonAVRApi.find_appcommand_cmds(xml, app_command)
+            success = True
+            for step in steps:
+                element = _find_in_cmd_elements(cmd_elements, step.path)
+                success &= _apply_update_step(instance, step, element, zone)
+            if not success:
+                failed.append(app_command)
+        return failed
+
+
+@lru_cache(maxsize=_REDUCED_PLAN_CACHE_SIZE)
+def _reduce_appcommand_plan(
+    plan: AppCommandUpdatePlan, update_attributes: FrozenSet[str]
+) -> AppCommandUpdatePlan:
+    """Return an AppCommand plan without the steps of the given attributes."""
+    zone_steps = {}
+    for zone, cmd_steps in plan.zone_steps.items():
+        reduced = []
+        for app_command, steps in cmd_steps:
+            steps = tuple(
+                step for step in steps if step.update_attribute not in update_attributes
+            )
+            if steps:
+                reduced.append((app_command, steps))
+        zone_steps[zone] = tuple(reduced)
+    cmds = tuple(app_command for app_command, _ in zone_steps[MAIN_ZONE])
+    return AppCommandUpdatePlan(cmds, zone_steps)
+
+
+@attr.s(auto_attribs=True, frozen=True, slots=True, eq=False)
+class StatusXmlUpdatePlan:
+    """
+    Compiled plan which updates attributes from status XML responses.
+
+    Plans are immutable and compared by identity.
+    """
+
+    steps: Tuple[UpdateStep, ...]
+
+    def without(self, update_attributes: FrozenSet[str]) -> "StatusXmlUpdatePlan":
+        """Return a plan without the steps which update the given attributes."""
+        if not update_attributes:
+            return self
+        return _reduce_status_xml_plan(self, update_attributes)
+
+    @staticmethod
+    def apply(
+        instance: Any, xml: ET.Element, zone: str, steps: Tuple[UpdateStep, ...]
+    ) -> Tuple[UpdateStep, ...]:
+        """
+        Update the attributes of an instance from a response.
+
+        Returns the steps whose attributes were not found.
+        """
+        return tuple(
+            step
+            for step in steps
+            if not _apply_update_step(instance, step, xml.find(step.path), zone)
+        )
+
+
+@lru_cache(maxsize=_REDUCED_PLAN_CACHE_SIZE)
+def _reduce_status_xml_plan(
+    plan: StatusXmlUpdatePlan, update_attributes: FrozenSet[str]
+) -> StatusXmlUpdatePlan:
+    """Return a status XML plan without the steps of the given attributes."""
+    return StatusXmlUpdatePlan(
+        tuple(
+            step
+            for step in plan.steps
+            if step.update_attribute not in update_attributes
+        )
+    )
+
+
+def compile_appcommand_update_plan(
+    update_attrs: Iterable[AppCommandCmd],
+) -> AppCommandUpdatePlan:
+    """Compile the AppCommands of an update to an update plan."""
+    cmds = tuple(update_attrs)
+    zone_steps = {
+        zone: tuple(
+            (
+                cmd,
+                tuple(
+                    UpdateStep(
+                        pattern.update_attribute, path, pattern.get_xml_attribute
+                    )
+                    for pattern, path in zip(
+                        cmd.response_pattern, get_appcommand_result_paths(cmd, zone)
+                    )
+                ),
+            )
+            for cmd in cmds
+        )
+        for zone in (MAIN_ZONE, ZONE2, ZONE3)
+    }
+    return AppCommandUpdatePlan(cmds, zone_steps)
+
+
+def compile_status_xml_update_plan(update_attrs: Dict[str, str]) -> StatusXmlUpdatePlan:
+    """Compile the attributes and XML tags of an update to an update plan."""
+    return StatusXmlUpdatePlan(
+        tuple(UpdateStep(name, tag) for name, tag in update_attrs.items())
+    )
 
 
 def get_zone_element(zone: str) -> str:
@@ -2920,6 +3322,46 @@ def set_api_timeout(
     return value
 
 
+def set_api_rate_limiter(
+    instance: DenonAVRFoundation, attribute: attr.Attribute, value: AdaptiveLimiter
+) -> AdaptiveLimiter:
+    """Share the rate limiter between the HTTP and telnet API too."""
+    # pylint: disable=protected-access
+    instance._device.api.httpx_async_client.rate_limiter = value
+    instance._device.telnet_api._rate_limiter = value
+    return value
+
+
+def set_api_circuit_breaker(
+    instance: DenonAVRFoundation, attribute: attr.Attribute, value: CircuitBreaker
+) -> CircuitBreaker:
+    """Share the circuit breaker between the HTTP and telnet API too."""
+    # pylint: disable=protected-access
+    instance._device.api.circuit_breaker = value
+    if instance._device.telnet_api._circuit_breaker is not value:
+        instance._device.telnet_api._circuit_breaker = value
+        instance._device.telnet_api._connect_breaker = value.spawn()
+    return value
+
+
+def set_api_hedge_reads(
+    instance: DenonAVRFoundation, attribute: attr.Attribute, value: bool
+) -> bool:
+    """Change hedging of status reads of the API too."""
+    # pylint: disable=protected-access
+    instance._device.api.hedge_reads = value
+    return value
+
+
+def set_telnet_first(
+    instance: DenonAVRFoundation, attribute: attr.Attribute, value: bool
+) -> bool:
+    """Change telnet first mode of the device too."""
+    # pylint: disable=protected-access
+    instance._device.telnet_first = value
+    return value
+
+
 def convert_string_int_bool(value: Union[str, bool]) -> Optional[bool]:
     """Convert an integer from string format to bool."""
     if value is None:
@@ -8,10 +8,14 @@ This module implements the handler for input functions of Denon AVR receivers.
 """
 
 import asyncio
+import hashlib
 import logging
+import xml.etree.ElementTree as ET
 from collections.abc import Hashable
-from copy import deepcopy
-from typing import Dict, List, Optional, Set, Tuple, get_args
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set, Tuple, get_args
+from urllib.parse import urlsplit
 
 import attr
 import httpx
@@ -20,7 +24,6 @@ from ftfy import fix_text
 from .appcommand import AppCommands
 from .const import (
     ALBUM_COVERS_URL,
-    APPCOMMAND_CMD_TEXT,
     AVR,
     AVR_X,
     AVR_X_2016,
@@ -56,11 +59,49 @@ from .exceptions import (
     AvrTimoutError,
     DenonAvrError,
 )
-from .foundation import DenonAVRFoundation
+from .foundation import (
+    DenonAVRFoundation,
+    ZoneSetupSnapshot,
+    compile_appcommand_update_plan,
+    compile_status_xml_update_plan,
+)
+from .rate_limiter import RequestPriority
+from .scheduler import AdaptiveInterval
 
 _LOGGER = logging.getLogger(__name__)
 
 _MEDIA_UPDATE_INTERVAL = 5
+_MEDIA_UPDATE_MAX_INTERVAL = 30
+_FIX_STRING_CACHE_SIZE = 512
+# Seconds without source rename or delete events before sources are updated
+_SOURCE_UPDATE_DEBOUNCE = 1.0
+
+# Update plans of the media status XMLs
+_NO_MEDIA_UPDATE_PLAN = compile_status_xml_update_plan({})
+_NETAUDIO_UPDATE_PLAN = compile_status_xml_update_plan(
+    {
+        "_title": "./szLine/value[2]",
+        "_artist": "./szLine/value[3]",
+        "_album": "./szLine/value[5]",
+        "_netaudio_state": "./szLine/value[1]",
+    }
+)
+_TUNER_UPDATE_PLAN = compile_status_xml_update_plan(
+    {
+        "_band": "./Band/value",
+        "_frequency": "./Frequency/value",
+    }
+)
+_HDTUNER_UPDATE_PLAN = compile_status_xml_update_plan(
+    {
+        "_artist": "./Artist/value",
+        "_album": "./Album/value",
+        "_title": "./Title/value",
+        "_band": "./Band/value",
+        "_frequency": "./Frequency/value",
+        "_station": "./StationNameSh/value",
+    }
+)
 
 
 def lower_string(value: Optional[str]) -> Optional[str]:
@@ -70,11 +111,34 @@ def lower_string(value: Optional[str]) -> Optional[str]:
     return str(value).lower()
 
 
+def cover_key(*parts: Optional[str]) -> str:
+    """Return a key of the cover of a track which is stable across processes."""
+    content = "\x1f".join(part or "" for part in parts)
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=8).hexdigest()
+
+
 def fix_string(value: Optional[str]) -> Optional[str]:
     """Fix errors in string like unescaped HTML and wrong utf-8 encoding."""
     if value is None:
         return value
-    return fix_text(str(value)).strip()
+    value = str(value)
+    # ftfy does not change printable ASCII without HTML entities
+    if value.isascii() and value.isprintable() and "&" not in value:
+        return value.strip()
+    return _fix_text(value)
+
+
+@lru_cache(maxsize=_FIX_STRING_CACHE_SIZE)
+def _fix_text(value: str) -> str:
+    """Fix a string with ftfy, media metadata is repeated on every update."""
+    return fix_text(value).strip()
+
+
+def freeze_mapping(value: Mapping[str, str]) -> Mapping[str, str]:
+    """Return a read-only view of a mapping which can be shared."""
+    if isinstance(value, MappingProxyType):
+        return value
+    return MappingProxyType(dict(value))
 
 
 def set_input_func(
@@ -92,10 +156,10 @@ def set_input_func(
         and value not in instance._input_func_map
     ):
         instance._additional_input_funcs.add(value)
-        instance._input_func_map[value] = value
-        instance._input_func_map_rev[value] = value
-        instance._netaudio_func_list.append(value)
-        instance._playing_func_list.append(value)
+        instance._input_func_map = {**instance._input_func_map, value: value}
+        instance._input_func_map_rev = {**instance._input_func_map_rev, value: value}
+        instance._netaudio_func_list = (*instance._netaudio_func_list, value)
+        instance._playing_func_list = (*instance._playing_func_list, value)
     try:
         input_func = instance._input_func_map_rev[value]
     except KeyError:
@@ -110,29 +174,42 @@ class DenonAVRInput(DenonAVRFoundation):
     """This class implements input functions of Denon AVR receiver."""
 
     _show_all_inputs: bool = attr.ib(converter=bool, default=False)
-    _input_func_map: Dict[str, str] = attr.ib(
+    # Source maps and lists are immutable, they are replaced when they change.
+    # Validation runs before conversion, lists are accepted as input.
+    _input_func_map: Mapping[str, str] = attr.ib(
+        converter=freeze_mapping,
         validator=attr.validators.deep_mapping(
             attr.validators.instance_of(str), attr.validators.instance_of(str)
         ),
         default=attr.Factory(dict),
     )
-    _input_func_map_rev: Dict[str, str] = attr.ib(
+    _input_func_map_rev: Mapping[str, str] = attr.ib(
+        converter=freeze_mapping,
         validator=attr.validators.deep_mapping(
             attr.validators.instance_of(str), attr.validators.instance_of(str)
         ),
         default=attr.Factory(dict),
     )
-    _netaudio_func_list: List[str] = attr.ib(
+    _netaudio_func_list: Tuple[str, ...] = attr.ib(
+        converter=tuple,
         validator=attr.validators.deep_iterable(
-            attr.validators.instance_of(str), attr.validators.instance_of(list)
+            attr.validators.instance_of(str),
+            attr.validators.instance_of((list, tuple)),
         ),
-        default=attr.Factory(list),
+        default=attr.Factory(tuple),
     )
-    _playing_func_list: List[str] = attr.ib(
+    _playing_func_list: Tuple[str, ...] = attr.ib(
+        converter=tuple,
         validator=attr.validators.deep_iterable(
-            attr.validators.instance_of(str), attr.validators.instance_of(list)
+            attr.validators.instance_of(str),
+            attr.validators.instance_of((list, tuple)),
         ),
-        default=attr.Factory(list),
+        default=attr.Factory(tuple),
+    )
+    # Sources and renames the source maps were built from
+    _input_funcs_fingerprint: Optional[Hashable] = attr.ib(default=None)
+    _deviceinfo_sources: Optional[Tuple[ET.Element, Dict[str, str]]] = attr.ib(
+        default=None
     )
     _favorite_func_list: List[str] = attr.ib(
         validator=attr.validators.deep_iterable(
@@ -147,6 +224,15 @@ class DenonAVRInput(DenonAVRFoundation):
         default=attr.Factory(set),
     )
     _media_update_handle: asyncio.TimerHandle = attr.ib(default=None)
+    _media_update_interval: AdaptiveInterval = attr.ib(
+        default=attr.Factory(
+            lambda: AdaptiveInterval(_MEDIA_UPDATE_INTERVAL, _MEDIA_UPDATE_MAX_INTERVAL)
+        ),
+        init=False,
+    )
+    _media_snapshot: Optional[Tuple[Optional[str], ...]] = attr.ib(
+        default=None, init=False
+    )
     _input_func_update_lock: asyncio.Lock = attr.ib(default=attr.Factory(asyncio.Lock))
 
     _state: Optional[str] = attr.ib(
@@ -189,6 +275,9 @@ class DenonAVRInput(DenonAVRFoundation):
         default=attr.Factory(set),
     )
     _callback_tasks: Set[asyncio.Task] = attr.ib(default=attr.Factory(set))
+    _source_update_handle: asyncio.TimerHandle = attr.ib(default=None)
+    _source_events: Dict[str, str] = attr.ib(default=attr.Factory(dict))
+    _source_events_hash: Optional[int] = attr.ib(default=None)
     _digital_codec: Optional[str] = attr.ib(
         converter=attr.converters.optional(DIGITAL_CODEC_MAP.get), default=None
     )
@@ -199,11 +288,24 @@ class DenonAVRInput(DenonAVRFoundation):
     # Update tags for attributes
     # AppCommand.xml interface
     appcommand_attrs = {AppCommands.GetAllZoneSource: None}
+    appcommand_update_plan = compile_appcommand_update_plan(appcommand_attrs)
     # Status.xml interface
     status_xml_attrs = {"_input_func": "./InputFuncSelect/value"}
+    status_xml_update_plan = compile_status_xml_update_plan(status_xml_attrs)
+    # Attributes which are kept up to date by telnet callbacks
+    telnet_attrs = frozenset({"_input_func"})
 
-    def setup(self) -> None:
+    def setup(self, zone_setup: Optional[ZoneSetupSnapshot] = None) -> None:
         """Ensure that the instance is initialized."""
+        if zone_setup is not None and not self._input_func_map:
+            # Sources of the previous setup are used until the first update
+            self._input_func_map = zone_setup.input_func_map
+            self._input_func_map_rev = {
+                value: key for key, value in zone_setup.input_func_map.items()
+            }
+            self._netaudio_func_list = zone_setup.netaudio_func_list
+            self._playing_func_list = zone_setup.playing_func_list
+
         # Add tags for a potential AppCommand.xml update
         # For update of input function list
         self._device.api.add_appcommand_update_tag(AppCommands.GetAllZoneSource)
@@ -229,8 +331,10 @@ class DenonAVRInput(DenonAVRFoundation):
         self._device.telnet_api.register_callback("TF", self._tuner_callback)
         self._device.telnet_api.register_callback("HD", self._hdtuner_callback)
         self._device.telnet_api.register_callback("DC", self._digital_codec_callback)
-        self._device.telnet_api.register_callback(
-            "SS", self._input_func_update_callback
+        # Source names (SSFUN) and deleted sources (SSSOD)
+        self._device.telnet_api.register_prefix_handlers(
+            "SS",
+            {"FUN": self._source_change_callback, "SOD": self._source_change_callback},
         )
 
     def _input_callback(self, zone: str, _event: str, parameter: str) -> None:
@@ -288,18 +392,42 @@ class DenonAVRInput(DenonAVRFoundation):
             self._media_update_handle.cancel()
             self._media_update_handle = None
 
+    def _next_media_update_delay(self) -> float:
+        """
+        Return the delay of the next media update.
+
+        Media updates start right away and are fast while media information
+        changes. They back off while it stays the same.
+        """
+        if self._media_update_handle is None:
+            self._media_update_interval.activity()
+            self._media_snapshot = None
+            return 0
+        snapshot = (
+            self._state,
+            self._title,
+            self._artist,
+            self._album,
+            self._band,
+            self._frequency,
+            self._station,
+        )
+        changed = snapshot != self._media_snapshot
+        self._media_snapshot = snapshot
+        return self._media_update_interval.next_interval(changed)
+
     def _schedule_netaudio_update(self) -> None:
         """Schedule a netaudio update task."""
         loop = asyncio.get_event_loop()
-        delay = _MEDIA_UPDATE_INTERVAL
-        if self._media_update_handle is None:
-            delay = 0
+        delay = self._next_media_update_delay()
         self._media_update_handle = loop.call_later(delay, self._update_netaudio)
 
     def _update_netaudio(self) -> None:
         """Update netaudio information."""
         if self._device.telnet_available:
-            self._device.telnet_api.send_commands("NSE", skip_confirmation=True)
+            self._device.telnet_api.send_commands(
+                "NSE", skip_confirmation=True, priority=RequestPriority.MEDIA
+            )
             self._schedule_netaudio_update()
         else:
             self._stop_media_update()
@@ -337,28 +465,29 @@ class DenonAVRInput(DenonAVRFoundation):
         self._frequency = None
         self._station = None
 
-        # Refresh cover with a hash for media URL when track is changing
+        # Refresh cover with a key for media URL when track is changing
         self._set_image_url(
             ALBUM_COVERS_URL.format(
                 host=self._device.api.host,
                 port=self._device.api.port,
-                hash=hash((self._title, self._artist, self._album)),
+                hash=cover_key(self._title, self._artist, self._album),
             )
         )
 
     def _schedule_tuner_update(self) -> None:
         """Schedule a tuner update task."""
         loop = asyncio.get_event_loop()
-        delay = _MEDIA_UPDATE_INTERVAL
-        if self._media_update_handle is None:
-            delay = 0
+        delay = self._next_media_update_delay()
         self._media_update_handle = loop.call_later(delay, self._update_tuner)
 
     def _update_tuner(self) -> None:
         """Update tuner information."""
         if self._device.telnet_available:
             self._device.telnet_api.send_commands(
-                "TFAN?", "TFANNAME?", skip_confirmation=True
+                "TFAN?",
+                "TFANNAME?",
+                skip_confirmation=True,
+                priority=RequestPriority.MEDIA,
             )
             self._schedule_tuner_update()
         else:
@@ -394,15 +523,15 @@ class DenonAVRInput(DenonAVRFoundation):
     def _schedule_hdtuner_update(self) -> None:
         """Schedule a HD tuner update task."""
         loop = asyncio.get_event_loop()
-        delay = _MEDIA_UPDATE_INTERVAL
-        if self._media_update_handle is None:
-            delay = 0
+        delay = self._next_media_update_delay()
         self._media_update_handle = loop.call_later(delay, self._update_hdtuner)
 
     def _update_hdtuner(self) -> None:
         """Update HD tuner information."""
         if self._device.telnet_available:
-            self._device.telnet_api.send_commands("HD?", skip_confirmation=True)
+            self._device.telnet_api.send_commands(
+                "HD?", skip_confirmation=True, priority=RequestPriority.MEDIA
+            )
             self._schedule_hdtuner_update()
         else:
             self._stop_media_update()
@@ -438,12 +567,30 @@ class DenonAVRInput(DenonAVRFoundation):
         if zone == self._device.zone:
             self._digital_codec = parameter
 
-    def _input_func_update_callback(
-        self, _zone: str, _event: str, _parameter: str
-    ) -> None:
-        """Handle input func update events."""
+    def _source_change_callback(self, parameter: str) -> None:
+        """Handle a source rename or delete event."""
+        self._source_events[parameter.split(" ", 1)[0]] = parameter
+        # Update the sources once after a burst of events
+        if self._source_update_handle is not None:
+            self._source_update_handle.cancel()
+        self._source_update_handle = asyncio.get_event_loop().call_later(
+            _SOURCE_UPDATE_DEBOUNCE, self._input_func_update_callback
+        )
+
+    def _input_func_update_callback(self) -> None:
+        """Update input functions if sources were renamed or deleted."""
+        self._source_update_handle = None
+        source_events_hash = hash(frozenset(self._source_events.items()))
+        if source_events_hash == self._source_events_hash:
+            _LOGGER.debug("Source names unchanged, skipping update")
+            return
         if self._input_func_update_lock.locked():
+            # Try again after the running update
+            self._source_update_handle = asyncio.get_event_loop().call_later(
+                _SOURCE_UPDATE_DEBOUNCE, self._input_func_update_callback
+            )
             return
+        self._source_events_hash = source_events_hash
         task = asyncio.create_task(self.async_update_inputfuncs())
         self._callback_tasks.add(task)
         task.add_done_callback(self._handle_inputfuncs_task_done)
@@ -456,8 +603,11 @@ class DenonAVRInput(DenonAVRFoundation):
         except asyncio.CancelledError:
             pass
         except DenonAvrError as err:
+            # Update again on the next source event
+            self._source_events_hash = None
             _LOGGER.warning("AVR error during input functions update: %s", err)
         except Exception as err:  # pylint: disable=broad-except
+            self._source_events_hash = None
             _LOGGER.exception("Unexpected error during input functions update: %s", err)
 
     def _set_image_url(self, image_url: str) -> None:
@@ -501,12 +651,16 @@ class DenonAVRInput(DenonAVRFoundation):
         try:
             # Deviceinfo.xml is static and can be cached for the whole time
             xml = await self._device.api.async_get_xml(
-                self._device.urls.deviceinfo, cache_id=id(self._device)
+                self._device.urls.deviceinfo, cache_id=id(self._device.api)
             )
         except AvrRequestError as err:
             _LOGGER.debug("Error when getting sources: %s", err)
             raise
 
+        # The cached response is only parsed once
+        if self._deviceinfo_sources is not None and self._deviceinfo_sources[0] is xml:
+            return dict(self._deviceinfo_sources[1])
+
         receiver_sources = {}
         # Source determination from XML
         favorites = xml.find(".//FavoriteStation")
@@ -533,7 +687,8 @@ class DenonAVRInput(DenonAVRFoundation):
                         xml_source.find("DefaultName").text
                     )
 
-        return receiver_sources
+        self._deviceinfo_sources = (xml, receiver_sources)
+        return dict(receiver_sources)
 
     async def async_get_changed_sources_appcommand(
         self, global_update: bool = False, cache_id: Optional[Hashable] = None
@@ -565,10 +720,23 @@ class DenonAVRInput(DenonAVRFoundation):
             _LOGGER.debug("Error when getting changed sources: %s", err)
             raise
 
-        for child in xml.findall(
-            f"./cmd[@{APPCOMMAND_CMD_TEXT}='{AppCommands.GetRenameSource.cmd_text}']"
-            "/functionrename/list"
-        ):
+        # Lookup of the cmd elements uses the index of the response
+        rename_lists = [
+            child
+            for cmd in self._device.api.find_appcommand_cmds(
+                xml, AppCommands.GetRenameSource
+            )
+            for child in cmd.iterfind("./functionrename/list")
+        ]
+        delete_lists = [
+            child
+            for cmd in self._device.api.find_appcommand_cmds(
+                xml, AppCommands.GetDeletedSource
+            )
+            for child in cmd.iterfind("./functiondelete/list")
+        ]
+
+        for child in rename_lists:
             try:
                 renamed_sources[child.find("name").text.strip()] = child.find(
                     "rename"
@@ -576,10 +744,7 @@ class DenonAVRInput(DenonAVRFoundation):
             except AttributeError:
                 continue
 
-        for child in xml.findall(
-            f"./cmd[@{APPCOMMAND_CMD_TEXT}='{AppCommands.GetDeletedSource.cmd_text}']"
-            "/functiondelete/list"
-        ):
+        for child in delete_lists:
             try:
                 deleted_sources[child.find("FuncName").text.strip()] = (
                     "DEL" if (child.find("use").text.strip() == "0") else None
@@ -734,6 +899,9 @@ class DenonAVRInput(DenonAVRFoundation):
                 deleted_sources,
             ) = await self.async_get_changed_sources_status_xml(cache_id=cache_id)
 
+        if self._sources_unchanged(receiver_sources, renamed_sources, deleted_sources):
+            return
+
         # Add new renamed_sources to receiver_sources
         for key, value in renamed_sources.items():
             if key not in receiver_sources:
@@ -784,6 +952,24 @@ class DenonAVRInput(DenonAVRFoundation):
         self._netaudio_func_list = netaudio_func_list
         self._playing_func_list = playing_func_list
 
+    def _sources_unchanged(
+        self,
+        receiver_sources: Dict[str, str],
+        renamed_sources: Dict[str, str],
+        deleted_sources: Dict[str, Optional[str]],
+    ) -> bool:
+        """Return True if the source maps were built from the same sources."""
+        fingerprint = (
+            tuple(receiver_sources.items()),
+            tuple(renamed_sources.items()),
+            tuple(deleted_sources.items()),
+            self._show_all_inputs,
+        )
+        if fingerprint == self._input_funcs_fingerprint:
+            return True
+        self._input_funcs_fingerprint = fingerprint
+        return False
+
     async def _async_update_inputfuncs_avr(
         self, cache_id: Optional[Hashable] = None
     ) -> None:
@@ -803,6 +989,9 @@ class DenonAVRInput(DenonAVRFoundation):
         for function in self._additional_input_funcs:
             receiver_sources[function] = function
 
+        if self._sources_unchanged(receiver_sources, {}, deleted_sources):
+            return
+
         # Remove all deleted sources
         if not self._show_all_inputs:
             for deleted_source in deleted_sources.items():
@@ -840,14 +1029,16 @@ class DenonAVRInput(DenonAVRFoundation):
 
         if self._device.use_avr_2016_update:
             await self.async_update_attrs_appcommand(
-                self.appcommand_attrs, global_update=global_update, cache_id=cache_id
+                self.appcommand_update_plan,
+                global_update=global_update,
+                cache_id=cache_id,
             )
         else:
             urls = [self._device.urls.status]
             if self._device.zone == MAIN_ZONE:
                 urls.append(self._device.urls.mainzone)
             await self.async_update_attrs_status_xml(
-                self.status_xml_attrs, urls, cache_id=cache_id
+                self.status_xml_update_plan, urls, cache_id=cache_id
             )
 
     async def async_update_media_state(self, cache_id: Optional[Hashable] = None):
@@ -870,26 +1061,18 @@ class DenonAVRInput(DenonAVRFoundation):
     ) -> None:
         """Update media data of device."""
         urls = []
-        status_xml_attrs = {}
+        update_plan = _NO_MEDIA_UPDATE_PLAN
 
         if self._input_func in self._netaudio_func_list:
             urls = [self._device.urls.netaudiostatus]
-            status_xml_attrs = {
-                "_title": "./szLine/value[2]",
-                "_artist": "./szLine/value[3]",
-                "_album": "./szLine/value[5]",
-                "_netaudio_state": "./szLine/value[1]",
-            }
+            update_plan = _NETAUDIO_UPDATE_PLAN
             self._band = None
             self._frequency = None
             self._station = None
             # Image URL and state are detected after update
         elif self._input_func in TUNER_SOURCES:
             urls = [self._device.urls.tunerstatus]
-            status_xml_attrs = {
-                "_band": "./Band/value",
-                "_frequency": "./Frequency/value",
-            }
+            update_plan = _TUNER_UPDATE_PLAN
             self._title = None
             self._artist = None
             self._album = None
@@ -902,14 +1085,7 @@ class DenonAVRInput(DenonAVRFoundation):
             self._state = STATE_PLAYING
         elif self._input_func in HDTUNER_SOURCES:
             urls = [self._device.urls.hdtunerstatus]
-            status_xml_attrs = {
-                "_artist": "./Artist/value",
-                "_album": "./Album/value",
-                "_title": "./Title/value",
-                "_band": "./Band/value",
-                "_frequency": "./Frequency/value",
-                "_station": "./StationNameSh /value",
-            }
+            update_plan = _HDTUNER_UPDATE_PLAN
             # No special cover, using a static one
             self._image_url = STATIC_ALBUM_URL.format(
                 host=self._device.api.host, port=self._device.api.port
@@ -917,16 +1093,14 @@ class DenonAVRInput(DenonAVRFoundation):
             # Assume Tuner is always PLAYING
             self._state = STATE_PLAYING
 
-        await self.async_update_attrs_status_xml(
-            status_xml_attrs, urls, cache_id=cache_id
-        )
+        await self.async_update_attrs_status_xml(update_plan, urls, cache_id=cache_id)
 
         if self._input_func in self._netaudio_func_list:
-            # Refresh cover with a hash for media URL when track is changing
+            # Refresh cover with a key for media URL when track is changing
             self._image_url = ALBUM_COVERS_URL.format(
                 host=self._device.api.host,
                 port=self._device.api.port,
-                hash=hash((self._title, self._artist, self._album)),
+                hash=cover_key(self._title, self._artist, self._album),
             )
 
         if self._netaudio_state.startswith(NETAUDIO_PLAYING):
@@ -950,14 +1124,13 @@ class DenonAVRInput(DenonAVRFoundation):
         """Test if image URL is accessible."""
         if self._image_available is None and self._image_url is not None:
             try:
-                res = await self._device.api.httpx_async_client.async_get(
+                await self._device.api.httpx_async_client.async_probe(
                     self._image_url,
                     self._device.api.host,
                     self._device.api.timeout,
                     self._device.api.read_timeout,
-                    record_latency=False,
+                    priority=RequestPriority.MEDIA,
                 )
-                res.raise_for_status()
             except (httpx.TimeoutException, AvrTimoutError):
                 # No result set image URL to None
                 self._image_url = None
@@ -980,6 +1153,35 @@ class DenonAVRInput(DenonAVRFoundation):
         elif not self._image_available:
             self._image_url = None
 
+    async def async_get_image(self) -> Optional[bytes]:
+        """
+        Return the image of current playing media when powered on.
+
+        Images are cached by their URL for a few minutes, so a cover is not
+        downloaded again for every request. Concurrent requests of the same
+        cover share one download.
+        """
+        image_url = self.image_url
+        if image_url is None:
+            return None
+        image_cache = self._device.api.image_cache
+        found, image = image_cache.get(image_url)
+        if found:
+            return image
+        url = urlsplit(image_url)
+        res = await self._device.api.async_get(
+            f"{url.path}?{url.query}" if url.query else url.path,
+            port=url.port,
+            cache_id=image_url,
+            record_latency=False,
+            priority=RequestPriority.MEDIA,
+        )
+        image = res.content
+        image_cache.put(
+            image_url, image, size=len(image), ttl=image_cache.ttl(image_url)
+        )
+        return image
+
     def _unset_media_state(self) -> None:
         """Unsets media state attributes."""
         self._title = None
@@ -1042,14 +1244,14 @@ class DenonAVRInput(DenonAVRFoundation):
         return sorted(self._input_func_map.keys())
 
     @property
-    def input_func_map(self) -> Dict[str, str]:
-        """Return a dict of available input sources with default names as values."""
-        return deepcopy(self._input_func_map)
+    def input_func_map(self) -> Mapping[str, str]:
+        """Return a read-only map of input sources with default names as values."""
+        return self._input_func_map
 
     @property
-    def input_func_map_reverse(self) -> Dict[str, str]:
-        """Return a dict of available input sources with default names as keys."""
-        return deepcopy(self._input_func_map_rev)
+    def input_func_map_reverse(self) -> Mapping[str, str]:
+        """Return a read-only map of input sources with default names as keys."""
+        return self._input_func_map_rev
 
     @property
     def image_url(self) -> Optional[str]:
@@ -1094,22 +1296,22 @@ class DenonAVRInput(DenonAVRFoundation):
         return self._station
 
     @property
-    def netaudio_func_list(self) -> List[str]:
-        """Return list of network audio devices.
+    def netaudio_func_list(self) -> Tuple[str, ...]:
+        """Return tuple of network audio devices.
 
         Those devices should react to play, pause, next and previous
         track commands.
         """
-        return deepcopy(self._netaudio_func_list)
+        return self._netaudio_func_list
 
     @property
-    def playing_func_list(self) -> List[str]:
-        """Return list of playing devices.
+    def playing_func_list(self) -> Tuple[str, ...]:
+        """Return tuple of playing devices.
 
         Those devices offer additional information about what they are playing
         (e.g. title, artist, album, band, frequency, station, image_url).
         """
-        return deepcopy(self._playing_func_list)
+        return self._playing_func_list
 
     ##########
     # Setter #
@@ -1238,6 +1440,7 @@ class DenonAVRInput(DenonAVRFoundation):
             await self._device.api.async_post(
                 self._device.urls.command_netaudio_post, data=body
             )
+            self._device.api.invalidate_cache()
 
     async def async_next_track(self) -> None:
         """Send next track command to receiver command."""
@@ -1251,6 +1454,7 @@ class DenonAVRInput(DenonAVRFoundation):
             await self._device.api.async_post(
                 self._device.urls.command_netaudio_post, data=body
             )
+            self._device.api.invalidate_cache()
 
 
 def input_factory(instance: DenonAVRFoundation) -> DenonAVRInput:
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Adaptive, protocol-agnostic per-destination rate limiter built on aiolimiter.
+Adaptive, protocol-agnostic per-destination rate limiter.
 
 Single-process only. Excludes fire-and-forget calls (skip_confirmation) from RTT stats.
 
@@ -12,11 +12,62 @@ Single-process only. Excludes fire-and-forget calls (skip_confirmation) from RTT
 from __future__ import annotations
 
 import asyncio
-import contextlib
+import heapq
+import itertools
 import time
-from typing import Dict, Optional
+from collections import deque
+from enum import IntEnum
+from typing import Deque, Dict, List, Optional, Tuple
 
-from aiolimiter import AsyncLimiter
+# Latency samples needed before timeouts are derived from them
+MIN_LATENCY_SAMPLES = 20
+LATENCY_WINDOW_SIZE = 128
+TIMEOUT_QUANTILE = 0.99
+TIMEOUT_FACTOR = 3.0
+MIN_TIMEOUT = 0.25
+# Idempotent reads are hedged once they are slower than this quantile
+HEDGE_QUANTILE = 0.95
+
+
+class RequestPriority(IntEnum):
+    """Priority classes of requests, lower values are admitted first."""
+
+    INTERACTIVE = 0
+    POLL = 1
+    MEDIA = 2
+    DISCOVERY = 3
+
+
+class PriorityStats:
+    """Track queue depth and wait times of one priority class."""
+
+    __slots__ = ("acquired", "queued", "max_queued", "total_wait", "max_wait")
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.acquired = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def enqueue(self) -> None:
+        """Record a request waiting for a token."""
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+
+    def record_wait(self, wait: float) -> None:
+        """Record the time a request waited for its token."""
+        self.acquired += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    @property
+    def mean_wait(self) -> float:
+        """Return the mean wait time in seconds, 0.0 if nothing was acquired."""
+        if self.acquired == 0:
+            return 0.0
+        return self.total_wait / self.acquired
 
 
 class EWMALatency:
@@ -43,6 +94,93 @@ class EWMALatency:
         return self._value or 0.0
 
 
+class LatencyWindow:
+    """Keep the most recent latencies of a destination for quantiles."""
+
+    def __init__(self, size: int = LATENCY_WINDOW_SIZE) -> None:
+        """Initialize an empty window of the given size."""
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._sorted: Optional[List[float]] = None
+
+    def __len__(self) -> int:
+        """Return the number of samples in the window."""
+        return len(self._samples)
+
+    def add(self, sample: float) -> None:
+        """Add a latency sample in seconds."""
+        self._samples.append(sample)
+        self._sorted = None
+
+    def quantile(self, q: float) -> float:
+        """Return the q-quantile of the samples, 0.0 if there are none."""
+        if not self._samples:
+            return 0.0
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        return self._sorted[min(len(self._sorted) - 1, int(q * len(self._sorted)))]
+
+
+def adaptive_timeout(
+    window: Optional[LatencyWindow],
+    default: float,
+    *,
+    minimum: float = MIN_TIMEOUT,
+    factor: float = TIMEOUT_FACTOR,
+    quantile: float = TIMEOUT_QUANTILE,
+) -> float:
+    """
+    Return a timeout derived from the latencies in a window.
+
+    The timeout is the quantile of the latencies times factor, clamped between
+    minimum and default. The default is used until enough samples are known.
+    """
+    if window is None or len(window) < MIN_LATENCY_SAMPLES:
+        return default
+    return min(default, max(minimum, window.quantile(quantile) * factor))
+
+
+class _KeyState:
+    """Token bucket state of one destination."""
+
+    __slots__ = (
+        "latency",
+        "interval",
+        "tolerance",
+        "tat",
+        "adjusted",
+        "waiters",
+        "handle",
+        "window",
+    )
+
+    def __init__(self, latency: EWMALatency, rate: float, now: float) -> None:
+        """Initialize the state with the given rate."""
+        self.latency = latency
+        self.interval = 0.0
+        self.tolerance = 0.0
+        # Theoretical arrival time of the next token
+        self.tat = now
+        self.adjusted = now
+        # Heap of requests waiting for a token by priority and arrival
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.handle: Optional[asyncio.TimerHandle] = None
+        self.window = LatencyWindow()
+        self.set_rate(rate)
+
+    def conforming(self, now: float) -> bool:
+        """Return True if a token is available now."""
+        return self.tat - self.tolerance <= now
+
+    def take(self, now: float) -> None:
+        """Take a token."""
+        self.tat = max(self.tat, now) + self.interval
+
+    def set_rate(self, rate: float) -> None:
+        """Set rate in requests per second with a burst of one second."""
+        self.interval = 1.0 / rate
+        self.tolerance = max(0.0, 1.0 - self.interval)
+
+
 class AdaptiveLimiter:
     """
     Adaptive token-bucket rate limiter per key.
@@ -52,13 +190,21 @@ class AdaptiveLimiter:
     - min_wait_ms: minimum wait time between requests in milliseconds (> 0)
     - max_wait_ms: maximum wait time between requests in milliseconds (>= min_wait_ms)
     - k: scaling constant used in target_rate = k / avg_rtt (> 0)
-    - adjust_interval: seconds between rate recalculations (> 0)
+    - adjust_interval: minimum seconds between rate recalculations (> 0)
     - alpha: EWMA smoothing factor in (0,1]
 
     Behavior:
-    - The limiter updates each destination's rate every adjust_interval seconds
-      based on the EWMA of observed latencies (excluding skip_confirmation calls).
-    - Burst protection is inherent in the token bucket model.
+    - Each destination's rate is recalculated lazily when a latency is
+      recorded, at most every adjust_interval seconds, based on the EWMA of
+      observed latencies (excluding skip_confirmation calls).
+    - Tokens are handed out by the generic cell rate algorithm, which is
+      equivalent to a token bucket holding one second of requests. This
+      needs no locks or background tasks.
+    - Requests which have to wait for a token are admitted by priority and
+      then by arrival. Queued background requests yield to interactive
+      requests arriving later. stats holds PriorityStats per priority class.
+    - The latest latencies of each destination are kept, timeout derives
+      timeouts from their distribution instead of static values.
     """
 
     def __init__(
@@ -95,12 +241,11 @@ class AdaptiveLimiter:
         self._k = float(k)
         self._adjust_interval = float(adjust_interval)
         self._alpha = float(alpha)
-        self._limiters: Dict[str, AsyncLimiter] = {}
-        self._latencies: Dict[str, EWMALatency] = {}
-        self._locks: Dict[str, asyncio.Lock] = {}
-        self._tasks: Dict[str, asyncio.Task] = {}
-        self._init_lock = asyncio.Lock()
-        self._shutdown_event = asyncio.Event()
+        self._states: Dict[str, _KeyState] = {}
+        self._sequence = itertools.count()
+        self.stats: Dict[RequestPriority, PriorityStats] = {
+            priority: PriorityStats() for priority in RequestPriority
+        }
 
     def _target_rate(self, avg_rtt: float) -> float:
         if avg_rtt <= 0:
@@ -108,44 +253,69 @@ class AdaptiveLimiter:
         target = self._k / avg_rtt
         return max(self._min_rate, min(self._max_rate, target))
 
-    async def _ensure_key(self, key: str) -> None:
-        # Fast path: key already exists
-        if key in self._limiters:
+    async def acquire(
+        self, destination: str, priority: RequestPriority = RequestPriority.POLL
+    ) -> None:
+        """Acquire a token for the given destination."""
+        now = time.monotonic()
+        state = self._states.get(destination)
+        if state is None:
+            state = _KeyState(EWMALatency(self._alpha), self._initial_rate, now)
+            self._states[destination] = state
+        stats = self.stats[priority]
+
+        # Fast path: token available and nobody waiting
+        if not state.waiters and state.conforming(now):
+            state.take(now)
+            stats.record_wait(0.0)
             return
 
-        # Slow path: need to initialize, use lock to prevent duplicate initialization
-        async with self._init_lock:
-            # Double-check after acquiring lock (another coroutine may have initialized)
-            if key not in self._limiters:
-                # Start limiter at configured initial rate
-                self._limiters[key] = AsyncLimiter(self._initial_rate, time_period=1)
-                self._latencies[key] = EWMALatency(self._alpha)
-                self._locks[key] = asyncio.Lock()
-                # Background adjuster
-                self._tasks[key] = asyncio.create_task(self._adjust_loop(key))
-
-    async def _adjust_loop(self, key: str) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(state.waiters, (priority, next(self._sequence), waiter))
+        stats.enqueue()
         try:
-            while not self._shutdown_event.is_set():
-                await asyncio.sleep(self._adjust_interval)
-                if self._shutdown_event.is_set():
-                    break
-                avg = self._latencies[key].value
-                new_rate = self._target_rate(avg)
-                # AsyncLimiter does not expose direct rate mutation;
-                # recreate it atomically under a lock to avoid races.
-                async with self._locks[key]:
-                    self._limiters[key] = AsyncLimiter(new_rate, time_period=1)
+            self._schedule(state, now)
+            await waiter
         except asyncio.CancelledError:
-            pass
+            # Cancelled after the token was handed out, do not lose it
+            if waiter.done() and not waiter.cancelled():
+                self._return_token(state)
+            raise
+        finally:
+            stats.queued -= 1
+        stats.record_wait(time.monotonic() - now)
 
-    async def acquire(self, destination: str) -> None:
-        """Acquire a token for the given destination."""
-        await self._ensure_key(destination)
-        # Acquire with current limiter. Use lock to avoid swap race.
-        async with self._locks[destination]:
-            limiter = self._limiters[destination]
-        await limiter.acquire()
+    @staticmethod
+    def _return_token(state: _KeyState) -> None:
+        """Pass an unused token to the next waiting request or give it back."""
+        while state.waiters:
+            waiter = heapq.heappop(state.waiters)[2]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        state.tat -= state.interval
+
+    def _schedule(self, state: _KeyState, now: float) -> None:
+        """Schedule handing out the next token to the waiting requests."""
+        # Drop cancelled requests
+        while state.waiters and state.waiters[0][2].done():
+            heapq.heappop(state.waiters)
+        if state.waiters and state.handle is None:
+            state.handle = asyncio.get_running_loop().call_later(
+                max(0.0, state.tat - state.tolerance - now), self._dispatch, state
+            )
+
+    def _dispatch(self, state: _KeyState) -> None:
+        """Hand out available tokens to the waiting requests by priority."""
+        state.handle = None
+        now = time.monotonic()
+        while state.waiters and state.conforming(now):
+            waiter = heapq.heappop(state.waiters)[2]
+            if waiter.done():
+                continue
+            state.take(now)
+            waiter.set_result(None)
+        self._schedule(state, now)
 
     def record_latency(self, destination: str, start: float) -> None:
         """
@@ -154,17 +324,32 @@ class AdaptiveLimiter:
         Safe to call even if key doesn't exist yet; if the key is not present,
         the call is silently ignored and no action is taken.
         """
-        seconds = time.monotonic() - start
+        now = time.monotonic()
         # Only record if destination already initialized
-        if latency_tracker := self._latencies.get(destination):
-            latency_tracker.update(seconds)
+        if (state := self._states.get(destination)) is None:
+            return
+        state.window.add(now - start)
+        avg = state.latency.update(now - start)
+        if now - state.adjusted >= self._adjust_interval:
+            state.adjusted = now
+            state.set_rate(self._target_rate(avg))
+
+    def latency(self, destination: str) -> float:
+        """Return the EWMA of the latency of a destination, 0.0 if unknown."""
+        if state := self._states.get(destination):
+            return state.latency.value
+        return 0.0
+
+    def timeout(self, destination: str, default: float, **kwargs: float) -> float:
+        """
+        Return a timeout derived from the latencies of a destination.
+
+        See adaptive_timeout for the keyword arguments.
+        """
+        state = self._states.get(destination)
+        return adaptive_timeout(
+            state.window if state is not None else None, default, **kwargs
+        )
 
     async def aclose(self) -> None:
-        """Clean up background tasks."""
-        # Cancel background tasks
-        self._shutdown_event.set()
-        for task in list(self._tasks.values()):
-            task.cancel()
-            with contextlib.suppress(asyncio.CancelledError):
-                await task
-        self._tasks.clear()
+        """Close the limiter, there are no background tasks to clean up."""
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptive update scheduling which polls fast after activity and backs off idle.
+
+Single-process only. Intervals are driven by the power state of a zone and by
+how often its state changes.
+
+:copyright: (c) 2025 by Henrik Widlund.
+:license: MIT, see LICENSE for more details.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Hashable
+from typing import Awaitable, Callable, List, Optional
+
+from .exceptions import DenonAvrError
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MIN_INTERVAL = 2.0
+DEFAULT_MAX_INTERVAL = 30.0
+DEFAULT_STANDBY_INTERVAL = 120.0
+DEFAULT_ACTIVE_PERIOD = 10.0
+
+
+class AdaptiveInterval:
+    """
+    Interval which is short after activity and grows while nothing changes.
+
+    Parameters:
+    - min_interval: interval in seconds after activity (> 0)
+    - max_interval: maximum interval in seconds while idle (>= min_interval)
+    - standby_interval: interval in seconds in standby, defaults to max_interval
+    - active_period: seconds min_interval is used after activity (>= 0)
+    - backoff: factor the interval grows with per idle cycle (>= 1)
+
+    Behavior:
+    - Activity resets the interval to min_interval for active_period seconds.
+    - Afterwards each unchanged cycle multiplies the interval by backoff up to
+      max_interval, in standby standby_interval is used instead.
+    """
+
+    def __init__(
+        self,
+        min_interval: float,
+        max_interval: float,
+        *,
+        standby_interval: Optional[float] = None,
+        active_period: float = DEFAULT_ACTIVE_PERIOD,
+        backoff: float = 2.0,
+    ) -> None:
+        """Initialize AdaptiveInterval with given parameters."""
+        if min_interval <= 0:
+            raise ValueError("min_interval must be > 0")
+        if min_interval > max_interval:
+            raise ValueError("min_interval must be <= max_interval")
+        if standby_interval is not None and standby_interval < min_interval:
+            raise ValueError("standby_interval must be >= min_interval")
+        if active_period < 0:
+            raise ValueError("active_period must be >= 0")
+        if backoff < 1:
+            raise ValueError("backoff must be >= 1")
+
+        self.min_interval = float(min_interval)
+        self.max_interval = float(max_interval)
+        self.standby_interval = float(
+            standby_interval if standby_interval is not None else max_interval
+        )
+        self.active_period = float(active_period)
+        self.backoff = float(backoff)
+        self._interval = self.min_interval
+        self._active_until = float("-inf")
+
+    @property
+    def active(self) -> bool:
+        """Return True if activity was observed within active_period."""
+        return time.monotonic() < self._active_until
+
+    def activity(self) -> None:
+        """Record activity which resets the interval."""
+        self._active_until = time.monotonic() + self.active_period
+        self._interval = self.min_interval
+
+    def next_interval(self, changed: bool = False, standby: bool = False) -> float:
+        """Return the interval until the next cycle."""
+        if changed:
+            self.activity()
+        if self.active:
+            return self.min_interval
+        if standby:
+            self._interval = self.max_interval
+            return self.standby_interval
+        interval = self._interval
+        self._interval = min(self._interval * self.backoff, self.max_interval)
+        return interval
+
+
+class PollScheduler:
+    """
+    Run updates in a background task with an adaptive interval.
+
+    Parameters:
+    - update: coroutine function which updates the state
+    - state: function returning a hashable snapshot of the observed state
+    - standby: function returning True while the receiver is in standby
+    - interval: adaptive interval used between the updates
+
+    Behavior:
+    - A changed state snapshot counts as activity of the interval.
+    - notify_activity triggers an update right away, e.g. after a command.
+    - Waiters of async_wait_for_update are released after the next update.
+    """
+
+    def __init__(
+        self,
+        update: Callable[[], Awaitable[None]],
+        state: Callable[[], Hashable],
+        standby: Callable[[], bool],
+        interval: Optional[AdaptiveInterval] = None,
+    ) -> None:
+        """Initialize PollScheduler with given parameters."""
+        self._update = update
+        self._state = state
+        self._standby = standby
+        self.interval = interval or AdaptiveInterval(
+            DEFAULT_MIN_INTERVAL,
+            DEFAULT_MAX_INTERVAL,
+            standby_interval=DEFAULT_STANDBY_INTERVAL,
+        )
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._waiters: List[asyncio.Future] = []
+        self._last_state: Optional[Hashable] = None
+
+    @property
+    def running(self) -> bool:
+        """Return True if the scheduler is running."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the update task."""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._async_run())
+
+    async def async_stop(self) -> None:
+        """Stop the update task and wait until it finished."""
+        task = self._task
+        self._task = None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        for waiter in self._waiters:
+            waiter.cancel()
+        self._waiters = []
+
+    def notify_activity(self) -> None:
+        """Record activity and run the next update right away."""
+        self.interval.activity()
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def async_wait_for_update(self) -> None:
+        """Wait until the next update finished."""
+        if not self.running:
+            raise RuntimeError("Scheduler is not running")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        await waiter
+
+    async def _async_run(self) -> None:
+        """Run updates until the task is cancelled."""
+        while True:
+            self._wakeup.clear()
+            # Waiters arriving during the update wait for the next one
+            waiters = self._waiters
+            self._waiters = []
+            try:
+                await self._update()
+            except asyncio.CancelledError:
+                for waiter in waiters:
+                    waiter.cancel()
+                raise
+            except DenonAvrError as err:
+                _LOGGER.debug("Scheduled update failed: %s", err)
+                _release_waiters(waiters, err)
+            except Exception as err:  # pylint: disable=broad-except
+                # Keep updating, the next update might succeed
+                _LOGGER.error("Unexpected exception in scheduled update", exc_info=err)
+                _release_waiters(waiters, err)
+            else:
+                _release_waiters(waiters)
+
+            state = self._state()
+            changed = self._last_state is not None and state != self._last_state
+            self._last_state = state
+            delay = self.interval.next_interval(changed, self._standby())
+            _LOGGER.debug("Next scheduled update in %.1f seconds", delay)
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+
+
+def _release_waiters(
+    waiters: List[asyncio.Future], err: Optional[Exception] = None
+) -> None:
+    """Release the waiters of an update."""
+    for waiter in waiters:
+        if waiter.done():
+            continue
+        if err is None:
+            waiter.set_result(None)
+        else:
+            waiter.set_exception(err)
@@ -11,10 +11,11 @@ import asyncio
 import logging
 from collections.abc import Hashable
 from copy import deepcopy
-from typing import Callable, Dict, List, Literal, Optional, get_args
+from typing import Dict, List, Literal, Optional, get_args
 
 import attr
 
+from .api import PrefixTable
 from .appcommand import AppCommands
 from .const import (
     ALL_ZONE_STEREO,
@@ -43,7 +44,13 @@ from .const import (
     MDAXs,
 )
 from .exceptions import AvrCommandError, AvrIncompleteResponseError, AvrProcessingError
-from .foundation import DenonAVRFoundation, convert_on_off_bool
+from .foundation import (
+    DenonAVRFoundation,
+    ZoneSetupSnapshot,
+    compile_appcommand_update_plan,
+    compile_status_xml_update_plan,
+    convert_on_off_bool,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -182,40 +189,51 @@ class DenonAVRSoundMode(DenonAVRFoundation):
     )
     _setup_lock: asyncio.Lock = attr.ib(default=attr.Factory(asyncio.Lock))
     _appcommand_active: bool = attr.ib(converter=bool, default=True, init=False)
-    _ps_handlers: Dict[str, Callable[[str], None]] = attr.ib(factory=dict, init=False)
+    _ps_handlers: PrefixTable = attr.ib(factory=PrefixTable, init=False)
 
     # Update tags for attributes
     # AppCommand.xml interface
     appcommand_attrs = {AppCommands.GetSurroundModeStatus: None}
+    appcommand_update_plan = compile_appcommand_update_plan(appcommand_attrs)
     # Status.xml interface
     status_xml_attrs_01 = {"_sound_mode_raw": "./selectSurround/value"}
     status_xml_attrs_02 = {"_sound_mode_raw": "./SurrMode/value"}
+    status_xml_update_plan_01 = compile_status_xml_update_plan(status_xml_attrs_01)
+    status_xml_update_plan_02 = compile_status_xml_update_plan(status_xml_attrs_02)
+    # Attributes which are kept up to date by telnet callbacks
+    telnet_attrs = frozenset({"_sound_mode_raw"})
 
     def __attrs_post_init__(self) -> None:
         """Initialize special attributes."""
-        self._ps_handlers: Dict[str, Callable[[str], None]] = {
-            "NEURAL": self._neural_x_callback,
-            "IMAX": self._imax_callback,
-            "CINEMA EQ.": self._cinema_eq_callback,
-            "CES": self._center_spread_callback,
-            "LOM": self._loudness_management_callback,
-            "DEH": self._dialog_enhancer_callback,
-            "AURO": self._auro_callback,
-            "DIC": self._dialog_control_callback,
-            "SPV": self._speaker_virtualizer_callback,
-            "SP:": self._effect_speaker_selection_callback,
-            "DRC": self._drc_callback,
-            "MDAX": self._mdax_callback,
-            "DACFIL": self._dac_filter_callback,
-        }
-
-    async def async_setup(self) -> None:
+        self._ps_handlers = PrefixTable(
+            {
+                "NEURAL": self._neural_x_callback,
+                "IMAX": self._imax_callback,
+                "CINEMA EQ.": self._cinema_eq_callback,
+                "CES": self._center_spread_callback,
+                "LOM": self._loudness_management_callback,
+                "DEH": self._dialog_enhancer_callback,
+                "AURO": self._auro_callback,
+                "DIC": self._dialog_control_callback,
+                "SPV": self._speaker_virtualizer_callback,
+                "SP:": self._effect_speaker_selection_callback,
+                "DRC": self._drc_callback,
+                "MDAX": self._mdax_callback,
+                "DACFIL": self._dac_filter_callback,
+            }
+        )
+
+    async def async_setup(self, zone_setup: Optional[ZoneSetupSnapshot] = None) -> None:
         """Ensure that the instance is initialized."""
         async with self._setup_lock:
             _LOGGER.debug("Starting sound mode setup")
 
-            # The first update determines if sound mode is supported
-            await self.async_update_sound_mode()
+            if zone_setup is not None and zone_setup.support_sound_mode is not None:
+                self._support_sound_mode = zone_setup.support_sound_mode
+                self._appcommand_active = zone_setup.sound_mode_appcommand_active
+            else:
+                # The first update determines if sound mode is supported
+                await self.async_update_sound_mode()
 
             if self._support_sound_mode and self._appcommand_active:
                 # Add tags for a potential AppCommand.xml update
@@ -223,7 +241,7 @@ class DenonAVRSoundMode(DenonAVRFoundation):
                     self._device.api.add_appcommand_update_tag(tag)
 
             self._device.telnet_api.register_callback("MS", self._soundmode_callback)
-            self._device.telnet_api.register_callback("PS", self._ps_callback)
+            self._device.telnet_api.register_prefix_handlers("PS", self._ps_handlers)
 
             self._is_setup = True
             _LOGGER.debug("Finished sound mode setup")
@@ -239,13 +257,6 @@ class DenonAVRSoundMode(DenonAVRFoundation):
 
         self._sound_mode_raw = parameter
 
-    def _ps_callback(self, _zone: str, _event: str, parameter: str) -> None:
-        """Handle a PS change event."""
-        for prefix, handler in self._ps_handlers.items():
-            if parameter.startswith(prefix):
-                handler(parameter)
-                return
-
     def _neural_x_callback(self, parameter: str) -> None:
         """Handle a Neural X:change event."""
         self._neural_x = parameter[7:]
@@ -376,7 +387,7 @@ class DenonAVRSoundMode(DenonAVRFoundation):
         if self._device.use_avr_2016_update and self._appcommand_active:
             try:
                 await self.async_update_attrs_appcommand(
-                    self.appcommand_attrs,
+                    self.appcommand_update_plan,
                     global_update=global_update,
                     cache_id=cache_id,
                 )
@@ -396,12 +407,12 @@ class DenonAVRSoundMode(DenonAVRFoundation):
         # There are two different options of sound mode tags
         try:
             await self.async_update_attrs_status_xml(
-                self.status_xml_attrs_01, urls, cache_id=cache_id
+                self.status_xml_update_plan_01, urls, cache_id=cache_id
             )
         except AvrProcessingError:
             try:
                 await self.async_update_attrs_status_xml(
-                    self.status_xml_attrs_02, urls, cache_id=cache_id
+                    self.status_xml_update_plan_02, urls, cache_id=cache_id
                 )
             except AvrProcessingError:
                 self._support_sound_mode = False
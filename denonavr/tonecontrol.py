@@ -9,7 +9,6 @@ This module implements the handler for state of Denon AVR receivers.
 
 import asyncio
 import logging
-import time
 from collections.abc import Hashable
 from typing import Optional
 
@@ -18,7 +17,12 @@ import attr
 from .appcommand import AppCommandCmdParam, AppCommands
 from .const import DENON_ATTR_SETATTR
 from .exceptions import AvrCommandError, AvrIncompleteResponseError, AvrProcessingError
-from .foundation import DenonAVRFoundation, convert_string_int_bool
+from .foundation import (
+    DenonAVRFoundation,
+    ZoneSetupSnapshot,
+    compile_appcommand_update_plan,
+    convert_string_int_bool,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -53,21 +57,41 @@ class DenonAVRToneControl(DenonAVRFoundation):
     # Update tags for attributes
     # AppCommand.xml interface
     appcommand_attrs = {AppCommands.GetToneControl: None}
+    appcommand_update_plan = compile_appcommand_update_plan(appcommand_attrs)
+    # Attributes which are kept up to date by telnet callbacks
+    telnet_attrs = frozenset(
+        {
+            "_tone_control_status",
+            "_tone_control_adjust",
+            "_bass",
+            "_bass_level",
+            "_treble",
+            "_treble_level",
+        }
+    )
+    # Prefixes of PS telnet events handled by this module
+    _ps_prefixes = ("TONE CTRL", "BAS", "TRE")
 
-    async def async_setup(self) -> None:
+    async def async_setup(self, zone_setup: Optional[ZoneSetupSnapshot] = None) -> None:
         """Ensure that the instance is initialized."""
         async with self._setup_lock:
             _LOGGER.debug("Starting tone control setup")
 
-            # The first update determines if tone control is supported
-            await self.async_update_tone_control()
+            if zone_setup is not None and zone_setup.support_tone_control is not None:
+                self._support_tone_control = zone_setup.support_tone_control
+            else:
+                # The first update determines if tone control is supported
+                await self.async_update_tone_control()
 
             # Add tags for a potential AppCommand.xml update
             if self.support_tone_control:
                 for tag in self.appcommand_attrs:
                     self._device.api.add_appcommand_update_tag(tag)
 
-            self._device.telnet_api.register_callback("PS", self._ps_callback)
+            for prefix in self._ps_prefixes:
+                self._device.telnet_api.register_callback(
+                    "PS", self._ps_callback, prefix=prefix, zone=self._device.zone
+                )
 
             self._is_setup = True
             _LOGGER.debug("Finished tone control setup")
@@ -129,7 +153,7 @@ class DenonAVRToneControl(DenonAVRFoundation):
 
         try:
             await self.async_update_attrs_appcommand(
-                self.appcommand_attrs,
+                self.appcommand_update_plan,
                 global_update=global_update,
                 cache_id=cache_id,
             )
@@ -152,9 +176,7 @@ class DenonAVRToneControl(DenonAVRFoundation):
                 set_command=AppCommandCmdParam(name=parameter_type, text=value),
             ),
         )
-        await self._device.api.async_post_appcommand(
-            self._device.urls.appcommand, cmd, cache_id=time.time()
-        )
+        await self._device.api.async_post_appcommand(self._device.urls.appcommand, cmd)
 
     ##############
     # Properties #
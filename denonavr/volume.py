@@ -9,10 +9,11 @@ This module implements the handler for volume of Denon AVR receivers.
 
 import logging
 from collections.abc import Hashable
-from typing import Callable, Dict, Optional, Union, get_args
+from typing import Dict, Optional, Union, get_args
 
 import attr
 
+from .api import PrefixTable
 from .appcommand import AppCommands
 from .const import (
     CHANNEL_MAP,
@@ -28,7 +29,12 @@ from .const import (
     Subwoofers,
 )
 from .exceptions import AvrCommandError, AvrProcessingError
-from .foundation import DenonAVRFoundation, convert_on_off_bool
+from .foundation import (
+    DenonAVRFoundation,
+    compile_appcommand_update_plan,
+    compile_status_xml_update_plan,
+    convert_on_off_bool,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -90,24 +96,30 @@ class DenonAVRVolume(DenonAVRFoundation):
     _bass_sync: Optional[int] = attr.ib(
         converter=attr.converters.optional(int), default=None
     )
-    _ps_handlers: Dict[str, Callable[[str], None]] = attr.ib(factory=dict, init=False)
+    _ps_handlers: PrefixTable = attr.ib(factory=PrefixTable, init=False)
     # Update tags for attributes
     # AppCommand.xml interface
     appcommand_attrs = {
         AppCommands.GetAllZoneVolume: None,
         AppCommands.GetAllZoneMuteStatus: None,
     }
+    appcommand_update_plan = compile_appcommand_update_plan(appcommand_attrs)
     # Status.xml interface
     status_xml_attrs = {"_volume": "./MasterVolume/value", "_muted": "./Mute/value"}
+    status_xml_update_plan = compile_status_xml_update_plan(status_xml_attrs)
+    # Attributes which are kept up to date by telnet callbacks
+    telnet_attrs = frozenset({"_volume", "_muted"})
 
     def __attrs_post_init__(self) -> None:
         """Initialize special attributes."""
-        self._ps_handlers: Dict[str, Callable[[str], None]] = {
-            "SWR": self._subwoofer_state_callback,
-            "SWL": self._subwoofer_levels_callback,
-            "LFE": self._lfe_callback,
-            "BSC": self._bass_sync_callback,
-        }
+        self._ps_handlers = PrefixTable(
+            {
+                "SWR": self._subwoofer_state_callback,
+                "SWL": self._subwoofer_levels_callback,
+                "LFE": self._lfe_callback,
+                "BSC": self._bass_sync_callback,
+            }
+        )
 
     def setup(self) -> None:
         """Ensure that the instance is initialized."""
@@ -121,7 +133,7 @@ class DenonAVRVolume(DenonAVRFoundation):
         )
         self._device.telnet_api.register_callback("MU", self._mute_callback)
         self._device.telnet_api.register_callback("CV", self._channel_volume_callback)
-        self._device.telnet_api.register_callback("PS", self._ps_callback)
+        self._device.telnet_api.register_prefix_handlers("PS", self._ps_handlers)
 
         self._is_setup = True
 
@@ -199,13 +211,6 @@ class DenonAVRVolume(DenonAVRFoundation):
         elif level in CHANNEL_VOLUME_MAP:
             self._subwoofer_levels[subwoofer] = CHANNEL_VOLUME_MAP[level]
 
-    def _ps_callback(self, _zone: str, _event: str, parameter: str) -> None:
-        """Handle a PS change event."""
-        for prefix, handler in self._ps_handlers.items():
-            if parameter.startswith(prefix):
-                handler(parameter)
-                return
-
     def _lfe_callback(self, parameter: str) -> None:
         """Handle a LFE change event."""
         self._lfe = int(parameter[4:]) * -1
@@ -238,14 +243,16 @@ class DenonAVRVolume(DenonAVRFoundation):
 
         if self._device.use_avr_2016_update:
             await self.async_update_attrs_appcommand(
-                self.appcommand_attrs, global_update=global_update, cache_id=cache_id
+                self.appcommand_update_plan,
+                global_update=global_update,
+                cache_id=cache_id,
             )
         else:
             urls = [self._device.urls.status]
             if self._device.zone == MAIN_ZONE:
                 urls.append(self._device.urls.mainzone)
             await self.async_update_attrs_status_xml(
-                self.status_xml_attrs, urls, cache_id=cache_id
+                self.status_xml_update_plan, urls, cache_id=cache_id
             )
 
     ##############
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark of the handling of netaudio telnet events.
+
+Measures the CPU time the input module spends on NSE lines of the telnet
+connection, which carry the state, title, artist and album of the playing
+media. A rotating mix of plain, accented and mojibake metadata is handled
+while the receiver is playing from a netaudio source.
+
+Run it from the repository root:
+    python -m tests.benchmark_netaudio_callback [lines]
+"""
+
+import asyncio
+import sys
+import time
+
+import denonavr
+
+FAKE_IP = "10.0.0.0"
+SOURCE = "Online Music"
+DEFAULT_LINES = 50000
+NSE_LINES = (
+    "0Now Playing",
+    "1Bohemian Rhapsody",
+    "2Queen",
+    "4A Night at the Opera",
+    "1Crazy in Love",
+    "2Beyoncé",
+    "4Dangerously in Love",
+    "1Café del Mar",
+    "2CafÃ© del Mar",
+    "4Tom & Jerry",
+)
+
+
+async def async_benchmark(lines: int) -> float:
+    """Return the netaudio lines handled per second of CPU time."""
+    # pylint: disable=protected-access
+    receiver = denonavr.DenonAVR(FAKE_IP)
+    receiver._device._power = "ON"
+    receiver.input._netaudio_func_list = (SOURCE,)
+    receiver.input._input_func = SOURCE
+    # The cover is known to be accessible, do not probe it
+    receiver.input._image_available = True
+    callback = receiver.input._netaudio_callback
+
+    start = time.process_time()
+    for line in range(lines):
+        callback("Main", "NSE", NSE_LINES[line % len(NSE_LINES)])
+    elapsed = time.process_time() - start
+    return lines / elapsed
+
+
+def main() -> None:
+    """Run the benchmark and print the result."""
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LINES
+    per_second = asyncio.run(async_benchmark(lines))
+    print(f"{lines} NSE lines: {per_second:,.0f} lines/s of CPU time")
+
+
+if __name__ == "__main__":
+    main()
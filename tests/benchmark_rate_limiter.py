@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark of the acquire throughput of the adaptive rate limiter.
+
+Measures the calls per second of acquire followed by record_latency, round
+robin over 1, 10 and 500 destinations. The rate of the limiter is effectively
+unlimited, thus only the overhead per call is measured. The best of three runs
+is reported together with the number of tasks left running by the limiter.
+
+Run it from the repository root:
+    python -m tests.benchmark_rate_limiter [calls]
+"""
+
+import asyncio
+import sys
+import time
+from typing import Tuple
+
+from denonavr.rate_limiter import AdaptiveLimiter
+
+KEYS = (1, 10, 500)
+RUNS = 3
+DEFAULT_CALLS = 100000
+# Wait time between requests in milliseconds which never limits the calls
+UNLIMITED_WAIT_MS = 1e-6
+
+
+async def async_benchmark(keys: int, calls: int) -> Tuple[float, int]:
+    """Return the best calls per second and the tasks started by the limiter."""
+    destinations = [f"10.0.0.{index}" for index in range(keys)]
+    tasks = len(asyncio.all_tasks())
+    best = 0.0
+    for _ in range(RUNS):
+        limiter = AdaptiveLimiter(
+            initial_wait_ms=UNLIMITED_WAIT_MS,
+            min_wait_ms=UNLIMITED_WAIT_MS,
+            max_wait_ms=UNLIMITED_WAIT_MS,
+        )
+        start = time.perf_counter()
+        for call in range(calls):
+            destination = destinations[call % keys]
+            await limiter.acquire(destination)
+            limiter.record_latency(destination, start)
+        best = max(best, calls / (time.perf_counter() - start))
+    return best, len(asyncio.all_tasks()) - tasks
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CALLS
+    print(f"best of {RUNS} runs of {calls} calls")
+    print("keys    calls/s  tasks")
+    for keys in KEYS:
+        per_second, tasks = asyncio.run(async_benchmark(keys, calls))
+        print(f"{keys:4d}  {per_second:9,.0f}  {tasks:5d}")
+
+
+if __name__ == "__main__":
+    main()
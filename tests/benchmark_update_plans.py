@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark of the attribute updates from AppCommand.xml responses.
+
+Measures the CPU time per poll the volume, input, sound mode and tone control
+modules spend updating their attributes from a global AppCommand.xml response.
+The receiver is set up from the sample files of the tests and the response of
+the first poll is reused, thus only the attribute extraction is measured.
+
+Run it from the repository root:
+    python -m tests.benchmark_update_plans [polls]
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import PurePosixPath
+
+import httpx
+
+import denonavr
+
+RECEIVER = "AVR-X4300H"
+FAKE_IP = "10.0.0.0"
+DEFAULT_POLLS = 5000
+
+
+def _appcommand_suffix(content: str) -> str:
+    """Return the suffix of the sample file of an AppCommand.xml request."""
+    if "GetFriendlyName" in content:
+        return "-setup"
+    if "GetAllZoneSource" in content:
+        return "-update"
+    if "GetSurroundModeStatus" in content:
+        return "-update-soundmode"
+    if "GetRenameSource" in content:
+        return "-update-sources"
+    return "-update-tonecontrol"
+
+
+def _respond(request: httpx.Request) -> httpx.Response:
+    """Answer a request with the sample file of the receiver."""
+    name = PurePosixPath(request.url.path).stem
+    if name in ("description", "aios_device"):
+        filename = "AVR-X1600H_upnp.xml"
+    else:
+        if name == "AppCommand":
+            name += _appcommand_suffix(request.content.decode("utf-8"))
+        port_suffix = "-8080" if request.url.port == 8080 else ""
+        filename = f"{RECEIVER}-{name}{port_suffix}.xml"
+    try:
+        with open(f"tests/xml/{filename}", encoding="utf-8") as file:
+            return httpx.Response(200, text=file.read())
+    except FileNotFoundError:
+        return httpx.Response(403, text="Error 403: Forbidden\nAccess Forbidden")
+
+
+async def async_benchmark(polls: int) -> float:
+    """Return the CPU time per poll in microseconds."""
+    # pylint: disable=protected-access
+    receiver = denonavr.DenonAVR(FAKE_IP)
+    api = receiver._device.api
+    api.httpx_async_client._persistent_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(_respond)
+    )
+    await receiver.async_setup()
+    xml = await api.async_get_global_appcommand()
+
+    async def async_get_global_appcommand(*_args, **_kwargs):
+        return xml
+
+    api.async_get_global_appcommand = async_get_global_appcommand
+    updates = [
+        (receiver.vol, receiver.vol.appcommand_update_plan),
+        (receiver.input, receiver.input.appcommand_update_plan),
+        (receiver.soundmode, receiver.soundmode.appcommand_update_plan),
+        (receiver.tonecontrol, receiver.tonecontrol.appcommand_update_plan),
+    ]
+
+    start = time.process_time()
+    for _ in range(polls):
+        for module, plan in updates:
+            await module.async_update_attrs_appcommand(plan, global_update=True)
+    elapsed = time.process_time() - start
+    await api.httpx_async_client.aclose()
+    return elapsed / polls * 1e6
+
+
+def main() -> None:
+    """Run the benchmark and print the result."""
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_POLLS
+    per_poll = asyncio.run(async_benchmark(polls))
+    print(f"{polls} polls of {RECEIVER}: {per_poll:.1f} us CPU time per poll")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,39 @@ This module covers some basic automated tests for the api module.
 
 # pylint: disable=protected-access
 
+import asyncio
+import time
+import xml.etree.ElementTree as ET
+from unittest import mock
+
+import attr
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
 
 from denonavr.api import (
     _EVENTS_PRODUCING_DUPLICATES,
+    DenonAVRApi,
     DenonAVRTelnetApi,
+    HTTPXAsyncClient,
+    PrefixTable,
+    _async_parse_xml_stream,
+    _coalescing_family,
     _should_propagate_event,
 )
+from denonavr.appcommand import (
+    AppCommandCmd,
+    AppCommandCmdParam,
+    AppCommandResponsePattern,
+    AppCommands,
+)
+from denonavr.exceptions import AvrInvalidResponseError, AvrProcessingError
+from denonavr.foundation import (
+    create_appcommand_search_strings,
+    find_appcommand_results,
+)
+from denonavr.rate_limiter import RequestPriority
+from denonavr.scheduler import AdaptiveInterval
 
 
 def test_should_propagate_event_initial():
@@ -56,3 +83,573 @@ def test_duplicate_event_cache_propagation():
     assert not _should_propagate_event("EV", param2, api._potential_duplicate_events)
     api.clear_duplicate_event_cache()
     assert _should_propagate_event("EV", param1, api._potential_duplicate_events)
+
+
+def test_prefix_table_longest_match():
+    """Test that the longest registered prefix is matched."""
+    table = PrefixTable({"DEL": 1, "DELAY": 2, "RSZ": 3})
+    assert table.longest_match("DELAY 100") == ("DELAY", 2)
+    assert table.longest_match("DEL 100") == ("DEL", 1)
+    assert table.longest_match("DE") is None
+    assert table.longest_match("UNKNOWN") is None
+    del table["DELAY"]
+    assert table.longest_match("DELAY 100") == ("DEL", 1)
+
+
+def test_get_event_resolves_longest_event():
+    """Test that telnet events are resolved by their longest prefix."""
+    api = DenonAVRTelnetApi()
+    assert api._get_event("NSE1Title") == "NSE"
+    assert api._get_event("NSA1Title") == "NSA"
+    assert api._get_event("SSINFSIGRES I1080p") == "SS"
+    assert api._get_event("XX") == ""
+
+
+def test_prefix_callbacks_only_called_for_owned_prefix():
+    """Test that prefix callbacks are only called for their own prefix."""
+    api = DenonAVRTelnetApi()
+    delay = mock.Mock()
+    delay_time = mock.Mock()
+    event_callback = mock.Mock()
+    api.register_prefix_handlers(
+        "PS", {"DELAY": delay, "DEL": delay_time}, with_zone=True
+    )
+    api.register_callback("PS", event_callback)
+
+    api._process_event("PSDELAY 100")
+    delay.assert_called_once_with("Main", "DELAY 100")
+    delay_time.assert_not_called()
+    event_callback.assert_called_once_with("Main", "PS", "DELAY 100")
+
+    api._process_event("PSDEL 050")
+    delay_time.assert_called_once_with("Main", "DEL 050")
+    assert delay.call_count == 1
+
+    api._process_event("PSRSZ S")
+    assert delay.call_count == 1
+    assert delay_time.call_count == 1
+    assert event_callback.call_count == 3
+
+
+def test_prefix_callbacks_filtered_by_zone():
+    """Test that prefix callbacks registered for a zone only get its events."""
+    api = DenonAVRTelnetApi()
+    main_callback = mock.Mock()
+    zone2_callback = mock.Mock()
+    api.register_callback("PS", main_callback, prefix="BAS", zone="Main")
+    api.register_callback("PS", zone2_callback, prefix="BAS", zone="Zone2")
+
+    api._process_event("PSBAS 50")
+    main_callback.assert_called_once_with("Main", "PS", "BAS 50")
+    zone2_callback.assert_not_called()
+
+    api._process_event("Z2PSBAS 52")
+    zone2_callback.assert_called_once_with("Zone2", "PS", "BAS 52")
+    assert main_callback.call_count == 1
+
+    api.unregister_callback("PS", main_callback, prefix="BAS", zone="Main")
+    api._process_event("PSBAS 48")
+    assert main_callback.call_count == 1
+
+
+def _connected_telnet_api(**kwargs) -> DenonAVRTelnetApi:
+    """Return a telnet api with a mocked connected protocol."""
+    api = DenonAVRTelnetApi(**kwargs)
+    api._connection_enabled = True
+    api._protocol = mock.Mock(connected=True)
+    api._rate_limiter.acquire = mock.AsyncMock()
+    api._rate_limiter.record_latency = mock.Mock()
+    return api
+
+
+@pytest.mark.asyncio
+async def test_send_commands_pipelined():
+    """Test that commands are written before their confirmations arrive."""
+    api = _connected_telnet_api()
+
+    send_task = asyncio.create_task(api.async_send_commands("MVUP", "SI?", "MV?"))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    writes = [call.args[0] for call in api._protocol.write.call_args_list]
+    assert writes == ["MVUP\r", "SI?\r", "MV?\r"]
+    assert not send_task.done()
+
+    api._send_confirmation_callback("SITV")
+    api._send_confirmation_callback("MV50")
+    api._send_confirmation_callback("MV50")
+    await asyncio.wait_for(send_task, 1)
+
+    assert api._rate_limiter.record_latency.call_count == 3
+    assert not any(api._send_confirmations.values())
+
+
+@pytest.mark.asyncio
+async def test_send_command_timeout_does_not_consume_later_response():
+    """Test that a timed out command does not take a later confirmation."""
+    api = _connected_telnet_api()
+
+    await api.async_send_commands("MUON", confirmation_timeout=0.01)
+    send_task = asyncio.create_task(api.async_send_commands("MUOFF"))
+    await asyncio.sleep(0)
+    api._send_confirmation_callback("MUOFF")
+    await asyncio.wait_for(send_task, 1)
+
+    assert not any(api._send_confirmations.values())
+
+
+@pytest.mark.asyncio
+async def test_query_response_does_not_confirm_setter():
+    """Test that the response to a query does not confirm a pending setter."""
+    api = _connected_telnet_api()
+
+    set_task = asyncio.create_task(api.async_send_commands("MV50"))
+    await asyncio.sleep(0)
+    query_task = asyncio.create_task(api.async_query_commands("MV?"))
+    for _ in range(3):
+        await asyncio.sleep(0)
+    writes = [call.args[0] for call in api._protocol.write.call_args_list]
+    assert writes == ["MV50\r", "MV?\r"]
+
+    # The receiver answers the query before it applied the new volume
+    api._send_confirmation_callback("MV45")
+    await asyncio.wait_for(query_task, 1)
+    assert not set_task.done()
+
+    api._send_confirmation_callback("MV50")
+    await asyncio.wait_for(set_task, 1)
+    assert not any(api._send_confirmations.values())
+
+
+def test_coalescing_family():
+    """Test that only absolute value setters are coalesced."""
+    assert _coalescing_family("MV50") == "MV"
+    assert _coalescing_family("Z245") == "Z2"
+    assert _coalescing_family("CVFL 52") == "CVFL "
+    assert _coalescing_family("PSBAS 50") == "PSBAS "
+    assert _coalescing_family("PSLFE 05") == "PSLFE "
+    assert _coalescing_family("SSTTRLEV 05") == "SSTTRLEV "
+    assert _coalescing_family("MVUP") is None
+    assert _coalescing_family("Z2ON") is None
+    assert _coalescing_family("PSLFE UP") is None
+    assert _coalescing_family("MV?") is None
+
+
+@pytest.mark.asyncio
+async def test_send_commands_coalesces_queued_setters():
+    """Test that queued setters are replaced by newer commands of their family.
+
+    Other commands of the family close the queued family, they keep their
+    order to the setters.
+    """
+    api = _connected_telnet_api()
+
+    async with api._send_lock:
+        send_tasks = [
+            asyncio.create_task(api.async_send_commands(command))
+            for command in ("MV50", "MV51", "MVUP", "MV52")
+        ]
+        await asyncio.sleep(0)
+
+    for _ in range(3):
+        await asyncio.sleep(0)
+    writes = [call.args[0] for call in api._protocol.write.call_args_list]
+    assert writes == ["MV51\r", "MVUP\r", "MV52\r"]
+    assert not any(task.done() for task in send_tasks)
+
+    api._send_confirmation_callback("MV51")
+    api._send_confirmation_callback("MV52")
+    api._send_confirmation_callback("MV52")
+    await asyncio.wait_for(asyncio.gather(*send_tasks), 1)
+
+    assert api._rate_limiter.acquire.await_count == 3
+    assert not api._queued_commands
+
+
+@pytest.mark.asyncio
+async def test_unrelated_commands_keep_queued_family_open():
+    """Test that commands of other families do not close a queued family."""
+    api = _connected_telnet_api()
+
+    async with api._send_lock:
+        send_tasks = [
+            asyncio.create_task(api.async_send_commands(command))
+            for command in ("MV50", "SI?", "PWON", "MV51")
+        ]
+        await asyncio.sleep(0)
+        assert api._queued_commands["MV"].command == "MV51"
+
+    for _ in range(3):
+        await asyncio.sleep(0)
+    writes = [call.args[0] for call in api._protocol.write.call_args_list]
+    assert sorted(writes) == ["MV51\r", "PWON\r", "SI?\r"]
+
+    api._send_confirmation_callback("SICD")
+    api._send_confirmation_callback("PWON")
+    api._send_confirmation_callback("MV51")
+    await asyncio.wait_for(asyncio.gather(*send_tasks), 1)
+    assert api._rate_limiter.acquire.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_only_state_changing_commands_notify_activity():
+    """Test that queries and media refreshes do not reset the poll interval."""
+    # pylint: disable=protected-access
+    api = _connected_telnet_api()
+    api._async_send_pipelined = mock.AsyncMock()
+    interval = AdaptiveInterval(2.0, 30.0, active_period=10.0)
+    api.register_state_change_callback(interval.activity)
+
+    with mock.patch("denonavr.scheduler.time.monotonic", return_value=100.0):
+        await api.async_send_commands(
+            "NSE", skip_confirmation=True, priority=RequestPriority.MEDIA
+        )
+        await api.async_send_commands(
+            "TFAN?", "TFANNAME?", priority=RequestPriority.MEDIA
+        )
+        await api.async_send_commands("MV?")
+        assert not interval.active
+
+        await api.async_send_commands("MV50")
+        assert interval.active
+
+
+@pytest.mark.asyncio
+async def test_query_commands_paced_by_responses():
+    """Test that queries are sent as soon as a response frees the window."""
+    api = _connected_telnet_api()
+
+    query_task = asyncio.create_task(
+        api.async_query_commands("ZM?", "MV?", "SI?", window=2)
+    )
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    writes = [call.args[0] for call in api._protocol.write.call_args_list]
+    assert writes == ["ZM?\r", "MV?\r"]
+
+    api._send_confirmation_callback("ZMON")
+    for _ in range(5):
+        await asyncio.sleep(0)
+    writes = [call.args[0] for call in api._protocol.write.call_args_list]
+    assert writes == ["ZM?\r", "MV?\r", "SI?\r"]
+
+    api._send_confirmation_callback("MV50")
+    api._send_confirmation_callback("SITV")
+    await asyncio.wait_for(query_task, 1)
+    assert not any(api._send_confirmations.values())
+
+
+@pytest.mark.asyncio
+async def test_wait_synced_after_trigger_updates():
+    """Test that waiting for the sync completes after all queries are sent."""
+    api = _connected_telnet_api()
+    api.async_query_commands = mock.AsyncMock()
+
+    wait_task = asyncio.create_task(api.async_wait_synced())
+    await asyncio.sleep(0)
+    assert not wait_task.done()
+
+    await api._async_trigger_updates()
+    await asyncio.wait_for(wait_task, 1)
+    assert api.async_query_commands.await_args.args[:4] == ("ZM?", "SI?", "MV?", "MU?")
+
+    # Waiters are released even if the queries failed
+    api._synced.clear()
+    wait_task = asyncio.create_task(api.async_wait_synced())
+    api.async_query_commands.side_effect = AvrProcessingError("Disconnected")
+    with pytest.raises(AvrProcessingError):
+        await api._async_trigger_updates()
+    await asyncio.wait_for(wait_task, 1)
+
+
+@pytest.mark.asyncio
+async def test_failed_query_does_not_abort_others():
+    """Test that one failed query command does not stop the other queries."""
+    api = _connected_telnet_api()
+    write = api._async_write_command
+
+    async def _write_command(command, family, **kwargs):
+        if command == "MV?":
+            raise AvrProcessingError("Error sending command MV?")
+        return await write(command, family, **kwargs)
+
+    api._async_write_command = _write_command
+    query_task = asyncio.create_task(
+        api.async_query_commands("ZM?", "MV?", "SI?", window=1)
+    )
+    for _ in range(5):
+        await asyncio.sleep(0)
+    api._send_confirmation_callback("ZMON")
+    for _ in range(5):
+        await asyncio.sleep(0)
+    api._send_confirmation_callback("SITV")
+    await asyncio.wait_for(query_task, 1)
+
+    writes = [call.args[0] for call in api._protocol.write.call_args_list]
+    assert writes == ["ZM?\r", "SI?\r"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.httpx_mock(can_send_already_matched_responses=True)
+async def test_concurrent_identical_requests_are_coalesced(httpx_mock: HTTPXMock):
+    """Test that concurrent identical requests share one HTTP request."""
+    httpx_mock.add_response(url="http://host/a", text="a")
+    httpx_mock.add_response(url="http://host/b", text="b")
+    client = HTTPXAsyncClient()
+
+    async def _acquire(_key, _priority):
+        # Let the other requests start while the first one is in flight
+        await asyncio.sleep(0)
+
+    client.rate_limiter.acquire = _acquire
+
+    responses = await asyncio.gather(
+        client.async_get("http://host/a", "host", 2, 2, cache_id=1),
+        # Timeouts follow the latencies, they do not change the request
+        client.async_get("http://host/a", "host", 1.5, 0.5, cache_id=1),
+        client.async_get("http://host/b", "host", 2, 2),
+        client.async_get("http://host/b", "host", 2, 2),
+    )
+
+    assert [res.text for res in responses] == ["a", "a", "b", "b"]
+    # Only requests with a cache_id are idempotent
+    assert len(httpx_mock.get_requests()) == 3
+    assert client.stats["requests"] == 3
+    assert client.stats["coalesced"] == 1
+    assert not client._in_flight
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.httpx_mock(can_send_already_matched_responses=True)
+async def test_concurrent_identical_commands_are_sent(httpx_mock: HTTPXMock):
+    """Test that concurrent identical commands are all sent."""
+    httpx_mock.add_response(
+        url="http://host:80/goform/formiPhoneAppDirect.xml?MVUP", text=""
+    )
+    api = DenonAVRApi(host="host")
+
+    async def _acquire(_key, _priority):
+        await asyncio.sleep(0)
+
+    api.httpx_async_client.rate_limiter.acquire = _acquire
+
+    await asyncio.gather(
+        api.async_get_command("/goform/formiPhoneAppDirect.xml?MVUP"),
+        api.async_get_command("/goform/formiPhoneAppDirect.xml?MVUP"),
+    )
+    assert len(httpx_mock.get_requests()) == 2
+    assert api.httpx_async_client.stats["coalesced"] == 0
+    await api.httpx_async_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cached_requests_invalidated_by_commands(httpx_mock: HTTPXMock):
+    """Test that cached responses are reused until a command is sent."""
+    httpx_mock.add_response(url="http://host:80/goform/status.xml", text="1")
+    httpx_mock.add_response(url="http://host:80/goform/command?MV50", text="")
+    httpx_mock.add_response(url="http://host:80/goform/status.xml", text="2")
+    api = DenonAVRApi(host="host")
+    api.httpx_async_client.rate_limiter.acquire = mock.AsyncMock()
+
+    assert (await api.async_get("/goform/status.xml", cache_id=1)).text == "1"
+    assert (
+        await api.async_get("/goform/status.xml", cache_id=1, read_timeout=0.5)
+    ).text == "1"
+    await api.async_get_command("/goform/command?MV50")
+    assert (await api.async_get("/goform/status.xml", cache_id=1)).text == "2"
+
+    stats = api.httpx_async_client.stats
+    assert stats["cache_hits"] == 1
+    assert stats["cache_misses"] == 2
+    await api.httpx_async_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_parse_xml_stream_stops_early():
+    """Test that XML streams are parsed in chunks and stop after the stop tags."""
+    document = (
+        b"<item><Power><value>ON</value></Power><Mute><value>off</value></Mute>"
+        b"<MasterVolume><value>-40.0</value></MasterVolume></item>"
+    )
+    read_chunks = []
+
+    async def _chunks():
+        for i in range(0, len(document), 7):
+            read_chunks.append(i)
+            yield document[i : i + 7]
+
+    xml = await _async_parse_xml_stream(_chunks())
+    assert xml.find("./MasterVolume/value").text == "-40.0"
+    assert len(read_chunks) == 18
+
+    read_chunks.clear()
+    xml = await _async_parse_xml_stream(_chunks(), (("ZonePower", "Power"),))
+    assert xml.find("./Power/value").text == "ON"
+    assert xml.find("./MasterVolume") is None
+    assert len(read_chunks) == 6
+
+
+@pytest.mark.asyncio
+@pytest.mark.httpx_mock(can_send_already_matched_responses=True)
+async def test_cached_xml_keyed_by_stop_tags(httpx_mock: HTTPXMock):
+    """Test that partly parsed XML responses are cached by their stop tags."""
+    httpx_mock.add_response(
+        text=(
+            "<item><Power><value>ON</value></Power>"
+            "<MasterVolume><value>-40.0</value></MasterVolume></item>"
+        )
+    )
+    api = DenonAVRApi(host="host")
+    power = (("ZonePower", "Power"),)
+
+    for _ in range(2):
+        xml = await api.async_get_xml("/goform/status.xml", stop_tags=power, cache_id=1)
+        assert xml.find("./Power/value").text == "ON"
+    assert len(httpx_mock.get_requests()) == 1
+
+    # A partly parsed response is not used for a complete read
+    xml = await api.async_get_xml("/goform/status.xml", cache_id=1)
+    assert xml.find("./MasterVolume/value").text == "-40.0"
+    assert len(httpx_mock.get_requests()) == 2
+    await api.httpx_async_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_partly_parsed_xml_response_is_read(httpx_mock: HTTPXMock):
+    """Test that the rest of a partly parsed response is read, not abandoned."""
+    read_chunks = []
+
+    class _Stream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            for chunk in (
+                b"<item><Power><value>ON</value></Power>",
+                b"<MasterVolume><value>-40.0</value></MasterVolume>",
+                b"</item>",
+            ):
+                read_chunks.append(chunk)
+                yield chunk
+
+    httpx_mock.add_response(stream=_Stream())
+    api = DenonAVRApi(host="host")
+
+    xml = await api.async_get_xml(
+        "/goform/status.xml", stop_tags=(("ZonePower", "Power"),)
+    )
+    assert xml.find("./MasterVolume") is None
+    assert len(read_chunks) == 3
+    await api.httpx_async_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_xml_rejects_entities(httpx_mock: HTTPXMock):
+    """Test that XML with entity declarations is rejected."""
+    httpx_mock.add_response(
+        url="http://host:80/goform/status.xml",
+        text='<!DOCTYPE item [<!ENTITY a "a">]><item>&a;</item>',
+    )
+    api = DenonAVRApi(host="host")
+
+    with pytest.raises(AvrInvalidResponseError):
+        await api.async_get_xml("/goform/status.xml")
+    await api.httpx_async_client.aclose()
+
+
+def test_find_appcommand_cmd_matches_xpath():
+    """Test that the indexed AppCommand lookup matches the XPath lookup."""
+    cmds = (
+        AppCommands.GetAllZoneVolume,
+        AppCommandCmd(cmd_id="3", name="GetSoundMode"),
+        AppCommands.GetAllZoneVolume,
+        AppCommands.GetToneControl,
+    )
+    xml = ET.fromstring(
+        "<rx><cmd><zone1><volume>-40.0</volume></zone1></cmd>"
+        "<cmd><surround>STEREO</surround></cmd>"
+        "<cmd><zone1><volume>-30.0</volume></zone1>"
+        "<zone2><volume>-20.0</volume></zone2></cmd>"
+        "<cmd><bassvalue>50</bassvalue><treblevalue>48</treblevalue></cmd></rx>"
+    )
+    xml = DenonAVRApi.add_query_tags_to_result("/goform/AppCommand.xml", cmds, xml)
+
+    found = 0
+    for cmd in (*cmds, AppCommandCmd(cmd_id="1"), AppCommands.GetECO):
+        for zone in ("Main", "Zone2"):
+            for search_string, result in zip(
+                create_appcommand_search_strings(cmd, zone),
+                find_appcommand_results(xml, cmd, zone),
+            ):
+                assert xml.find(search_string) is result
+                found += result is not None
+        assert DenonAVRApi.find_appcommand_cmds(xml, cmd) == xml.findall(
+            create_appcommand_search_strings(
+                attr.evolve(
+                    cmd,
+                    response_pattern=(AppCommandResponsePattern("x", False),),
+                ),
+                "Main",
+            )[0]
+        )
+    assert found > 0
+
+
+def test_appcommand_bodies_are_cached():
+    """Test that AppCommand bodies are reused until the update tags change."""
+    api = DenonAVRApi(host="host")
+    api.add_appcommand_update_tag(AppCommands.GetAllZoneVolume)
+    tags = api._appcommand_update_tags
+
+    body = api._get_appcommand_body(tags)
+    assert body == DenonAVRApi.prepare_appcommand_body(tags)
+    assert api._get_appcommand_body(tags) is body
+
+    api.add_appcommand_update_tag(AppCommands.GetAllZoneMuteStatus)
+    assert tags not in api._appcommand_bodies
+    assert api._get_appcommand_body(api._appcommand_update_tags) != body
+
+    setter = (
+        attr.evolve(
+            AppCommands.GetToneControl,
+            cmd_text="SetToneControl",
+            param_list=(AppCommandCmdParam(name="bassvalue", text="50"),),
+        ),
+    )
+    api._get_appcommand_body(setter)
+    assert setter not in api._appcommand_bodies
+
+
+@pytest.mark.asyncio
+@pytest.mark.httpx_mock(can_send_already_matched_responses=True)
+async def test_get_xml_hedged_read(httpx_mock: HTTPXMock):
+    """Test that slow XML reads are hedged and timeouts follow latencies."""
+    # pylint: disable=protected-access
+    url = "http://host:80/goform/status.xml"
+    calls = []
+
+    async def _respond(_request):
+        calls.append(None)
+        if len(calls) == 1:
+            # The first request is stuck and answered by the hedged request
+            await asyncio.sleep(10)
+        return httpx.Response(200, text="<item><Power>ON</Power></item>")
+
+    httpx_mock.add_callback(_respond)
+    api = DenonAVRApi(host="host", hedge_reads=True)
+    client = api.httpx_async_client
+    assert api._xml_read_timeout(url, 15.0) == 15.0
+    assert client.hedge_delay(url) is None
+
+    for _ in range(20):
+        client._record_read_latency(url, time.monotonic() - 0.01)
+    assert client.hedge_delay(url) == pytest.approx(0.01, abs=0.01)
+    # Read timeouts are not derived below the connect timeout
+    assert api._xml_read_timeout(url, 15.0) == 2.0
+
+    client.rate_limiter.acquire = mock.AsyncMock()
+    xml = await asyncio.wait_for(api.async_get_xml("/goform/status.xml"), 1.0)
+    assert xml.find("./Power").text == "ON"
+    assert len(calls) == 2
+    # Status reads skip the rate limiter, only the hedged request takes a token
+    client.rate_limiter.acquire.assert_awaited_once_with("host", RequestPriority.POLL)
+    assert client.stats["hedged"] == 1
+    assert client.stats["hedge_won"] == 1
+    await client.aclose()
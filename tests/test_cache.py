@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the response cache."""
+
+# pylint: disable=protected-access
+
+from unittest import mock
+
+from denonavr.cache import ResponseCache
+
+
+def test_ttl_policies():
+    """Test that static endpoints never expire."""
+    cache = ResponseCache(default_ttl=5.0)
+    assert cache.ttl("http://host:8080/goform/Deviceinfo.xml") is None
+    assert cache.ttl("http://host:8080/description.xml") is None
+    assert cache.ttl("http://host:8080/goform/AppCommand.xml") == 5.0
+
+
+def test_lru_eviction_by_size():
+    """Test that the least recently used entries are evicted by size."""
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", "A", size=4, ttl=None)
+    cache.put("b", "B", size=4, ttl=None)
+    assert cache.get("a") == (True, "A")
+
+    cache.put("c", "C", size=4, ttl=None)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, "A")
+    assert cache.size == 8
+
+    cache.put("d", "D", size=11, ttl=None)
+    assert cache.get("d") == (False, None)
+    assert cache.stats["cache_evictions"] == 1
+    assert cache.stats["cache_hits"] == 2
+    assert cache.stats["cache_misses"] == 2
+
+
+def test_expiry_and_invalidation():
+    """Test that entries expire and are invalidated unless static."""
+    cache = ResponseCache()
+    with mock.patch("denonavr.cache.time.monotonic", return_value=100.0):
+        cache.put("cycle", "C", size=1, ttl=5.0)
+        cache.put("static", "S", size=1, ttl=None)
+    with mock.patch("denonavr.cache.time.monotonic", return_value=106.0):
+        assert cache.get("cycle") == (False, None)
+        assert cache.get("static") == (True, "S")
+
+    cache.put("cycle", "C", size=1, ttl=5.0)
+    cache.invalidate()
+    assert cache.get("cycle") == (False, None)
+    assert cache.get("static") == (True, "S")
+    cache.invalidate(include_static=True)
+    assert len(cache) == 0
+    assert cache.size == 0
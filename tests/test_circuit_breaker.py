@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the circuit breaker of the receiver connections."""
+
+import asyncio
+from unittest import mock
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from denonavr.api import DenonAVRApi, DenonAVRTelnetApi
+from denonavr.circuit_breaker import CircuitBreaker, CircuitState
+from denonavr.exceptions import (
+    AvrCircuitOpenError,
+    AvrForbiddenError,
+    AvrNetworkError,
+    AvrTimoutError,
+)
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_states():
+    """Test that the circuit opens, fails fast and closes after a probe."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=5.0)
+    probe = mock.AsyncMock(side_effect=AvrTimoutError("Timeout", "probe"))
+
+    with mock.patch("denonavr.circuit_breaker.time.monotonic", return_value=100.0):
+        with pytest.raises(AvrNetworkError):
+            async with breaker.async_guard(probe):
+                raise AvrNetworkError("Error", "request")
+        # Any response of the receiver resets the failures
+        with pytest.raises(AvrForbiddenError):
+            async with breaker.async_guard(probe):
+                raise AvrForbiddenError("Forbidden", "request")
+        assert breaker.failures == 0
+
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state is CircuitState.OPEN
+        assert breaker.retry_after == 5.0
+        with pytest.raises(AvrCircuitOpenError):
+            await breaker.async_check(probe)
+        assert breaker.rejected == 1
+        probe.assert_not_awaited()
+
+    with mock.patch("denonavr.circuit_breaker.time.monotonic", return_value=105.0):
+        assert breaker.state is CircuitState.HALF_OPEN
+        # Concurrent requests share one probe
+        results = await asyncio.gather(
+            breaker.async_check(probe),
+            breaker.async_check(probe),
+            return_exceptions=True,
+        )
+        assert all(isinstance(err, AvrCircuitOpenError) for err in results)
+        probe.assert_awaited_once()
+        assert breaker.state is CircuitState.OPEN
+        assert breaker.retry_after == 10.0
+
+    probe.side_effect = None
+    with mock.patch("denonavr.circuit_breaker.time.monotonic", return_value=115.0):
+        await breaker.async_check(probe)
+        assert breaker.state is CircuitState.CLOSED
+        assert probe.await_count == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.httpx_mock(can_send_already_matched_responses=True)
+async def test_api_fails_fast_while_unreachable(httpx_mock: HTTPXMock):
+    """Test that requests fail fast while the receiver is unreachable."""
+    httpx_mock.add_exception(httpx.ConnectError("Unreachable"))
+    api = DenonAVRApi(host="host")
+
+    for _ in range(3):
+        with pytest.raises(AvrNetworkError):
+            await api.async_get_xml("/goform/status.xml")
+    assert api.circuit_breaker.state is CircuitState.OPEN
+
+    with pytest.raises(AvrCircuitOpenError):
+        await api.async_get_command("/goform/formiPhoneAppDirect.xml?MV50")
+    assert len(httpx_mock.get_requests()) == 3
+    await api.httpx_async_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_telnet_failures_do_not_open_http_circuit(httpx_mock: HTTPXMock):
+    """Test that telnet connection failures do not lock out HTTP requests."""
+    # pylint: disable=protected-access
+    httpx_mock.add_response(text="<item/>")
+    breaker = CircuitBreaker(failure_threshold=2)
+    api = DenonAVRApi(host="host", circuit_breaker=breaker)
+    telnet_api = DenonAVRTelnetApi(host="host", circuit_breaker=breaker)
+    unreachable = AvrNetworkError("Connection refused", "telnet connect")
+    telnet_api._async_create_connection = mock.AsyncMock(side_effect=unreachable)
+    telnet_api._async_probe = mock.AsyncMock(side_effect=unreachable)
+
+    with mock.patch("denonavr.circuit_breaker.time.monotonic", return_value=100.0):
+        for _ in range(2):
+            with pytest.raises(AvrNetworkError):
+                await telnet_api._async_establish_connection()
+        assert telnet_api._connect_breaker.state is CircuitState.OPEN
+
+    with mock.patch("denonavr.circuit_breaker.time.monotonic", return_value=105.0):
+        with pytest.raises(AvrCircuitOpenError):
+            await telnet_api._async_establish_connection()
+        assert telnet_api._connect_breaker.retry_after == 10.0
+
+        assert breaker.state is CircuitState.CLOSED
+        assert breaker.retry_after == 0.0
+        await api.async_get_xml("/goform/status.xml")
+    await api.httpx_async_client.aclose()
@@ -8,16 +8,24 @@ This module covers some basic automated tests of Denon AVR receivers.
 """
 
 import asyncio
+import xml.etree.ElementTree as ET
 from unittest import mock
 
 import httpx
 import pytest
+from ftfy import fix_text
 from pytest_httpx import HTTPXMock
 
 import denonavr
 from denonavr.api import DenonAVRTelnetApi, DenonAVRTelnetProtocol
 from denonavr.const import SOUND_MODE_MAPPING
-from denonavr.exceptions import AvrNetworkError, AvrTimoutError
+from denonavr.exceptions import (
+    AvrCircuitOpenError,
+    AvrNetworkError,
+    AvrTimoutError,
+)
+from denonavr.input import cover_key, fix_string
+from denonavr.rate_limiter import AdaptiveLimiter
 
 FAKE_IP = "10.0.0.0"
 
@@ -132,6 +140,8 @@ class TestMainFunctions:
                     ep_suffix = "-update"
                 elif "GetSurroundModeStatus" in content_str:
                     ep_suffix = "-update-soundmode"
+                elif "GetRenameSource" in content_str:
+                    ep_suffix = "-update-sources"
                 else:
                     ep_suffix = "-update-tonecontrol"
                 content = get_sample_content(
@@ -191,6 +201,31 @@ class TestMainFunctions:
                 for input_func in zone.input_func_list:
                     await self.denon.zones[name].async_set_input_func(input_func)
 
+    @pytest.mark.asyncio
+    @pytest.mark.httpx_mock(can_send_already_matched_responses=True)
+    async def test_sources_rebuilt_on_changes(self, httpx_mock: HTTPXMock):
+        """Check that source maps are immutable and only rebuilt on changes."""
+        # pylint: disable=protected-access
+        httpx_mock.add_callback(self.custom_matcher)
+        self.testing_receiver = "AVR-X4300H"
+        self.denon = denonavr.DenonAVR(FAKE_IP)
+        await self.denon.async_update()
+        input_func_map = self.denon.input_func_map
+        netaudio_func_list = self.denon.netaudio_func_list
+        with pytest.raises(TypeError):
+            input_func_map["New"] = "NEW"
+
+        await self.denon.async_update()
+        assert self.denon.input_func_map is input_func_map
+        assert self.denon.netaudio_func_list is netaudio_func_list
+
+        # Sources discovered at run-time change the maps
+        self.denon.input._input_func = "AirPlay"
+        assert "AirPlay" in self.denon.input_func_map
+        assert "AirPlay" not in input_func_map
+        await self.denon.async_update()
+        assert "AirPlay" in self.denon.netaudio_func_list
+
     @pytest.mark.asyncio
     @pytest.mark.httpx_mock(can_send_already_matched_responses=True)
     async def test_attributes_not_none(self, httpx_mock: HTTPXMock):
@@ -234,6 +269,303 @@ class TestMainFunctions:
                     or support_sound_mode is not True
                 )
 
+    @pytest.mark.asyncio
+    @pytest.mark.httpx_mock(can_send_already_matched_responses=True)
+    async def test_setup_snapshot(self, httpx_mock: HTTPXMock):
+        """Check that a setup snapshot restores the setup without probing."""
+        # pylint: disable=protected-access
+        httpx_mock.add_callback(self.custom_matcher)
+        for receiver, spec in TESTING_RECEIVERS.items():
+            print(f"Receiver: {receiver}")
+            self.testing_receiver = receiver
+            self.denon = denonavr.DenonAVR(FAKE_IP, add_zones=spec[0])
+            await self.denon.async_update()
+            snapshot = self.denon.export_setup_snapshot()
+
+            httpx_mock.reset()
+            httpx_mock.add_callback(self.custom_matcher)
+            restored = denonavr.DenonAVR(
+                FAKE_IP, add_zones=spec[0], setup_snapshot=snapshot
+            )
+            await restored.async_setup()
+            assert not httpx_mock.get_requests()
+            assert restored.receiver_type == self.denon.receiver_type
+            assert restored.receiver_port == self.denon.receiver_port
+            assert restored.name == self.denon.name
+            assert restored.support_sound_mode == self.denon.support_sound_mode
+            assert restored.input_func_list == self.denon.input_func_list
+            assert restored.export_setup_snapshot() == snapshot
+
+            # The snapshot is revalidated in the background
+            await restored._revalidation_task
+            assert all(zone._is_setup for zone in restored.zones.values())
+
+            # A snapshot of another receiver of the same type is invalid
+            restored = denonavr.DenonAVR(
+                FAKE_IP,
+                add_zones=spec[0],
+                setup_snapshot={**snapshot, "serial_number": "other"},
+            )
+            await restored.async_setup()
+            await restored._revalidation_task
+            assert not any(zone._is_setup for zone in restored.zones.values())
+
+        # Stopping cancels the revalidation
+        restored = denonavr.DenonAVR(FAKE_IP, setup_snapshot=snapshot)
+        await restored.async_setup()
+        task = restored._revalidation_task
+        await restored.async_stop_polling()
+        assert task.cancelled()
+        assert restored._revalidation_task is None
+
+        # Invalid snapshots are ignored
+        self.denon = denonavr.DenonAVR(FAKE_IP, setup_snapshot={"version": 0})
+        assert self.denon._setup_snapshot is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.httpx_mock(can_send_already_matched_responses=True)
+    async def test_zones_share_update_cycle(self, httpx_mock: HTTPXMock):
+        """Check that zones updating in one cycle share the HTTP requests."""
+        for receiver in ("AVR-X4300H", "AVC-A10H"):
+            httpx_mock.reset()
+            httpx_mock.add_callback(self.custom_matcher)
+            self.testing_receiver = receiver
+            self.denon = denonavr.DenonAVR(FAKE_IP, add_zones=ZONE2_ZONE3)
+            for zone in self.denon.zones.values():
+                await zone.async_update()
+
+            httpx_mock.reset()
+            httpx_mock.add_callback(self.custom_matcher)
+            await self.denon.async_update()
+            requests_main_zone = len(httpx_mock.get_requests())
+            assert requests_main_zone > 0
+
+            httpx_mock.reset()
+            httpx_mock.add_callback(self.custom_matcher)
+            for zone in self.denon.zones.values():
+                await zone.async_update()
+            assert len(httpx_mock.get_requests()) == requests_main_zone
+            assert (
+                self.denon.zones["Zone2"].power is not None
+                and self.denon.zones["Zone3"].volume is not None
+            )
+
+    @pytest.mark.asyncio
+    @pytest.mark.httpx_mock(can_send_already_matched_responses=True)
+    async def test_telnet_first_update(self, httpx_mock: HTTPXMock):
+        """Check that attributes pushed by telnet are only polled as fallback."""
+        httpx_mock.add_callback(self.custom_matcher)
+        self.testing_receiver = "AVR-X4300H"
+        self.denon = denonavr.DenonAVR(FAKE_IP, telnet_first=True)
+        await self.denon.async_update()
+        assert self.denon.telnet_first
+        volume = self.denon.volume
+
+        telnet_state = mock.PropertyMock(return_value=True)
+        with mock.patch.multiple(
+            DenonAVRTelnetApi,
+            connected=telnet_state,
+            healthy=telnet_state,
+            synced=telnet_state,
+            async_query_commands=mock.AsyncMock(),
+        ):
+            httpx_mock.reset()
+            httpx_mock.add_callback(self.custom_matcher)
+            await self.denon.async_update()
+            bodies = [request.content for request in httpx_mock.get_requests()]
+            assert len(bodies) == 1
+            assert b"GetRenameSource" in bodies[0]
+            assert b"GetAllZoneVolume" not in bodies[0]
+            assert b"GetAllZonePowerStatus" not in bodies[0]
+            assert self.denon.volume == volume
+
+            # Fall back to polling everything if telnet is not healthy anymore
+            telnet_state.return_value = False
+            httpx_mock.reset()
+            httpx_mock.add_callback(self.custom_matcher)
+            await self.denon.async_update()
+            bodies = [request.content for request in httpx_mock.get_requests()]
+            assert any(b"GetAllZoneVolume" in body for body in bodies)
+
+    @pytest.mark.asyncio
+    @pytest.mark.httpx_mock(can_send_already_matched_responses=True)
+    async def test_album_art(self, httpx_mock: HTTPXMock):
+        """Check that album art is probed cheaply and fetched once per cover."""
+        # pylint: disable=protected-access
+        ranges = []
+
+        async def _respond(request: httpx.Request):
+            ranges.append(request.headers.get("Range"))
+            await asyncio.sleep(0)
+            return httpx.Response(200, content=b"JPEG")
+
+        httpx_mock.add_callback(_respond)
+        self.denon = denonavr.DenonAVR(FAKE_IP)
+        self.denon._device._power = "ON"
+        assert await self.denon.async_get_image() is None
+
+        # Cover URLs are stable for the same track
+        assert cover_key("Title", "Artist", "Album") == "57c57c884cabffdd"
+        self.denon.input._image_url = (
+            f"http://{FAKE_IP}/NetAudio/art.asp-jpg?{cover_key('Title')}"
+        )
+        await self.denon.input._async_test_image_accessible()
+        assert self.denon.image_url is not None
+        assert ranges == ["bytes=0-0"]
+
+        assert await self.denon.async_get_image() == b"JPEG"
+        assert await self.denon.async_get_image() == b"JPEG"
+        assert ranges == ["bytes=0-0", None]
+        assert self.denon._device.api.image_cache.size == 4
+
+        # Concurrent requests of the same cover share one download
+        self.denon._device.api.image_cache.invalidate(include_static=True)
+        self.denon._device.api.httpx_async_client.response_cache.invalidate()
+        images = await asyncio.gather(
+            self.denon.async_get_image(), self.denon.async_get_image()
+        )
+        assert images == [b"JPEG", b"JPEG"]
+        assert ranges == ["bytes=0-0", None, None]
+
+        # Cached covers expire
+        with mock.patch("denonavr.cache.time.monotonic", return_value=1e9):
+            assert await self.denon.async_get_image() == b"JPEG"
+        assert ranges == ["bytes=0-0", None, None, None]
+
+        # Covers are not fetched while the receiver is unreachable
+        self.denon._device.api.image_cache.invalidate(include_static=True)
+        for _ in range(self.denon.circuit_breaker.failure_threshold):
+            self.denon.circuit_breaker.record_failure()
+        with pytest.raises(AvrCircuitOpenError):
+            await self.denon.async_get_image()
+        assert len(ranges) == 4
+
+    @pytest.mark.asyncio
+    async def test_source_events_debounced(self):
+        """Check that sources are updated once per changed burst of events."""
+        # pylint: disable=protected-access
+        self.denon = denonavr.DenonAVR(FAKE_IP)
+        self.denon.input._register_input_callbacks()
+        telnet_api = self.denon._device.telnet_api
+        with (
+            mock.patch("denonavr.input._SOURCE_UPDATE_DEBOUNCE", 0.01),
+            mock.patch.object(
+                self.denon.input, "async_update_inputfuncs", mock.AsyncMock()
+            ) as update,
+        ):
+            telnet_api._process_event("SSINFSIGRES I1080p")
+            telnet_api._process_event("SSTTR ON")
+            await asyncio.sleep(0.05)
+            update.assert_not_awaited()
+
+            for _ in range(2):
+                telnet_api._process_event("SSFUNCD CD Player")
+                telnet_api._process_event("SSSODCD USE")
+                telnet_api._process_event("SSFUN END")
+                await asyncio.sleep(0.05)
+            # The repeated burst did not change any source
+            assert update.await_count == 1
+
+            telnet_api._process_event("SSFUNCD Turntable")
+            await asyncio.sleep(0.05)
+            assert update.await_count == 2
+
+    def test_fix_string(self):
+        """Check that metadata is repaired by ftfy only when needed."""
+        # pylint: disable=protected-access
+        denonavr.input._fix_text.cache_clear()
+        with mock.patch("denonavr.input.fix_text", wraps=fix_text) as ftfy:
+            assert fix_string(" Bohemian Rhapsody ") == "Bohemian Rhapsody"
+            assert fix_string(None) is None
+            ftfy.assert_not_called()
+
+            assert fix_string("Tom &amp; Jerry") == "Tom & Jerry"
+            assert fix_string("CafÃ© del Mar") == "Café del Mar"
+            assert fix_string("CafÃ© del Mar") == "Café del Mar"
+            assert ftfy.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_polling_after_commands(self):
+        """Check that commands trigger a background update right away."""
+        # pylint: disable=protected-access
+        self.denon = denonavr.DenonAVR(FAKE_IP)
+        with mock.patch.object(
+            self.denon._poll_scheduler, "_update", mock.AsyncMock()
+        ) as update:
+            self.denon.start_polling()
+            await asyncio.sleep(0)
+            assert self.denon.polling
+            assert update.await_count == 1
+
+            waiter = asyncio.create_task(self.denon.async_wait_for_update())
+            await asyncio.sleep(0)
+            self.denon._device.api.invalidate_cache()
+            await asyncio.wait_for(waiter, 1.0)
+            assert update.await_count == 2
+
+            # Commands sent by telnet trigger an update too
+            telnet_api = self.denon._device.telnet_api
+            telnet_api._async_send_pipelined = mock.AsyncMock()
+            waiter = asyncio.create_task(self.denon.async_wait_for_update())
+            await asyncio.sleep(0)
+            await self.denon.async_send_telnet_commands("MV50")
+            await asyncio.wait_for(waiter, 1.0)
+            assert update.await_count == 3
+
+            await self.denon.async_stop_polling()
+            assert not self.denon.polling
+            assert not self.denon._device.api._state_change_callbacks
+            assert not telnet_api._state_change_callbacks
+
+    def test_shared_rate_limiter(self):
+        """Check that HTTP and telnet of all zones share one request budget."""
+        # pylint: disable=protected-access
+        self.denon = denonavr.DenonAVR(FAKE_IP, add_zones=ZONE2)
+        limiter = self.denon.rate_limiter
+        assert self.denon._device.api.httpx_async_client.rate_limiter is limiter
+        assert self.denon._device.telnet_api._rate_limiter is limiter
+        assert self.denon.zones["Zone2"].rate_limiter is limiter
+
+        shared = AdaptiveLimiter()
+        for host in ("10.0.0.1", "10.0.0.2"):
+            denon = denonavr.DenonAVR(host, rate_limiter=shared)
+            assert denon._device.api.httpx_async_client.rate_limiter is shared
+            assert denon._device.telnet_api._rate_limiter is shared
+
+    @pytest.mark.asyncio
+    async def test_identify_receiver_probes_concurrently(self):
+        """Check that the ports are probed concurrently during identification."""
+        # pylint: disable=protected-access
+        self.testing_receiver = "AVR-X4300H"
+        self.denon = denonavr.DenonAVR(FAKE_IP)
+        started = []
+        all_started = asyncio.Event()
+
+        async def get_xml(request, *, port, read_timeout, cache_id):
+            started.append(port)
+            if len(started) == 2:
+                all_started.set()
+            await all_started.wait()
+            if port == 80:
+                raise AvrTimoutError("Timeout", request)
+            return ET.fromstring(
+                get_sample_content(f"{self.testing_receiver}-Deviceinfo-8080.xml")
+            )
+
+        with mock.patch.object(self.denon._device.api, "async_get_xml", get_xml):
+            await self.denon._device.async_identify_receiver()
+
+        assert sorted(started) == [80, 8080]
+        assert self.denon.receiver_type == denonavr.const.AVR_X_2016.type
+        assert self.denon.receiver_port == 8080
+
+        async def get_xml_error(request, *, port, read_timeout, cache_id):
+            raise AvrNetworkError("Error", request)
+
+        with mock.patch.object(self.denon._device.api, "async_get_xml", get_xml_error):
+            with pytest.raises(AvrNetworkError):
+                await self.denon._device.async_identify_receiver()
+
     @pytest.mark.asyncio
     async def test_protocol_connected(self):
         """Connected after connection made."""
@@ -303,6 +635,38 @@ class TestMainFunctions:
 
         data_received_mock.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_protocol_multiple_messages_trigger_callbacks(self):
+        """Read callback triggered for each message of one chunk in order."""
+        data_received_mock = mock.Mock()
+        proto = DenonAVRTelnetProtocol(data_received_mock, None)
+        transport = mock.Mock(is_closing=lambda: False)
+        proto.connection_made(transport)
+        proto.data_received(b"MUON\rMV50\rSI")
+        proto.data_received(b"TV\r")
+
+        assert data_received_mock.call_args_list == [
+            mock.call("MUON"),
+            mock.call("MV50"),
+            mock.call("SITV"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_protocol_oversized_message_is_dropped(self):
+        """Messages exceeding the maximum line size are dropped."""
+        data_received_mock = mock.Mock()
+        proto = DenonAVRTelnetProtocol(data_received_mock, None, max_line_size=8)
+        transport = mock.Mock(is_closing=lambda: False)
+        proto.connection_made(transport)
+        proto.data_received(b"NSE0" + b"X" * 20)
+        proto.data_received(b"Y" * 20 + b"\rMUON\r")
+        proto.data_received(b"NSE1" + b"Z" * 10 + b"\rMUOFF\r")
+
+        assert data_received_mock.call_args_list == [
+            mock.call("MUON"),
+            mock.call("MUOFF"),
+        ]
+
     @pytest.mark.asyncio
     async def test_protocol_connection_lost_triggers_callback(self):
         """Connection lost triggers callback."""
@@ -7,9 +7,21 @@ This module covers some basic automated tests of foundation.
 :license: MIT, see LICENSE for more details.
 """
 
+import attr
 import pytest
 
-from denonavr.foundation import AvrCommandError, channel_status_to_str
+from denonavr.audyssey import DenonAVRAudyssey
+from denonavr.foundation import (
+    AppCommandUpdatePlan,
+    AvrCommandError,
+    DenonAVRDeviceInfo,
+    StatusXmlUpdatePlan,
+    channel_status_to_str,
+)
+from denonavr.input import DenonAVRInput
+from denonavr.soundmode import DenonAVRSoundMode
+from denonavr.tonecontrol import DenonAVRToneControl
+from denonavr.volume import DenonAVRVolume
 from tests.test_helpers import DeviceTestFixture
 
 # pylint: disable=protected-access
@@ -365,7 +377,9 @@ class TestDenonAVRDeviceInfo:
         """Test that async_speaker_preset sends command if preset differs."""
         fixture = DeviceTestFixture(True)
         device = fixture.device_info
-        device._ss_callback("Main", "SSPST", "1")
+        device._register_callbacks()
+        fixture.telnet_api._process_event("SPPR 1")
+        assert device.speaker_preset == 1
         await fixture.async_execute(device.async_speaker_preset(2))
         fixture.assert_called_once()
 
@@ -374,7 +388,8 @@ class TestDenonAVRDeviceInfo:
         """Test that async_speaker_preset raises on invalid preset."""
         fixture = DeviceTestFixture(True)
         device = fixture.device_info
-        device._ss_callback("Main", "SSPST", "1")
+        device._register_callbacks()
+        fixture.telnet_api._process_event("SPPR 1")
         with pytest.raises(AvrCommandError):
             await device.async_speaker_preset(42)
 
@@ -705,3 +720,52 @@ class TestDenonAVRDeviceInfo:
 def test_channel_status_to_str(channel_status, expected):
     """Test channel_status_to_str function."""
     assert channel_status_to_str(channel_status) == expected
+
+
+def test_update_plans_target_existing_attributes():
+    """Test that compiled update plans only set attributes of their modules."""
+    device = DenonAVRDeviceInfo()
+    plans = [(device, device._appcommand_update_plan)]
+    for module_class in (
+        DenonAVRAudyssey,
+        DenonAVRInput,
+        DenonAVRSoundMode,
+        DenonAVRToneControl,
+        DenonAVRVolume,
+    ):
+        module = module_class(device=device)
+        for value in vars(module_class).values():
+            if isinstance(value, (AppCommandUpdatePlan, StatusXmlUpdatePlan)):
+                plans.append((module, value))
+
+    assert len(plans) == 10
+    for instance, plan in plans:
+        if isinstance(plan, AppCommandUpdatePlan):
+            steps = [
+                step
+                for zone_steps in plan.zone_steps.values()
+                for _cmd, cmd_steps in zone_steps
+                for step in cmd_steps
+            ]
+        else:
+            steps = plan.steps
+        for step in steps:
+            assert hasattr(instance, step.update_attribute)
+
+
+def test_update_plans_are_immutable():
+    """Test that update plans cannot be changed and reduced plans are shared."""
+    plan = DenonAVRVolume.appcommand_update_plan
+    with pytest.raises(TypeError):
+        plan.zone_steps["Main"] = ()
+    with pytest.raises(attr.exceptions.FrozenInstanceError):
+        plan.cmds = ()
+
+    reduced = plan.without(frozenset({"_volume"}))
+    assert reduced is plan.without(frozenset({"_volume"}))
+    assert all(
+        step.update_attribute != "_volume"
+        for _cmd, steps in reduced.zone_steps["Main"]
+        for step in steps
+    )
+    assert plan.without(frozenset()) is plan
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the adaptive rate limiter."""
+
+# pylint: disable=protected-access
+
+import asyncio
+from unittest import mock
+
+import pytest
+
+from denonavr.rate_limiter import (
+    AdaptiveLimiter,
+    LatencyWindow,
+    RequestPriority,
+    adaptive_timeout,
+)
+
+
+@pytest.mark.asyncio
+async def test_acquire_bursts_and_spaces_tokens():
+    """Test that one second of tokens bursts and later tokens are spaced."""
+    limiter = AdaptiveLimiter(initial_wait_ms=250.0, min_wait_ms=100.0)
+    tasks = len(asyncio.all_tasks())
+    with mock.patch("denonavr.rate_limiter.time.monotonic", return_value=10.0):
+        for _ in range(4):
+            await limiter.acquire("host")
+        assert limiter._states["host"].tat == pytest.approx(11.0)
+        assert len(asyncio.all_tasks()) == tasks
+
+        with mock.patch.object(asyncio.get_running_loop(), "call_later") as call_later:
+            waiter = asyncio.create_task(limiter.acquire("host"))
+            await asyncio.sleep(0)
+            assert call_later.call_args.args[0] == pytest.approx(0.25)
+            assert not waiter.done()
+            waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+
+@pytest.mark.asyncio
+async def test_acquire_by_priority():
+    """Test that waiting requests are admitted by priority and arrival."""
+    limiter = AdaptiveLimiter(initial_wait_ms=20.0, min_wait_ms=20.0)
+    # Use up the burst
+    for _ in range(50):
+        await limiter.acquire("host")
+
+    admitted = []
+
+    async def acquire(name, priority):
+        await limiter.acquire("host", priority)
+        admitted.append(name)
+
+    tasks = [
+        asyncio.create_task(acquire("poll1", RequestPriority.POLL)),
+        asyncio.create_task(acquire("discovery", RequestPriority.DISCOVERY)),
+        asyncio.create_task(acquire("media", RequestPriority.MEDIA)),
+        asyncio.create_task(acquire("poll2", RequestPriority.POLL)),
+    ]
+    await asyncio.sleep(0)
+    tasks.append(
+        asyncio.create_task(acquire("interactive", RequestPriority.INTERACTIVE))
+    )
+    await asyncio.sleep(0)
+    assert limiter.stats[RequestPriority.POLL].queued == 2
+
+    await asyncio.wait_for(asyncio.gather(*tasks), 5.0)
+    assert admitted == ["interactive", "poll1", "poll2", "media", "discovery"]
+    stats = limiter.stats[RequestPriority.POLL]
+    assert stats.acquired == 52
+    assert stats.queued == 0
+    assert stats.max_queued == 2
+    assert 0 < stats.mean_wait < stats.max_wait
+    assert limiter.stats[RequestPriority.INTERACTIVE].max_wait < stats.max_wait
+
+
+@pytest.mark.asyncio
+async def test_acquire_cancelled_after_dispatch():
+    """Test that a token handed out to a cancelled request is not lost."""
+    limiter = AdaptiveLimiter(initial_wait_ms=250.0, min_wait_ms=100.0)
+    with mock.patch("denonavr.rate_limiter.time.monotonic", return_value=10.0):
+        for _ in range(4):
+            await limiter.acquire("host")
+        state = limiter._states["host"]
+        first = asyncio.create_task(limiter.acquire("host"))
+        second = asyncio.create_task(limiter.acquire("host"))
+        await asyncio.sleep(0)
+
+    # The first request gets the next token, but is cancelled before it resumes
+    with mock.patch("denonavr.rate_limiter.time.monotonic", return_value=10.25):
+        limiter._dispatch(state)
+        assert state.tat == pytest.approx(11.25)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        # The token is passed on to the next request
+        await asyncio.wait_for(second, 1.0)
+        assert state.tat == pytest.approx(11.25)
+        third = asyncio.create_task(limiter.acquire("host"))
+        await asyncio.sleep(0)
+
+    # Without further requests the token is given back
+    with mock.patch("denonavr.rate_limiter.time.monotonic", return_value=10.5):
+        state.handle.cancel()
+        limiter._dispatch(state)
+        assert state.tat == pytest.approx(11.5)
+        third.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await third
+        assert state.tat == pytest.approx(11.25)
+        assert not state.waiters
+    assert limiter.stats[RequestPriority.POLL].queued == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_follows_latency():
+    """Test that the rate is recalculated lazily from the latency EWMA."""
+    limiter = AdaptiveLimiter(adjust_interval=1.0, min_wait_ms=10.0, k=1.0)
+    limiter.record_latency("host", 0.0)
+    assert limiter.latency("host") == 0.0
+
+    with mock.patch("denonavr.rate_limiter.time.monotonic", return_value=10.0):
+        await limiter.acquire("host")
+    with mock.patch("denonavr.rate_limiter.time.monotonic", return_value=10.5):
+        limiter.record_latency("host", 10.45)
+    assert limiter.latency("host") == pytest.approx(0.05)
+    assert limiter._states["host"].interval == pytest.approx(0.1)
+
+    with mock.patch("denonavr.rate_limiter.time.monotonic", return_value=11.0):
+        limiter.record_latency("host", 10.95)
+    assert limiter._states["host"].interval == pytest.approx(0.05)
+
+
+@pytest.mark.asyncio
+async def test_timeout_follows_latency_distribution():
+    """Test that timeouts are derived from the latency quantiles."""
+    window = LatencyWindow(size=100)
+    assert window.quantile(0.99) == 0.0
+    for i in range(1, 201):
+        window.add(i / 1000)
+    assert len(window) == 100
+    assert window.quantile(0.5) == pytest.approx(0.151)
+    assert window.quantile(0.99) == pytest.approx(0.2)
+
+    assert adaptive_timeout(None, 2.0) == 2.0
+    assert adaptive_timeout(window, 2.0) == pytest.approx(0.6)
+    assert adaptive_timeout(window, 2.0, minimum=1.0) == 1.0
+    assert adaptive_timeout(window, 0.5) == 0.5
+
+    limiter = AdaptiveLimiter()
+    assert limiter.timeout("host", 2.0) == 2.0
+    with mock.patch("denonavr.rate_limiter.time.monotonic", return_value=10.0):
+        await limiter.acquire("host")
+        for _ in range(20):
+            limiter.record_latency("host", 9.9)
+    assert limiter.timeout("host", 2.0) == pytest.approx(0.3)
+    assert limiter.timeout("other", 2.0) == 2.0
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the adaptive update scheduling."""
+
+# pylint: disable=protected-access
+
+import asyncio
+from unittest import mock
+
+import pytest
+
+from denonavr.exceptions import AvrNetworkError
+from denonavr.scheduler import AdaptiveInterval, PollScheduler
+
+
+def test_adaptive_interval():
+    """Test that the interval is fast after activity and backs off idle."""
+    interval = AdaptiveInterval(
+        1.0, 8.0, standby_interval=60.0, active_period=10.0, backoff=2.0
+    )
+    with mock.patch("denonavr.scheduler.time.monotonic", return_value=100.0):
+        assert [interval.next_interval() for _ in range(5)] == [1, 2, 4, 8, 8]
+        assert interval.next_interval(standby=True) == 60.0
+
+        assert interval.next_interval(changed=True) == 1.0
+        assert interval.next_interval(standby=True) == 1.0
+
+    with mock.patch("denonavr.scheduler.time.monotonic", return_value=111.0):
+        assert not interval.active
+        assert interval.next_interval() == 1.0
+        assert interval.next_interval() == 2.0
+
+    with pytest.raises(ValueError):
+        AdaptiveInterval(2.0, 1.0)
+
+
+@pytest.mark.asyncio
+async def test_poll_scheduler():
+    """Test that the scheduler updates, backs off and wakes up on activity."""
+    updates = []
+    failure = None
+
+    async def update():
+        updates.append(None)
+        if failure is not None:
+            raise failure
+
+    scheduler = PollScheduler(
+        update,
+        lambda: None,
+        lambda: False,
+        AdaptiveInterval(60.0, 120.0, active_period=0.0),
+    )
+    with pytest.raises(RuntimeError):
+        await scheduler.async_wait_for_update()
+
+    scheduler.start()
+    await asyncio.sleep(0)
+    assert scheduler.running
+    assert len(updates) == 1
+
+    # Activity wakes up the scheduler instead of waiting for the interval
+    waiter = asyncio.create_task(scheduler.async_wait_for_update())
+    await asyncio.sleep(0)
+    scheduler.notify_activity()
+    await asyncio.wait_for(waiter, 1.0)
+    assert len(updates) == 2
+
+    failure = AvrNetworkError("Error", "request")
+    waiter = asyncio.create_task(scheduler.async_wait_for_update())
+    await asyncio.sleep(0)
+    scheduler.notify_activity()
+    with pytest.raises(AvrNetworkError):
+        await asyncio.wait_for(waiter, 1.0)
+
+    # Unexpected errors are passed to the waiters and do not stop the updates
+    failure = KeyError("state")
+    waiter = asyncio.create_task(scheduler.async_wait_for_update())
+    await asyncio.sleep(0)
+    scheduler.notify_activity()
+    with pytest.raises(KeyError):
+        await asyncio.wait_for(waiter, 1.0)
+    assert scheduler.running
+
+    waiter = asyncio.create_task(scheduler.async_wait_for_update())
+    await asyncio.sleep(0)
+    await scheduler.async_stop()
+    assert not scheduler.running
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
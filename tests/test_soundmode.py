@@ -10,6 +10,13 @@ from tests.test_helpers import DeviceTestFixture
 # pylint: disable=protected-access
 
 
+def _sound_mode(fixture: DeviceTestFixture) -> DenonAVRSoundMode:
+    """Return a sound mode instance which receives the telnet events."""
+    sound_mode = DenonAVRSoundMode(device=fixture.device_info)
+    fixture.telnet_api.register_prefix_handlers("PS", sound_mode._ps_handlers)
+    return sound_mode
+
+
 class TestDenonAVRSoundMode:
     """Test cases for DenonAVRSoundMode."""
 
@@ -17,8 +24,8 @@ class TestDenonAVRSoundMode:
     async def test_async_neural_x_on_returns_early_when_on(self):
         """Test that async_neural_x_on returns early when already on."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "NEURAL:ON")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSNEURAL:ON")
         await fixture.async_execute(device.async_neural_x_on())
         fixture.assert_not_called()
 
@@ -26,8 +33,8 @@ class TestDenonAVRSoundMode:
     async def test_async_neural_x_on_sends_command_when_off(self):
         """Test that async_neural_x_on sends command when off."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "NEURAL:OFF")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSNEURAL:OFF")
         await fixture.async_execute(device.async_neural_x_on())
         fixture.assert_called_once()
 
@@ -35,8 +42,8 @@ class TestDenonAVRSoundMode:
     async def test_async_neural_x_off_returns_early_when_off(self):
         """Test that async_neural_x_off returns early when already off."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "NEURAL:OFF")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSNEURAL:OFF")
         await fixture.async_execute(device.async_neural_x_off())
         fixture.assert_not_called()
 
@@ -44,8 +51,8 @@ class TestDenonAVRSoundMode:
     async def test_async_neural_x_off_sends_command_when_on(self):
         """Test that async_neural_x_off sends command when on."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "NEURAL:ON")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSNEURAL:ON")
         await fixture.async_execute(device.async_neural_x_off())
         fixture.assert_called_once()
 
@@ -53,8 +60,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_auto_returns_early_when_auto(self):
         """Test that async_imax_auto returns early when already auto."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAX AUTO")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAX AUTO")
         await fixture.async_execute(device.async_imax_auto())
         fixture.assert_not_called()
 
@@ -62,8 +69,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_auto_sends_command_when_not_auto(self):
         """Test that async_imax_auto sends command when not auto."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAX OFF")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAX OFF")
         await fixture.async_execute(device.async_imax_auto())
         fixture.assert_called_once()
 
@@ -71,8 +78,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_off_returns_early_when_off(self):
         """Test that async_imax_off returns early when already off."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAX OFF")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAX OFF")
         await fixture.async_execute(device.async_imax_off())
         fixture.assert_not_called()
 
@@ -80,8 +87,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_off_sends_command_when_not_off(self):
         """Test that async_imax_off sends command when not off."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAX AUTO")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAX AUTO")
         await fixture.async_execute(device.async_imax_off())
         fixture.assert_called_once()
 
@@ -89,8 +96,8 @@ class TestDenonAVRSoundMode:
     async def test_async_cinema_eq_on_returns_early_when_on(self):
         """Test that async_cinema_eq_on returns early when already on."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "CINEMA EQ.ON")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSCINEMA EQ.ON")
         await fixture.async_execute(device.async_cinema_eq_on())
         fixture.assert_not_called()
 
@@ -98,8 +105,8 @@ class TestDenonAVRSoundMode:
     async def test_async_cinema_eq_on_sends_command_when_off(self):
         """Test that async_cinema_eq_on sends command when off."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "CINEMA EQ.OFF")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSCINEMA EQ.OFF")
         await fixture.async_execute(device.async_cinema_eq_on())
         fixture.assert_called_once()
 
@@ -107,8 +114,8 @@ class TestDenonAVRSoundMode:
     async def test_async_cinema_eq_off_returns_early_when_off(self):
         """Test that async_cinema_eq_off returns early when already off."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "CINEMA EQ.OFF")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSCINEMA EQ.OFF")
         await fixture.async_execute(device.async_cinema_eq_off())
         fixture.assert_not_called()
 
@@ -116,8 +123,8 @@ class TestDenonAVRSoundMode:
     async def test_async_cinema_eq_off_sends_command_when_on(self):
         """Test that async_cinema_eq_off sends command when on."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "CINEMA EQ.ON")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSCINEMA EQ.ON")
         await fixture.async_execute(device.async_cinema_eq_off())
         fixture.assert_called_once()
 
@@ -125,8 +132,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_audio_settings_returns_early_when_matches(self):
         """Test that async_imax_audio_settings returns early when already matches."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAXAUD AUTO")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAXAUD AUTO")
         await fixture.async_execute(device.async_imax_audio_settings("AUTO"))
         fixture.assert_not_called()
 
@@ -134,8 +141,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_audio_settings_sends_command_when_differs(self):
         """Test that async_imax_audio_settings sends command when differs."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAXAUD MANUAL")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAXAUD MANUAL")
         await fixture.async_execute(device.async_imax_audio_settings("AUTO"))
         fixture.assert_called_once()
 
@@ -143,8 +150,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_hpf_returns_early_when_matches(self):
         """Test that async_imax_hpf returns early when already matches."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAXHPF 080")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAXHPF 080")
         await fixture.async_execute(device.async_imax_hpf(80))
         fixture.assert_not_called()
 
@@ -152,8 +159,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_hpf_sends_command_when_differs(self):
         """Test that async_imax_hpf sends command when differs."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAXHPF 060")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAXHPF 060")
         await fixture.async_execute(device.async_imax_hpf(80))
         fixture.assert_called_once()
 
@@ -161,8 +168,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_lpf_returns_early_when_matches(self):
         """Test that async_imax_lpf returns early when already matches."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAXLPF 120")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAXLPF 120")
         await fixture.async_execute(device.async_imax_lpf(120))
         fixture.assert_not_called()
 
@@ -170,8 +177,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_lpf_sends_command_when_differs(self):
         """Test that async_imax_lpf sends command when differs."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAXLPF 080")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAXLPF 080")
         await fixture.async_execute(device.async_imax_lpf(120))
         fixture.assert_called_once()
 
@@ -179,8 +186,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_subwoofer_mode_returns_early_when_matches(self):
         """Test that async_imax_subwoofer_mode returns early when already matches."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAXSWM ON")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAXSWM ON")
         await fixture.async_execute(device.async_imax_subwoofer_mode("ON"))
         fixture.assert_not_called()
 
@@ -188,8 +195,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_subwoofer_mode_sends_command_when_differs(self):
         """Test that async_imax_subwoofer_mode sends command when differs."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAXSWM OFF")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAXSWM OFF")
         await fixture.async_execute(device.async_imax_subwoofer_mode("ON"))
         fixture.assert_called_once()
 
@@ -197,8 +204,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_subwoofer_output_returns_early_when_matches(self):
         """Test that async_imax_subwoofer_output returns early when already matches."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAXSWO L+M")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAXSWO L+M")
         await fixture.async_execute(device.async_imax_subwoofer_output("L+M"))
         fixture.assert_not_called()
 
@@ -206,8 +213,8 @@ class TestDenonAVRSoundMode:
     async def test_async_imax_subwoofer_output_sends_command_when_differs(self):
         """Test that async_imax_subwoofer_output sends command when differs."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "IMAXSWO LFE")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSIMAXSWO LFE")
         await fixture.async_execute(device.async_imax_subwoofer_output("L+M"))
         fixture.assert_called_once()
 
@@ -215,8 +222,8 @@ class TestDenonAVRSoundMode:
     async def test_async_dialog_enhancer_returns_early_when_matches(self):
         """Test that async_dialog_enhancer returns early when already matches."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "DEH OFF")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSDEH OFF")
         await fixture.async_execute(device.async_dialog_enhancer("Off"))
         fixture.assert_not_called()
 
@@ -224,8 +231,8 @@ class TestDenonAVRSoundMode:
     async def test_async_dialog_enhancer_sends_command_when_differs(self):
         """Test that async_dialog_enhancer sends command when differs."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "DEH OFF")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSDEH OFF")
         await fixture.async_execute(device.async_dialog_enhancer("High"))
         fixture.assert_called_once()
 
@@ -233,8 +240,8 @@ class TestDenonAVRSoundMode:
     async def test_async_auromatic_3d_preset_returns_early_when_matches(self):
         """Test that async_auromatic_3d_preset returns early when already matches."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "AUROPR SMA")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSAUROPR SMA")
         await fixture.async_execute(device.async_auromatic_3d_preset("Small"))
         fixture.assert_not_called()
 
@@ -242,8 +249,8 @@ class TestDenonAVRSoundMode:
     async def test_async_auromatic_3d_preset_sends_command_when_differs(self):
         """Test that async_auromatic_3d_preset sends command when differs."""
         fixture = DeviceTestFixture(True)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "AUROPR SMA")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSAUROPR SMA")
         await fixture.async_execute(device.async_auromatic_3d_preset("Large"))
         fixture.assert_called_once()
 
@@ -251,9 +258,9 @@ class TestDenonAVRSoundMode:
     async def test_async_mdax_returns_early_when_matches(self):
         """Test that async_mdax returns early when already matches."""
         fixture = DeviceTestFixture(False)
-        device = DenonAVRSoundMode(device=fixture.device_info)
+        device = _sound_mode(fixture)
         device._device.manufacturer = "Marantz"
-        device._ps_callback("Main", "", "MDAX OFF")
+        fixture.telnet_api._process_event("PSMDAX OFF")
         await fixture.async_execute(device.async_mdax("Off"))
         fixture.assert_not_called()
 
@@ -261,8 +268,8 @@ class TestDenonAVRSoundMode:
     async def test_async_mdax_sends_command_when_differs(self):
         """Test that async_mdax sends command when differs."""
         fixture = DeviceTestFixture(False)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "MDAX OFF")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSMDAX OFF")
         await fixture.async_execute(device.async_mdax("High"))
         fixture.assert_called_once()
 
@@ -270,8 +277,8 @@ class TestDenonAVRSoundMode:
     async def test_async_dac_filter_returns_early_when_matches(self):
         """Test that async_dac_filter returns early when already matches."""
         fixture = DeviceTestFixture(False)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "DACFIL MODE1")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSDACFIL MODE1")
         await fixture.async_execute(device.async_dac_filter("Mode 1"))
         fixture.assert_not_called()
 
@@ -279,7 +286,7 @@ class TestDenonAVRSoundMode:
     async def test_async_dac_filter_sends_command_when_differs(self):
         """Test that async_dac_filter sends command when differs."""
         fixture = DeviceTestFixture(False)
-        device = DenonAVRSoundMode(device=fixture.device_info)
-        device._ps_callback("Main", "", "DACFIL MODE1")
+        device = _sound_mode(fixture)
+        fixture.telnet_api._process_event("PSDACFIL MODE1")
         await fixture.async_execute(device.async_dac_filter("Mode 2"))
         fixture.assert_called_once()